@@ -0,0 +1,281 @@
+"""Throughput of the camera pipeline and ``/video_feed``, without a webcam.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.camera_load --duration 10 --viewers 4
+    python -m benchmarks.camera_load --source "file:clip.mp4?pace=fast" --beauty full
+    python -m benchmarks.camera_load --http --viewers 20 --json report.json
+    python -m benchmarks.camera_load --http --viewers 10 --profile low
+    python -m benchmarks.camera_load --url http://host:8000/video_feed/room1 --viewers 5
+
+By default a ``CameraManager`` runs in this process on a virtual source
+(see ``utils.frame_sources``; a 1280x720 synthetic pattern delivered as
+fast as the pipeline takes it) and ``--viewers`` subscribe to its frames
+directly. ``--http`` also serves the app on a loopback port and makes the
+viewers read ``/video_feed`` over HTTP; ``--url`` measures a running
+server instead, whatever its camera is. Reports each stage's frame rate
+and cost over the run, and per viewer: frames received, frame rate,
+bandwidth and time to the first frame.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.camera_stream import CameraManager
+from utils.pose_backends import create_pose_backend
+from utils.stream_profiles import PROFILES
+
+DEFAULT_SOURCE = "synthetic:?size=1280x720&pace=fast"
+BENCH_CAMERA = "bench"
+BOUNDARY = b"--frame\r\n"
+
+
+class ViewerStats:
+    def __init__(self, viewer_id: int):
+        self.viewer_id = viewer_id
+        self.frames = 0
+        self.bytes = 0
+        self.started_at = time.perf_counter()
+        self.first_frame_at: Optional[float] = None
+        self.last_frame_at: Optional[float] = None
+
+    def frame(self, size: int = 0) -> None:
+        now = time.perf_counter()
+        if self.first_frame_at is None:
+            self.first_frame_at = now
+        self.last_frame_at = now
+        self.frames += 1
+        self.bytes += size
+
+    def summary(self) -> Dict[str, Any]:
+        # Rate over the span between first and last frame, so connecting is not counted
+        span = (self.last_frame_at - self.first_frame_at) if self.frames > 1 else 0.0
+        return {
+            "viewer": self.viewer_id,
+            "frames": self.frames,
+            "fps": (self.frames - 1) / span if span > 0 else 0.0,
+            "mbps": self.bytes * 8 / span / 1e6 if span > 0 else 0.0,
+            "first_frame_ms": None if self.first_frame_at is None
+            else (self.first_frame_at - self.started_at) * 1000,
+        }
+
+
+async def local_viewer(camera: CameraManager, stats: ViewerStats, duration: float, profile: str) -> None:
+    deadline = time.perf_counter() + duration
+    async for _sequence, frame in camera.stream(PROFILES[profile]).subscribe():
+        stats.frame(len(frame))
+        if time.perf_counter() >= deadline:
+            break
+
+
+async def http_viewer(url: str, stats: ViewerStats, duration: float) -> None:
+    """Reads an MJPEG stream, counting parts by their boundary line."""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    try:
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n".encode())
+        status = await reader.readline()
+        if b" 200 " not in status:
+            raise RuntimeError(f"{url}: {status.decode().strip()}")
+        while (await reader.readline()).strip():
+            pass
+        deadline = time.perf_counter() + duration
+        tail = b""
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                chunk = await asyncio.wait_for(reader.read(1 << 16), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            if not chunk:
+                break
+            # Bytes of a part are credited when its next boundary arrives
+            stats.bytes += len(chunk)
+            data = tail + chunk
+            for _ in range(data.count(BOUNDARY)):
+                stats.frame()
+            tail = data[-(len(BOUNDARY) - 1):]
+    finally:
+        writer.close()
+
+
+def stage_rates(before: Dict[str, Any], after: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
+    """Per-stage fps over the run from frame counters; cost from the latest window."""
+    return {
+        stage: {
+            "fps": (stats["frames"] - before.get(stage, {}).get("frames", 0)) / elapsed,
+            "ms": stats["ms"],
+            "dropped": stats.get("dropped", 0) - before.get(stage, {}).get("dropped", 0),
+        }
+        for stage, stats in after.items()
+    }
+
+
+def fetch_json(url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def stats_url(video_url: str) -> str:
+    # /video_feed -> /camera/stats, /video_feed/{id} -> /camera/{id}/stats
+    parts = urlsplit(video_url)
+    camera = parts.path.rstrip("/")[len("/video_feed"):]
+    return f"{parts.scheme}://{parts.netloc}/camera{camera}/stats"
+
+
+async def measure_url(url: str, viewers: int, duration: float) -> Tuple[Dict[str, Any], List[ViewerStats]]:
+    loop = asyncio.get_running_loop()
+    stats = [ViewerStats(i) for i in range(viewers)]
+    tasks = [asyncio.create_task(http_viewer(url, s, duration)) for s in stats]
+    # Let the first viewer start the camera before taking the baseline
+    while not any(s.frames for s in stats) and not all(t.done() for t in tasks):
+        await asyncio.sleep(0.05)
+    before = (await loop.run_in_executor(None, fetch_json, stats_url(url)))["stages"]
+    started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    after = (await loop.run_in_executor(None, fetch_json, stats_url(url)))["stages"]
+    return stage_rates(before, after, time.perf_counter() - started), stats
+
+
+async def measure_local(camera: CameraManager, viewers: int, duration: float,
+                        profile: str = "full") -> Tuple[Dict[str, Any], List[ViewerStats]]:
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, camera.start):
+        raise RuntimeError(f"Could not open source {camera.source}")
+    try:
+        stats = [ViewerStats(i) for i in range(viewers)]
+        before = camera.stage_stats()
+        started = time.perf_counter()
+        if stats:
+            await asyncio.gather(*(local_viewer(camera, s, duration, profile) for s in stats))
+        else:
+            await asyncio.sleep(duration)
+        return stage_rates(before, camera.stage_stats(), time.perf_counter() - started), stats
+    finally:
+        await loop.run_in_executor(None, camera.stop)
+
+
+def configure(camera: CameraManager, args: argparse.Namespace) -> None:
+    camera.set_pose_backend(create_pose_backend(args.pose))
+    if args.beauty:
+        camera.beauty.tier = args.beauty
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def serve_and_measure(args: argparse.Namespace) -> Tuple[Dict[str, Any], List[ViewerStats]]:
+    import uvicorn
+    import main as app_module
+    from utils.camera_pool import CameraPool
+
+    pool = CameraPool({BENCH_CAMERA: args.source}, idle_timeout_s=3600)
+    app_module.camera_pool = pool
+    configure(pool.get(BENCH_CAMERA), args)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app_module.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started and thread.is_alive():
+        await asyncio.sleep(0.05)
+    try:
+        url = f"http://127.0.0.1:{port}/video_feed/{BENCH_CAMERA}?profile={args.profile}&adaptive=false"
+        return await measure_url(url, args.viewers, args.duration)
+    finally:
+        server.should_exit = True
+        await asyncio.get_running_loop().run_in_executor(None, thread.join, 10)
+        for camera in pool.running():
+            camera.stop()
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.url:
+        stages, viewers = await measure_url(args.url, args.viewers, args.duration)
+        source = args.url
+    elif args.http:
+        stages, viewers = await serve_and_measure(args)
+        source = args.source
+    else:
+        camera = CameraManager(args.source, BENCH_CAMERA)
+        configure(camera, args)
+        stages, viewers = await measure_local(camera, args.viewers, args.duration, args.profile)
+        source = args.source
+    summaries = [v.summary() for v in viewers]
+    rates = [s["fps"] for s in summaries]
+    return {
+        "source": source,
+        "duration": args.duration,
+        "stages": stages,
+        "viewers": len(summaries),
+        "viewer_fps_mean": sum(rates) / len(rates) if rates else None,
+        "viewer_fps_min": min(rates) if rates else None,
+        "mbps": sum(s["mbps"] for s in summaries),
+        "per_viewer": summaries,
+    }
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"source: {report['source']}")
+    print(f"{'stage':>8} {'fps':>7} {'ms':>7} {'dropped':>7}")
+    for stage, s in report["stages"].items():
+        print(f"{stage:>8} {s['fps']:>7.1f} {s['ms']:>7.2f} {s['dropped']:>7}")
+    if report["per_viewer"]:
+        print(f"{'viewer':>8} {'frames':>7} {'fps':>7} {'Mbit/s':>7} {'first':>7}")
+        for s in report["per_viewer"]:
+            print(f"{s['viewer']:>8} {s['frames']:>7} {s['fps']:>7.1f} {s['mbps']:>7.1f} "
+                  f"{_fmt(s['first_frame_ms']):>7}")
+        print(f"viewers: {report['viewers']}, fps mean {_fmt(report['viewer_fps_mean'])} / "
+              f"min {_fmt(report['viewer_fps_min'])}, {report['mbps']:.1f} Mbit/s total")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="camera source setting (device index or virtual source)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--viewers", type=int, default=1)
+    parser.add_argument("--http", action="store_true", help="serve the app locally and view /video_feed over HTTP")
+    parser.add_argument("--url", help="/video_feed URL of a running server to measure instead")
+    parser.add_argument("--beauty", choices=["off", "fast", "balanced", "full"], help="beauty tier (default: server setting)")
+    parser.add_argument("--pose", default="none", help="pose backend: none, auto or mediapipe")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="full", help="stream profile of every viewer")
+    parser.add_argument("--json", dest="json_path", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+    if args.url and args.viewers < 1:
+        parser.error("--url needs at least one viewer")
+    if args.http and args.viewers < 1:
+        parser.error("--http needs at least one viewer")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""Micro-benchmarks for the per-frame posture and joint math and camera image stages.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.hot_paths                    # compare with baseline.json
+    python -m benchmarks.hot_paths --update-baseline  # record a new baseline
+    python -m benchmarks.hot_paths -k cervical        # only matching benchmarks
+    python -m benchmarks.hot_paths --recording PATH   # also run on recorded frames
+
+Every benchmark reports ns/op (best of ``--repeat`` timed runs) and the peak
+memory traced by ``tracemalloc`` during one call, i.e. how much the op
+allocates while it runs. Times are compared after dividing by a fixed
+calibration workload, so a baseline recorded on one machine is still
+meaningful on another; the exit status is 1 when any benchmark is slower
+(or allocates more) than the baseline by more than ``--tolerance``.
+
+At 30 fps a frame has a 33 ms budget for decoding, every measurement and
+the posture analysis together, so a regression of a few microseconds in a
+``calculate_*_rom`` is worth catching. The ``beauty.*`` benchmarks time each
+preview enhancement tier on a 1280x720 frame.
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Landmark
+from utils import math_utils
+from utils.batch_joint_analysis import MeasurementPlan
+from utils.beauty_filter import BEAUTY_TIERS, BeautyFilter
+from utils.joint_analysis import (
+    calculate_ankle_rom, calculate_cervical_rom, calculate_elbow_rom, calculate_hip_rom,
+    calculate_joint_angle, calculate_knee_rom, calculate_shoulder_rom, calculate_thoracolumbar_rom,
+    calculate_wrist_rom
+)
+from utils.posture_analysis import analyze_posture
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.3
+# Allocation comparisons ignore growth below this many bytes
+ALLOCATION_SLACK = 512
+WIDTH, HEIGHT = 1280, 720
+
+# Every direction each calculate_*_rom understands; None marks the joints
+# that take no side.
+ROM_DIRECTIONS = {
+    "cervical": (None, ["flexion", "extension", "left-rotation", "right-rotation",
+                        "left-lateral-flexion", "right-lateral-flexion"]),
+    "shoulder": ("left", ["flexion", "extension", "abduction", "adduction",
+                          "internal-rotation", "external-rotation"]),
+    "thoracolumbar": (None, ["flexion", "extension", "left-lateral-flexion", "right-lateral-flexion"]),
+    "elbow": ("left", ["flexion", "extension"]),
+    "wrist": ("left", ["flexion", "extension", "ulnar-deviation", "radial-deviation"]),
+    "hip": ("left", ["flexion", "extension", "abduction"]),
+    "knee": ("left", ["flexion", "extension"]),
+    "ankle": ("left", ["dorsiflexion", "plantarflexion"]),
+}
+
+ROM_FUNCTIONS = {
+    "shoulder": calculate_shoulder_rom,
+    "elbow": calculate_elbow_rom,
+    "wrist": calculate_wrist_rom,
+    "hip": calculate_hip_rom,
+    "knee": calculate_knee_rom,
+    "ankle": calculate_ankle_rom,
+}
+
+# Normalized (x, y, z) of a person standing facing the camera
+STANDING_POSE = {
+    0: (0.50, 0.18, -0.30), 7: (0.54, 0.19, -0.10), 8: (0.46, 0.19, -0.10),
+    11: (0.58, 0.30, 0.00), 12: (0.42, 0.30, 0.00), 13: (0.61, 0.42, 0.02), 14: (0.39, 0.42, 0.02),
+    15: (0.62, 0.53, 0.00), 16: (0.38, 0.53, 0.00), 17: (0.63, 0.56, 0.00), 18: (0.37, 0.56, 0.00),
+    19: (0.62, 0.57, -0.01), 20: (0.38, 0.57, -0.01), 21: (0.61, 0.55, -0.01), 22: (0.39, 0.55, -0.01),
+    23: (0.55, 0.56, 0.00), 24: (0.45, 0.56, 0.00), 25: (0.55, 0.73, 0.01), 26: (0.45, 0.73, 0.01),
+    27: (0.55, 0.90, 0.05), 28: (0.45, 0.90, 0.05), 29: (0.55, 0.92, 0.07), 30: (0.45, 0.92, 0.07),
+    31: (0.56, 0.94, -0.03), 32: (0.44, 0.94, -0.03),
+}
+
+
+class Benchmark(NamedTuple):
+    name: str
+    op: Callable[[], Any]
+
+
+class Measurement(NamedTuple):
+    name: str
+    ns: float
+    peak_bytes: int
+
+
+def synthetic_frames(count: int = 32, seed: int = 0) -> np.ndarray:
+    """``(count, 33, 4)`` landmarks: a standing pose with per-frame jitter."""
+    base = np.zeros((33, 4))
+    base[:, :3] = (0.5, 0.5, 0.0)
+    for index, point in STANDING_POSE.items():
+        base[index, :3] = point
+    base[:, 3] = 1.0
+    rng = np.random.default_rng(seed)
+    frames = np.repeat(base[None], count, axis=0)
+    frames[:, :, :3] += rng.normal(0, 0.01, size=(count, 33, 3))
+    return frames
+
+
+def world_frames(frames: np.ndarray) -> np.ndarray:
+    # Metric coordinates centred on the hips, as MediaPipe reports them
+    world = frames.copy()
+    world[:, :, :3] = (frames[:, :, :3] - (0.5, 0.56, 0.0)) * (1.0, 1.7, 1.0)
+    return world
+
+
+def load_recording(path: str) -> np.ndarray:
+    """Frames from a recording directory, ``.npz`` archive or NDJSON file."""
+    if os.path.isdir(path):
+        from utils.session_recorder import SessionReader
+        return SessionReader(path).read().landmarks.astype(np.float64)
+
+    from utils.batch_replay import FrameBlock, read_session
+    with open(path, "rb") as f:
+        blocks = read_session(f.read(), os.path.basename(path))
+        return np.concatenate([b.landmarks for b in blocks if isinstance(b, FrameBlock)])
+
+
+def _dicts(frame: np.ndarray) -> List[Dict[str, float]]:
+    return [{"x": p[0], "y": p[1], "z": p[2], "visibility": p[3]} for p in frame.tolist()]
+
+
+def _cycling(op: Callable[[Any], Any], inputs: List[Any]) -> Callable[[], Any]:
+    it = itertools.cycle(inputs)
+    return lambda: op(next(it))
+
+
+def build_benchmarks(frames: np.ndarray, suffix: str = "") -> List[Benchmark]:
+    dicts = [_dicts(frame) for frame in frames]
+    world_dicts = [_dicts(frame) for frame in world_frames(frames)]
+    models = [[Landmark(**p) for p in frame] for frame in dicts]
+    pixels = [[math_utils.get_pixel_coords(p, WIDTH, HEIGHT) for p in frame] for frame in dicts]
+    benches: List[Benchmark] = []
+
+    def add(name: str, op: Callable[[Any], Any], inputs: List[Any]) -> None:
+        benches.append(Benchmark(name + suffix, _cycling(op, inputs)))
+
+    # math_utils primitives on elbow/shoulder/wrist points
+    add("math.get_pixel_coords", lambda lm: math_utils.get_pixel_coords(lm[13], WIDTH, HEIGHT), dicts)
+    add("math.calculate_angle", lambda px: math_utils.calculate_angle(px[11], px[13], px[15]), pixels)
+    add("math.calculate_signed_angle", lambda px: math_utils.calculate_signed_angle(px[11], px[13], px[15]), pixels)
+    add("math.calculate_midpoint", lambda px: math_utils.calculate_midpoint(px[11], px[12]), pixels)
+    add("math.calculate_angle_between_vectors_2d",
+        lambda px: math_utils.calculate_angle_between_vectors_2d(px[11], px[13]), pixels)
+    add("math.calculate_signed_angle_between_vectors_2d",
+        lambda px: math_utils.calculate_signed_angle_between_vectors_2d(px[11], px[13]), pixels)
+    add("math.calculate_vector_3d", lambda w: math_utils.calculate_vector_3d(w[23], w[11]), world_dicts)
+    add("math.calculate_angle_3d", lambda w: math_utils.calculate_angle_3d(w[11], w[13]), world_dicts)
+    add("math.calculate_midpoint_3d", lambda w: math_utils.calculate_midpoint_3d(w[11], w[12]), world_dicts)
+    add("math.normalize_3d", lambda w: math_utils.normalize_3d(w[11]), world_dicts)
+    add("math.cross_product_3d", lambda w: math_utils.cross_product_3d(w[11], w[13]), world_dicts)
+    add("math.dot_product_3d", lambda w: math_utils.dot_product_3d(w[11], w[13]), world_dicts)
+
+    # Every calculate_*_rom direction, 2D; cervical also through the 3D path
+    for joint, (side, directions) in ROM_DIRECTIONS.items():
+        for direction in directions:
+            name = f"rom.{joint}.{direction}"
+            if joint == "cervical":
+                add(name, lambda lm, d=direction: calculate_cervical_rom(d, lm, WIDTH, HEIGHT), dicts)
+                add(name + ".3d",
+                    lambda pair, d=direction: calculate_cervical_rom(d, pair[0], WIDTH, HEIGHT, pair[1]),
+                    list(zip(dicts, world_dicts)))
+            elif joint == "thoracolumbar":
+                add(name, lambda lm, d=direction: calculate_thoracolumbar_rom(d, lm, WIDTH, HEIGHT), dicts)
+            else:
+                func = ROM_FUNCTIONS[joint]
+                add(name, lambda lm, f=func, d=direction, s=side: f(d, s, lm, WIDTH, HEIGHT), dicts)
+
+    # Compiled plan with every measurement, as used by /ws/analyze, against
+    # the same measurements one calculate_joint_angle call at a time
+    measurements = [
+        {"id": f"{joint}-{direction}", "jointType": joint, "direction": direction, "side": side}
+        for joint, (side, directions) in ROM_DIRECTIONS.items() for direction in directions
+    ]
+    plan = MeasurementPlan(measurements)
+    add("plan.evaluate_frame.all", lambda frame: plan.evaluate_frame(frame, WIDTH, HEIGHT), list(frames))
+    add("plan.scalar.all", lambda lm: [
+        calculate_joint_angle(m["jointType"], m["direction"], lm, WIDTH, HEIGHT, side=m["side"])
+        for m in measurements
+    ], dicts)
+
+    # analyze_posture per view: validated models (HTTP path) and arrays (WS fast path)
+    for view in ("front", "back", "side"):
+        add(f"posture.{view}", lambda lm, v=view: analyze_posture(v, lm, WIDTH, HEIGHT), models)
+        add(f"posture.{view}.array", lambda frame, v=view: analyze_posture(v, frame, WIDTH, HEIGHT),
+            list(frames))
+
+    return benches
+
+
+def synthetic_image(width: int = 1280, height: int = 720, seed: int = 0) -> np.ndarray:
+    """BGR frame with smooth shading, hard edges and sensor-like noise."""
+    rng = np.random.default_rng(seed)
+    image = cv2.resize(rng.integers(40, 220, (12, 20, 3), dtype=np.uint8), (width, height),
+                       interpolation=cv2.INTER_CUBIC)
+    cv2.rectangle(image, (width // 4, height // 4), (width // 2, height * 2 // 3), (30, 60, 200), -1)
+    cv2.circle(image, (width * 3 // 4, height // 3), height // 6, (200, 180, 150), -1)
+    return np.clip(image + rng.normal(0, 8, image.shape), 0, 255).astype(np.uint8)
+
+
+def build_image_benchmarks(width: int = 1280, height: int = 720) -> List[Benchmark]:
+    image = synthetic_image(width, height)
+    return [
+        Benchmark(f"beauty.{tier}", lambda f=BeautyFilter(tier): f.apply(image))
+        for tier in BEAUTY_TIERS
+    ]
+
+
+def calibration_op() -> int:
+    # Fixed interpreter-bound workload used to normalize timings across machines
+    return sum(i * i for i in range(200))
+
+
+def time_op(op: Callable[[], Any], min_time: float = 0.05, repeat: int = 5) -> float:
+    """Best-of-``repeat`` nanoseconds per call."""
+    op()
+    loops = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(loops):
+            op()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9:
+            break
+        loops *= 2
+    best = elapsed / loops
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat - 1):
+            start = time.perf_counter_ns()
+            for _ in range(loops):
+                op()
+            best = min(best, (time.perf_counter_ns() - start) / loops)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def peak_allocation(op: Callable[[], Any], calls: int = 8) -> int:
+    """Largest ``tracemalloc`` peak over a few calls, in bytes."""
+    op()
+    peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            op()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(
+    benches: List[Benchmark],
+    min_time: float = 0.05,
+    repeat: int = 5,
+    report: Optional[Callable[[Measurement], None]] = None
+) -> List[Measurement]:
+    results = []
+    for bench in benches:
+        measurement = Measurement(bench.name, time_op(bench.op, min_time, repeat), peak_allocation(bench.op))
+        if report is not None:
+            report(measurement)
+        results.append(measurement)
+    return results
+
+
+def compare(
+    results: List[Measurement],
+    calibration_ns: float,
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """Describe every benchmark that regressed against ``baseline``."""
+    scale = calibration_ns / baseline["calibration_ns"]
+    regressions = []
+    for m in results:
+        expected = baseline["benchmarks"].get(m.name)
+        if expected is None:
+            continue
+        allowed_ns = expected["ns"] * scale * (1 + tolerance)
+        if m.ns > allowed_ns:
+            regressions.append(f"{m.name}: {m.ns:.0f} ns/op, allowed {allowed_ns:.0f} "
+                               f"(baseline {expected['ns']:.0f} x machine factor {scale:.2f})")
+        allowed_bytes = expected["peak_bytes"] * (1 + tolerance) + ALLOCATION_SLACK
+        if m.peak_bytes > allowed_bytes:
+            regressions.append(f"{m.name}: peak {m.peak_bytes} B/op, allowed {allowed_bytes:.0f}")
+    return regressions
+
+
+def baseline_document(results: List[Measurement], calibration_ns: float) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "calibration_ns": calibration_ns,
+        "benchmarks": {m.name: {"ns": round(m.ns, 1), "peak_bytes": m.peak_bytes} for m in results},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("--recording", help="recording directory, .npz or NDJSON to benchmark as well")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    benches = build_benchmarks(synthetic_frames()) + build_image_benchmarks()
+    if args.recording:
+        benches += build_benchmarks(load_recording(args.recording), suffix="@recorded")
+    if args.pattern:
+        benches = [b for b in benches if args.pattern in b.name]
+
+    calibration_ns = time_op(calibration_op, args.min_time, args.repeat)
+    print(f"calibration: {calibration_ns:.0f} ns/op")
+    print(f"{'benchmark':<52} {'ns/op':>12} {'peak B/op':>10}")
+    results = run_benchmarks(
+        benches, args.min_time, args.repeat,
+        report=lambda m: print(f"{m.name:<52} {m.ns:>12.0f} {m.peak_bytes:>10}")
+    )
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(baseline_document(results, calibration_ns), f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, calibration_ns, baseline, args.tolerance)
+    if regressions:
+        # Re-time suspects before failing: one noisy run should not break the build
+        suspects = {line.split(":")[0] for line in regressions}
+        retimed = run_benchmarks([b for b in benches if b.name in suspects], args.min_time, args.repeat * 2)
+        best = {m.name: m for m in retimed}
+        results = [
+            m._replace(ns=min(m.ns, best[m.name].ns), peak_bytes=min(m.peak_bytes, best[m.name].peak_bytes))
+            if m.name in best else m
+            for m in results
+        ]
+        regressions = compare(results, calibration_ns, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regression(s) in {len(results)} benchmarks")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Synthetic multi-client load generator for ``/ws/analyze``.
+
+Usage (from ``backend/``, with the server running):
+
+    python -m benchmarks.ws_load --clients 20 --fps 30 --duration 30
+    python -m benchmarks.ws_load --url ws://host:8000/ws/analyze --joint-ratio 0.5 --encoding binary
+    python -m benchmarks.ws_load --recording PATH --coalesce --json report.json
+
+Each client replays a landmark stream (synthetic movement, or a recording)
+at a fixed frame rate, interleaving POSTURE_SYNC and JOINT_ANALYSIS frames
+in ``--joint-ratio`` proportion, and reports per client and overall:
+end-to-end latency percentiles, result throughput, frames dropped by the
+server (FRAME_STATS), results later than ``--late-ms``, frames that never got
+a result, and how far the sender itself fell behind its schedule.
+
+Results carry no frame id, so latency is matched per message type: in
+order in the default mode (exact, since each connection is processed
+sequentially), and against the newest frame sent in coalescing mode (a
+lower bound, off by at most the analysis time of one frame).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover - only needed to run the tool
+    websockets = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.hot_paths import STANDING_POSE, load_recording
+from utils.fast_codec import dumps, loads
+from utils.frame_codec import encode_frame
+
+DEFAULT_URL = "ws://localhost:8000/ws/analyze"
+WIDTH, HEIGHT = 1280, 720
+RESULT_KINDS = {"ANALYSIS_RESULT": "POSTURE_SYNC", "JOINT_RESULT": "JOINT_ANALYSIS"}
+MEASUREMENTS = [
+    {"id": "shoulder-l", "jointType": "shoulder", "direction": "flexion", "side": "left"},
+    {"id": "elbow-l", "jointType": "elbow", "direction": "flexion", "side": "left"},
+    {"id": "knee-l", "jointType": "knee", "direction": "flexion", "side": "left"},
+    {"id": "hip-l", "jointType": "hip", "direction": "flexion", "side": "left"},
+    {"id": "cervical", "jointType": "cervical", "direction": "flexion"},
+    {"id": "trunk", "jointType": "thoracolumbar", "direction": "flexion"},
+]
+
+
+def synthetic_motion(count: int = 300, fps: float = 30.0, seed: int = 0) -> np.ndarray:
+    """``(count, 33, 4)`` frames of a patient slowly raising an arm and squatting."""
+    base = np.zeros((33, 4))
+    base[:, :3] = (0.5, 0.5, 0.0)
+    for index, point in STANDING_POSE.items():
+        base[index, :3] = point
+    base[:, 3] = 1.0
+    frames = np.repeat(base[None], count, axis=0)
+    t = np.arange(count) / fps
+    raise_angle = (1 - np.cos(2 * np.pi * t / 4.0)) / 2 * np.pi * 0.8  # 0..144 deg, 4 s period
+    squat = (1 - np.cos(2 * np.pi * t / 6.0)) / 2 * 0.08                # 6 s period
+    shoulder = base[11, :2]
+    for index, length in ((13, 0.12), (15, 0.23), (17, 0.26), (19, 0.27), (21, 0.25)):
+        frames[:, index, 0] = shoulder[0] + length * np.sin(raise_angle)
+        frames[:, index, 1] = shoulder[1] + length * np.cos(raise_angle)
+    frames[:, :25, 1] += squat[:, None]
+    frames[:, 25:27, 0] += (squat * 0.6)[:, None]
+    rng = np.random.default_rng(seed)
+    frames[:, :, :3] += rng.normal(0, 0.002, size=(count, 33, 3))
+    return frames
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    return float(np.percentile(values, q)) if values else None
+
+
+class ClientStats:
+    """Counters and latency samples for one client."""
+
+    def __init__(self, client_id: int):
+        self.client_id = client_id
+        self.sent = 0
+        self.results = 0
+        self.dropped = 0
+        self.late = 0
+        self.errors = 0
+        self.max_send_lag_ms = 0.0
+        self.latencies_ms: List[float] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None  # Arrival of the last result
+
+    def summary(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        start = now if self.started_at is None else self.started_at
+        elapsed = (now if self.finished_at is None else self.finished_at) - start
+        return {
+            "client": self.client_id,
+            "sent": self.sent,
+            "results": self.results,
+            "dropped": self.dropped,
+            "lost": max(0, self.sent - self.results - self.dropped),
+            "late": self.late,
+            "errors": self.errors,
+            "throughput": self.results / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": percentile(self.latencies_ms, 50),
+            "p95_ms": percentile(self.latencies_ms, 95),
+            "p99_ms": percentile(self.latencies_ms, 99),
+            "max_ms": max(self.latencies_ms) if self.latencies_ms else None,
+            "max_send_lag_ms": self.max_send_lag_ms,
+        }
+
+
+def encode_messages(frames: np.ndarray, encoding: str, view: str) -> Dict[str, List[Any]]:
+    """Pre-encode every frame for both message types, so clients only send."""
+    messages: Dict[str, List[Any]] = {"POSTURE_SYNC": [], "JOINT_ANALYSIS": []}
+    for frame in frames:
+        frame32 = frame.astype(np.float32)
+        landmarks = [{"x": p[0], "y": p[1], "z": p[2], "visibility": p[3]} for p in frame.tolist()]
+        for kind in messages:
+            if encoding == "binary":
+                messages[kind].append(encode_frame(kind, frame32, WIDTH, HEIGHT, view=view))
+            else:
+                messages[kind].append(dumps({
+                    "type": kind, "view": view, "width": WIDTH, "height": HEIGHT, "landmarks": landmarks
+                }))
+    return messages
+
+
+def frame_kind(index: int, joint_ratio: float) -> str:
+    # Evenly interleaves the two types in the requested proportion
+    joint = math.floor((index + 1) * joint_ratio) > math.floor(index * joint_ratio)
+    return "JOINT_ANALYSIS" if joint else "POSTURE_SYNC"
+
+
+async def run_client(client_id: int, args: argparse.Namespace, messages: Dict[str, List[Any]]) -> ClientStats:
+    stats = ClientStats(client_id)
+    pending: Dict[str, Deque[float]] = {kind: deque() for kind in messages}
+    late_s = args.late_ms / 1000.0
+
+    async with websockets.connect(args.url, max_size=None) as ws:
+        await ws.send(json.dumps({"type": "NEGOTIATE", "encoding": args.encoding, "coalesce": args.coalesce,
+                                  "measurements": MEASUREMENTS}))
+        await ws.recv()
+
+        def resolve(kind: str, received_at: float) -> None:
+            queue = pending[kind]
+            if not queue:
+                stats.errors += 1
+                return
+            if args.coalesce:
+                sent_at = queue[-1]
+                queue.clear()
+            else:
+                sent_at = queue.popleft()
+            latency = received_at - sent_at
+            stats.results += 1
+            stats.finished_at = received_at
+            stats.latencies_ms.append(latency * 1000)
+            if latency > late_s:
+                stats.late += 1
+
+        async def receive() -> None:
+            async for raw in ws:
+                received_at = time.perf_counter()
+                message = loads(raw)
+                kind = RESULT_KINDS.get(message.get("type"))
+                if kind is not None:
+                    resolve(kind, received_at)
+                elif message.get("type") == "FRAME_STATS":
+                    stats.dropped += sum(message["dropped"].values())
+                if sending_done.is_set() and settled():
+                    drained.set()
+
+        def settled() -> bool:
+            return stats.results + stats.dropped >= stats.sent
+
+        sending_done = asyncio.Event()
+        drained = asyncio.Event()
+        receiver = asyncio.create_task(receive())
+        count = len(messages["POSTURE_SYNC"])
+        interval = 1.0 / args.fps
+        # Stagger clients across one frame interval, like independent cameras
+        start = time.perf_counter() + interval * client_id / max(args.clients, 1)
+        stats.started_at = start
+        total = int(args.duration * args.fps)
+        for i in range(total):
+            due = start + i * interval
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                stats.max_send_lag_ms = max(stats.max_send_lag_ms, -delay * 1000)
+            kind = frame_kind(i, args.joint_ratio)
+            pending[kind].append(time.perf_counter())
+            await ws.send(messages[kind][(i + client_id * 7) % count])
+            stats.sent += 1
+        sending_done.set()
+
+        if not settled():
+            try:
+                await asyncio.wait_for(drained.wait(), timeout=args.drain)
+            except asyncio.TimeoutError:
+                pass
+        receiver.cancel()
+    return stats
+
+
+def aggregate(stats: List[ClientStats]) -> Dict[str, Any]:
+    latencies = [latency for s in stats for latency in s.latencies_ms]
+    summaries = [s.summary() for s in stats]
+    return {
+        "clients": len(stats),
+        "sent": sum(s["sent"] for s in summaries),
+        "results": sum(s["results"] for s in summaries),
+        "dropped": sum(s["dropped"] for s in summaries),
+        "lost": sum(s["lost"] for s in summaries),
+        "late": sum(s["late"] for s in summaries),
+        "throughput": sum(s["throughput"] for s in summaries),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else None,
+        "per_client": summaries,
+    }
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    frames = load_recording(args.recording) if args.recording else synthetic_motion(fps=args.fps)
+    messages = encode_messages(frames, args.encoding, args.view)
+    stats = await asyncio.gather(*(run_client(i, args, messages) for i in range(args.clients)))
+    return aggregate(list(stats))
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'client':>6} {'sent':>6} {'results':>7} {'dropped':>7} {'lost':>5} {'late':>5} "
+          f"{'res/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} {'lag':>7}")
+    for s in report["per_client"]:
+        print(f"{s['client']:>6} {s['sent']:>6} {s['results']:>7} {s['dropped']:>7} {s['lost']:>5} {s['late']:>5} "
+              f"{s['throughput']:>7.1f} {_fmt(s['p50_ms']):>7} {_fmt(s['p95_ms']):>7} {_fmt(s['p99_ms']):>7} "
+              f"{_fmt(s['max_ms']):>7} {_fmt(s['max_send_lag_ms']):>7}")
+    print(f"total: {report['results']}/{report['sent']} results, {report['dropped']} dropped, "
+          f"{report['lost']} lost, {report['late']} late, {report['throughput']:.1f} results/s, "
+          f"latency p50 {_fmt(report['p50_ms'])} / p95 {_fmt(report['p95_ms'])} / "
+          f"p99 {_fmt(report['p99_ms'])} ms")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of sending per client")
+    parser.add_argument("--joint-ratio", type=float, default=0.5, help="share of JOINT_ANALYSIS frames")
+    parser.add_argument("--encoding", choices=["json", "binary"], default="json")
+    parser.add_argument("--coalesce", action="store_true", help="negotiate latest-frame-wins mode")
+    parser.add_argument("--view", default="front")
+    parser.add_argument("--recording", help="recording directory, .npz or NDJSON to replay")
+    parser.add_argument("--late-ms", type=float, default=100.0, help="results slower than this count as late")
+    parser.add_argument("--drain", type=float, default=5.0, help="seconds to wait for outstanding results")
+    parser.add_argument("--json", dest="json_path", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+    if not 0.0 <= args.joint_ratio <= 1.0:
+        parser.error("--joint-ratio must be between 0 and 1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if websockets is None:
+        print("The load generator needs the 'websockets' package")
+        return 2
+    args = parse_args(argv)
+    report = asyncio.run(run_load(args))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
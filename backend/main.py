@@ -1,19 +1,32 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Dict, Any, Optional
 import uvicorn
 import os
 import sys
 import json
+import time
+import asyncio
+import re
 
 # Add current directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from models import AnalysisRequest, AnalysisResponse, PostureMetrics, JointAnalysisRequest, JointAnalysisResponse
+from models import AnalysisResponse, PostureMetrics, JointMeasurementRequest, WebRtcOffer
 from utils.posture_analysis import analyze_posture
-from utils.joint_analysis import calculate_joint_angle
+from utils.analysis_session import STEP_SECONDS as WS_STEP_SECONDS, AnalysisSession, CONTROL_TYPES, FRAME_TYPES
+from utils.analysis_executor import AnalysisExecutor
+from utils.batch_joint_analysis import MeasurementPlan
+from utils.batch_replay import DEFAULT_BLOCK_SIZE, analyze_session, read_session
+from utils.camera_pool import CameraPool
 from utils.camera_stream import CameraManager
+from utils.stream_profiles import FULL, PROFILES, StreamProfile, ViewerAdapter, custom_profile
+from utils.webrtc_stream import WebRtcPublisher
+from utils.session_recorder import recording_root
+from utils.video_recorder import VideoRecorder
+from utils.qos_governor import LatencyWindow, QosGovernor
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY
 
 app = FastAPI(
     title="Vision3 AI Backend",
@@ -21,40 +34,271 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Initialize Camera Manager
-camera_manager = CameraManager()
+# Camera pipelines by id; each starts with its first viewer
+camera_pool = CameraPool.from_env()
 
-# --- Video Stream ---
+# Shared pool that keeps posture/joint analysis off the event loop
+analysis_executor = AnalysisExecutor.from_env()
+
+# Steps camera quality down when joint analysis latency exceeds its target
+analysis_latency = LatencyWindow()
+qos_governor = QosGovernor.from_env(camera_pool, analysis_latency)
+
+# Low-bandwidth H.264 preview; /video_feed stays the fallback without aiortc
+webrtc_publisher = WebRtcPublisher.from_env()
+background_tasks: List[asyncio.Task] = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    background_tasks.append(asyncio.create_task(camera_pool.run()))
+    if os.environ.get("VISION3_QOS", "1") == "1":
+        background_tasks.append(asyncio.create_task(qos_governor.run()))
+
+@app.on_event("shutdown")
+async def shutdown_analysis_executor():
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    await webrtc_publisher.close_all()
+    await camera_pool.close()
+    analysis_executor.shutdown()
+
+# --- Metrics ---
+
+ws_connections = REGISTRY.gauge("vision3_ws_connections", "Open /ws/analyze connections.")
+REGISTRY.gauge(
+    "vision3_analysis_pending", "Frames submitted to the analysis executor and not yet finished.",
+    callback=lambda: {(): analysis_executor.pending}
+)
+REGISTRY.gauge("vision3_qos_level", "Current QoS degradation level (0 is full quality).",
+               callback=lambda: {(): qos_governor.level})
+REGISTRY.gauge(
+    "vision3_camera_running", "Whether each camera's capture pipeline is running.", ["camera"],
+    callback=lambda: {(c.camera_id,): int(c.is_running) for c in list(camera_pool.cameras.values())}
+)
+REGISTRY.gauge(
+    "vision3_camera_viewers", "/video_feed viewers of each camera.", ["camera"],
+    callback=lambda: {(c.camera_id,): c.viewers for c in list(camera_pool.cameras.values())}
+)
+REGISTRY.gauge(
+    "vision3_webrtc_peers", "Open WebRTC preview connections of each camera.", ["camera"],
+    callback=lambda: {(c.camera_id,): webrtc_publisher.count(c.camera_id) for c in list(camera_pool.cameras.values())}
+)
+REGISTRY.gauge(
+    "vision3_camera_queue_depth", "Frames waiting in front of each camera pipeline stage.", ["camera", "stage"],
+    callback=lambda: {
+        (c.camera_id, stage): queue["depth"]
+        for c in list(camera_pool.cameras.values()) for stage, queue in c.queue_stats().items()
+    }
+)
+REGISTRY.counter(
+    "vision3_camera_dropped_frames_total", "Frames replaced before a busy camera stage took them.",
+    ["camera", "stage"],
+    callback=lambda: {
+        (c.camera_id, stage): queue["dropped"]
+        for c in list(camera_pool.cameras.values()) for stage, queue in c.queue_stats().items()
+    }
+)
+
+@app.get("/metrics")
+async def metrics():
+    """Step timings, connections and queue depths in Prometheus text format."""
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
 
-def gen_frames():
-    camera_manager.start()
+def get_camera(camera_id: Optional[str]) -> CameraManager:
     try:
-        while True:
-            frame = camera_manager.get_video_frame()
-            if frame is None:
-                continue
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-    finally:
-        # We don't necessarily want to stop the camera for every disconnect 
-        # but for this simple version we'll manage it via API
-        pass
+        return camera_pool.get(camera_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+# --- Video Stream ---
+
+MJPEG_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+async def gen_frames(camera: CameraManager, profile: StreamProfile = FULL, adaptive: bool = False):
+    # Viewers of a profile await its next frame and send the shared JPEG buffer as is
+    adapter = ViewerAdapter(profile) if adaptive else None
+    while True:
+        frames = camera.stream(profile).subscribe()
+        try:
+            async for sequence, frame in frames:
+                yield MJPEG_PART_HEADER
+                yield frame
+                yield b'\r\n'
+                if adapter is not None:
+                    changed = adapter.record(sequence, time.monotonic())
+                    if changed is not None:
+                        print(f"Camera {camera.camera_id} viewer switched to the {changed.name} profile")
+                        profile = changed
+                        break
+        finally:
+            await frames.aclose()
 
 @app.get("/video_feed")
-async def video_feed():
-    return StreamingResponse(gen_frames(), 
+@app.get("/video_feed/{camera_id}")
+async def video_feed(
+    camera_id: Optional[str] = None,
+    profile: str = "full",
+    width: Optional[int] = None,
+    quality: Optional[int] = None,
+    fps: Optional[float] = None,
+    adaptive: bool = True
+):
+    """MJPEG preview; ``profile`` or width/quality/fps pick this viewer's variant."""
+    camera = get_camera(camera_id)
+    if profile not in PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown profile: {profile}")
+    try:
+        requested = custom_profile(PROFILES[profile], width, quality, fps)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # The first viewer starts the camera; the pool stops it once viewers are gone
+    started = await camera_pool.start(camera.camera_id)
+    if started is None:
+        raise HTTPException(status_code=503, detail=f"Could not open camera {camera.camera_id}")
+    camera = started
+    return StreamingResponse(gen_frames(camera, requested, adaptive), 
                             media_type="multipart/x-mixed-replace; boundary=frame")
 
+@app.post("/webrtc/offer")
+@app.post("/camera/{camera_id}/webrtc/offer")
+async def webrtc_offer(offer: WebRtcOffer, camera_id: Optional[str] = None):
+    """Answer a WebRTC offer with the camera's preview; clients fall back to /video_feed on 501."""
+    camera = get_camera(camera_id)
+    if not webrtc_publisher.available:
+        raise HTTPException(status_code=501, detail="WebRTC is not available on this server; use /video_feed")
+    if offer.profile not in PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown profile: {offer.profile}")
+    try:
+        requested = custom_profile(PROFILES[offer.profile], offer.width, None, offer.fps)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    started = await camera_pool.start(camera.camera_id)
+    if started is None:
+        raise HTTPException(status_code=503, detail=f"Could not open camera {camera.camera_id}")
+    camera = started
+    try:
+        peer = await webrtc_publisher.answer(camera, offer.sdp, offer.type, requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    answer = peer.connection.localDescription
+    return {"id": peer.peer_id, "sdp": answer.sdp, "type": answer.type}
+
+@app.get("/webrtc")
+async def webrtc_status():
+    """Open WebRTC peers with their current profile, bitrate and loss."""
+    return {"available": webrtc_publisher.available, "peers": webrtc_publisher.status()}
+
+@app.delete("/webrtc/{peer_id}")
+async def webrtc_close(peer_id: str):
+    if not await webrtc_publisher.close(peer_id):
+        raise HTTPException(status_code=404, detail=f"Unknown WebRTC peer {peer_id}")
+    return {"status": "closed"}
+
+@app.get("/cameras")
+async def list_cameras():
+    """Configured cameras with their running state and viewer count."""
+    return {"default": camera_pool.default_id, "cameras": camera_pool.status()}
+
 @app.post("/camera/start")
-async def start_camera():
-    success = camera_manager.start()
-    return {"status": "success" if success else "error"}
+@app.post("/camera/{camera_id}/start")
+async def start_camera(camera_id: Optional[str] = None):
+    """Start a camera and keep it running without viewers until stopped."""
+    camera = get_camera(camera_id)
+    started = await camera_pool.start(camera.camera_id, pin=True)
+    return {"status": "success" if started is not None else "error"}
 
 @app.post("/camera/stop")
-async def stop_camera():
-    camera_manager.stop()
+@app.post("/camera/{camera_id}/stop")
+async def stop_camera(camera_id: Optional[str] = None):
+    camera = get_camera(camera_id)
+    await camera_pool.stop(camera.camera_id)
     return {"status": "success"}
 
+@app.post("/camera/beauty")
+@app.post("/camera/{camera_id}/beauty")
+async def configure_beauty(camera_id: Optional[str] = None, tier: Optional[str] = None, strength: Optional[int] = None):
+    """Switch the preview enhancement tier (off/fast/balanced/full) or strength (0-10)."""
+    camera = get_camera(camera_id)
+    if tier is not None:
+        try:
+            camera.beauty.tier = tier
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if strength is not None:
+        camera.beauty_strength = strength
+    return {"tier": camera.beauty.tier, "strength": camera.beauty_strength}
+
+@app.get("/camera/stats")
+@app.get("/camera/{camera_id}/stats")
+async def camera_stats(camera_id: Optional[str] = None):
+    """Throughput of each capture pipeline stage."""
+    camera = get_camera(camera_id)
+    return {"running": camera.is_running, "stages": camera.stage_stats(), "variants": camera.variant_stats()}
+
+@app.post("/camera/recording/start")
+@app.post("/camera/{camera_id}/recording/start")
+async def start_recording(camera_id: Optional[str] = None, name: Optional[str] = None, fps: Optional[float] = None):
+    """Record the camera into segmented video files under VISION3_RECORD_DIR/video."""
+    camera = get_camera(camera_id)
+    root = recording_root()
+    if root is None:
+        raise HTTPException(status_code=400, detail="Recording is disabled; set VISION3_RECORD_DIR")
+    name = name or f"{camera.camera_id}-{time.strftime('%Y%m%d-%H%M%S')}"
+    if not re.fullmatch(r"[\w.-]+", name) or name.startswith("."):
+        raise HTTPException(status_code=400, detail=f"Invalid recording name: {name}")
+    if fps is not None and fps <= 0:
+        raise HTTPException(status_code=400, detail="fps must be positive")
+    if camera.recording:
+        raise HTTPException(status_code=409, detail=f"Camera {camera.camera_id} is already recording")
+    started = await camera_pool.start(camera.camera_id)
+    if started is None:
+        raise HTTPException(status_code=503, detail=f"Could not open camera {camera.camera_id}")
+    camera = started
+    try:
+        recorder = VideoRecorder.from_env(os.path.join(root, "video", name), camera.camera_id, fps)
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        camera.start_recording(recorder)
+    except RuntimeError as e:
+        # Another request started one in the meantime
+        await asyncio.get_running_loop().run_in_executor(None, recorder.close)
+        raise HTTPException(status_code=409, detail=str(e))
+    return recorder.status()
+
+@app.post("/camera/recording/stop")
+@app.post("/camera/{camera_id}/recording/stop")
+async def stop_recording(camera_id: Optional[str] = None):
+    """Finish the recording; waits for queued frames to be encoded."""
+    camera = get_camera(camera_id)
+    summary = await asyncio.get_running_loop().run_in_executor(None, camera.stop_recording)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Camera {camera.camera_id} is not recording")
+    return summary
+
+@app.get("/camera/recording")
+@app.get("/camera/{camera_id}/recording")
+async def recording_status(camera_id: Optional[str] = None):
+    camera = get_camera(camera_id)
+    recorder = camera.recorder
+    return {"recording": recorder is not None, **(recorder.status() if recorder is not None else {})}
+
+@app.get("/qos")
+async def qos_status():
+    """Current QoS level, measured joint analysis p95 and per-stage camera load."""
+    return qos_governor.status()
+
+@app.get("/camera/posture", response_model=AnalysisResponse)
+@app.get("/camera/{camera_id}/posture", response_model=AnalysisResponse)
+async def camera_posture(camera_id: Optional[str] = None, view: str = "front"):
+    """Posture analysis of the newest pose inferred from a server camera."""
+    estimate = get_camera(camera_id).get_latest_landmarks()
+    if estimate is None:
+        raise HTTPException(status_code=404, detail="No pose detected by the server camera")
+    result = analyze_posture(view, estimate.landmarks, estimate.width, estimate.height)
+    return AnalysisResponse(**result, timestamp=estimate.timestamp)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -66,73 +310,61 @@ app.add_middleware(
 
 # --- WebSocket ---
 
+async def send_timed(websocket: WebSocket, message: str):
+    started = time.perf_counter()
+    await websocket.send_text(message)
+    WS_STEP_SECONDS.observe(time.perf_counter() - started, "send")
+
+async def run_analyzer(websocket: WebSocket, session: AnalysisSession):
+    try:
+        await session.analyze_latest(lambda message: send_timed(websocket, message))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"WebSocket analyzer error: {e}")
+        await websocket.close()
+
 @app.websocket("/ws/analyze")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     print("WebSocket connection established")
+    session = AnalysisSession(analysis_executor, analysis_latency)
+    analyzer: Optional[asyncio.Task] = None
+    ws_connections.inc()
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            if message.get("type") == "POSTURE_SYNC":
-                # Validate and parse using Pydantic
-                request = AnalysisRequest(**message)
-                
-                # Perform analysis
-                result = analyze_posture(
-                    view=request.view,
-                    landmarks=request.landmarks,
-                    width=request.width,
-                    height=request.height
-                )
-                
-                # Construct response
-                response = AnalysisResponse(
-                    metrics=result["metrics"],
-                    issues=result["issues"]
-                )
-                
-                # Send back the results
-                await websocket.send_text(response.json())
-                
-            elif message.get("type") == "JOINT_ANALYSIS":
-                try:
-                    # Validate and parse using Pydantic
-                    request = JointAnalysisRequest(**message)
-                    
-                    results = []
-                    # Pre-convert landmarks to dict once for performance
-                    landmarks_dict = [lm.dict() for lm in request.landmarks]
-                    world_landmarks_dict = [lm.dict() for lm in request.worldLandmarks] if request.worldLandmarks else None
-                    
-                    for m in request.measurements:
-                        angle = calculate_joint_angle(
-                            joint_type=m.jointType,
-                            direction=m.direction,
-                            landmarks=landmarks_dict,
-                            width=request.width,
-                            height=request.height,
-                            side=m.side,
-                            world_landmarks=world_landmarks_dict
-                        )
-                        results.append({"id": m.id, "angle": angle})
-                    
-                    # Construct response
-                    response = JointAnalysisResponse(
-                        results=results
-                    )
-                    
-                    # Send back the results
-                    await websocket.send_text(response.json())
-                except Exception as e:
-                    print(f"Error processing JOINT_ANALYSIS: {e}")
+            raw = await websocket.receive()
+            if raw["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(raw.get("code", 1000))
+
+            kind, payload = session.classify(raw)
+
+            if kind in CONTROL_TYPES:
+                await websocket.send_text(session.handle_control(kind, payload))
+                if session.coalesce and analyzer is None:
+                    # Receiver keeps only the newest frame per type; analyzer drains it
+                    analyzer = asyncio.create_task(run_analyzer(websocket, session))
+
+            elif kind in FRAME_TYPES:
+                payload = session.receive_frame(kind, payload)
+                if payload is None:
+                    continue
+                if session.coalesce:
+                    session.slots.put(kind, payload)
+                    continue
+                for message in await session.handle_frame(kind, payload):
+                    await send_timed(websocket, message)
                 
     except WebSocketDisconnect:
         print("WebSocket disconnected")
     except Exception as e:
         print(f"WebSocket error: {e}")
         await websocket.close()
+    finally:
+        ws_connections.dec()
+        if analyzer is not None:
+            analyzer.cancel()
+        session.close()
 
 # --- HTTP Routes ---
 
@@ -140,6 +372,33 @@ async def websocket_endpoint(websocket: WebSocket):
 async def health_check():
     return {"status": "healthy"}
 
+@app.post("/analyze/batch")
+async def analyze_batch(
+    file: UploadFile = File(...),
+    measurements: str = Form("[]"),
+    width: int = Form(1280),
+    height: int = Form(720),
+    view: str = Form("front"),
+    posture: bool = Form(True),
+    block_size: int = Form(DEFAULT_BLOCK_SIZE)
+):
+    """Re-analyze a recorded session (NDJSON or .npz), streaming NDJSON results."""
+    try:
+        plan = MeasurementPlan([JointMeasurementRequest(**m) for m in json.loads(measurements)])
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid measurements: {e}")
+    if block_size < 1:
+        raise HTTPException(status_code=400, detail="block_size must be positive")
+
+    data = await file.read()
+    try:
+        blocks = read_session(data, file.filename or "", width, height, view, block_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Sync generator: Starlette iterates it in a worker thread, off the event loop
+    return StreamingResponse(analyze_session(blocks, plan, posture), media_type="application/x-ndjson")
+
 # Integration with MedVoice AI
 try:
     medvoice_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Deeprehab-MedVoice-AI--", "src")
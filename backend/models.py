@@ -47,7 +47,8 @@ class JointAnalysisRequest(BaseModel):
     height: int
     landmarks: List[Landmark]
     worldLandmarks: Optional[List[Landmark]] = None
-    measurements: List[JointMeasurementRequest]
+    # Omitted when the session registered its measurements up front
+    measurements: Optional[List[JointMeasurementRequest]] = None
 
 class JointMeasurementResult(BaseModel):
     id: str
@@ -59,6 +60,7 @@ class JointAnalysisResponse(BaseModel):
     timestamp: int = Field(default_factory=lambda: int(datetime.now().timestamp() * 1000))
 
 class VisualAnnotation(BaseModel):
+    id: Optional[str] = None  # Stable key, used to send annotation diffs
     type: str  # 'line', 'point', 'angle', 'text'
     points: List[Dict[str, float]]
     color: str = "red"
@@ -72,4 +74,14 @@ class AnalysisResponse(BaseModel):
     metrics: PostureMetrics
     issues: List[PostureIssue]
     annotations: List[VisualAnnotation] = []
+    # Set in annotation diff mode: ids of annotations no longer drawn
+    removedAnnotations: Optional[List[str]] = None
     timestamp: int = Field(default_factory=lambda: int(datetime.now().timestamp() * 1000))
+
+class WebRtcOffer(BaseModel):
+    sdp: str
+    type: str = "offer"
+    # Highest quality to send; congestion control may step below it
+    profile: str = "full"
+    width: Optional[int] = None
+    fps: Optional[float] = None
@@ -0,0 +1,89 @@
+import pytest
+import os
+import sys
+import time
+import asyncio
+import threading
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.analysis_executor import AnalysisExecutor, AnalysisOverloaded
+from utils.analysis_session import process_frame
+from utils.batch_joint_analysis import MeasurementPlan
+
+def slow_identity(value, delay=0.05):
+    time.sleep(delay)
+    return value
+
+def test_runs_off_event_loop_thread():
+    executor = AnalysisExecutor(mode="thread", max_workers=2)
+
+    async def scenario():
+        return await executor.run(threading.get_ident)
+
+    try:
+        assert asyncio.run(scenario()) != threading.get_ident()
+    finally:
+        executor.shutdown()
+
+def test_inline_mode_runs_on_loop_thread():
+    executor = AnalysisExecutor(mode="inline")
+
+    async def scenario():
+        return await executor.run(threading.get_ident)
+
+    assert asyncio.run(scenario()) == threading.get_ident()
+
+def test_connections_run_in_parallel_and_in_order():
+    executor = AnalysisExecutor(mode="thread", max_workers=4)
+
+    async def connection(name):
+        # One connection awaits each job before submitting the next
+        return [await executor.run(slow_identity, f"{name}-{i}") for i in range(3)]
+
+    async def scenario():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(connection(n) for n in "abcd"))
+        return results, time.perf_counter() - start
+
+    try:
+        results, elapsed = asyncio.run(scenario())
+        assert results[0] == ["a-0", "a-1", "a-2"]
+        assert results[3] == ["d-0", "d-1", "d-2"]
+        # 4 connections x 3 jobs x 50 ms would take 600 ms serially
+        assert elapsed < 0.4
+    finally:
+        executor.shutdown()
+
+def test_queue_depth_limit():
+    executor = AnalysisExecutor(mode="thread", max_workers=1, max_queue_depth=2)
+
+    async def scenario():
+        jobs = [asyncio.ensure_future(executor.run(slow_identity, i)) for i in range(3)]
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    try:
+        results = asyncio.run(scenario())
+        assert results[:2] == [0, 1]
+        assert isinstance(results[2], AnalysisOverloaded)
+        assert executor.pending == 0
+    finally:
+        executor.shutdown()
+
+def test_process_pool_runs_analysis():
+    executor = AnalysisExecutor(mode="process", max_workers=1)
+    message = {"type": "POSTURE_SYNC", "view": "front", "width": 640, "height": 480,
+               "landmarks": [{"x": 0.5, "y": 0.5} for _ in range(33)]}
+
+    async def scenario():
+        return await executor.run(process_frame, "POSTURE_SYNC", message, MeasurementPlan([]))
+
+    try:
+        assert asyncio.run(scenario()).type == "ANALYSIS_RESULT"
+    finally:
+        executor.shutdown()
+
+def test_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        AnalysisExecutor(mode="gpu")
@@ -0,0 +1,126 @@
+import pytest
+import os
+import sys
+import json
+import asyncio
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.analysis_session import LatestFrameSlots
+from main import app
+
+def posture_message(nose_x=0.5):
+    landmarks = [{"x": 0.5, "y": 0.5} for _ in range(33)]
+    landmarks[0] = {"x": nose_x, "y": 0.2}
+    return {"type": "POSTURE_SYNC", "view": "front", "width": 640, "height": 480, "landmarks": landmarks}
+
+def test_latest_frame_wins():
+    async def scenario():
+        slots = LatestFrameSlots()
+        slots.put("POSTURE_SYNC", 1)
+        slots.put("POSTURE_SYNC", 2)
+        slots.put("JOINT_ANALYSIS", "a")
+        slots.put("POSTURE_SYNC", 3)
+        items = dict(await slots.take())
+        report = json.loads(slots.drop_report())
+        return items, report, slots.drop_report()
+
+    items, report, second_report = asyncio.run(scenario())
+    assert items == {"POSTURE_SYNC": 3, "JOINT_ANALYSIS": "a"}
+    assert report["type"] == "FRAME_STATS"
+    assert report["dropped"] == {"POSTURE_SYNC": 2, "JOINT_ANALYSIS": 0}
+    # Nothing new dropped since the last report
+    assert second_report is None
+
+def test_websocket_coalescing_mode():
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "NEGOTIATE", "coalesce": True}))
+        assert json.loads(ws.receive_text())["coalesce"] is True
+
+        for i in range(20):
+            ws.send_text(json.dumps(posture_message(0.4 + i * 0.01)))
+
+        results = 0
+        dropped = 0
+        while results + dropped < 20:
+            message = json.loads(ws.receive_text())
+            if message["type"] == "ANALYSIS_RESULT":
+                results += 1
+            elif message["type"] == "FRAME_STATS":
+                dropped += message["dropped"]["POSTURE_SYNC"]
+        assert results + dropped == 20
+
+def test_registered_measurements_plan():
+    landmarks = [{"x": 0.5, "y": 0.5} for _ in range(33)]
+    landmarks[23] = {"x": 0.5, "y": 0.5}  # Hip
+    landmarks[25] = {"x": 0.5, "y": 0.8}  # Knee
+    landmarks[27] = {"x": 0.8, "y": 0.8}  # Ankle
+    measurements = [{"id": "knee-l", "jointType": "knee", "direction": "flexion", "side": "left"}]
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "REGISTER_MEASUREMENTS", "measurements": measurements}))
+        assert json.loads(ws.receive_text()) == {"type": "MEASUREMENTS_REGISTERED", "count": 1}
+
+        ws.send_text(json.dumps({"type": "JOINT_ANALYSIS", "width": 1000, "height": 1000, "landmarks": landmarks}))
+        result = json.loads(ws.receive_text())
+
+    assert result["type"] == "JOINT_RESULT"
+    assert result["results"][0]["id"] == "knee-l"
+    assert result["results"][0]["angle"] == pytest.approx(90.0)
+
+def test_invalid_measurements_keep_the_connection():
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "REGISTER_MEASUREMENTS", "measurements": [
+            {"id": "knee-l", "jointType": "knee", "direction": "flexion", "side": "left"}
+        ]}))
+        assert json.loads(ws.receive_text())["count"] == 1
+        for measurements in ([{"id": "x"}], ["knee"], 5):
+            ws.send_text(json.dumps({"type": "REGISTER_MEASUREMENTS", "measurements": measurements}))
+            reply = json.loads(ws.receive_text())
+            assert reply["type"] == "MEASUREMENTS_REGISTERED" and reply["error"]
+            # The previous plan stays registered
+            assert reply["count"] == 1
+        ws.send_text(json.dumps({"type": "NEGOTIATE", "measurements": [{"id": "x", "side": "up"}]}))
+        reply = json.loads(ws.receive_text())
+        assert reply["type"] == "NEGOTIATED" and reply["error"]
+        ws.send_text(json.dumps({"type": "RESET_ROM"}))
+        assert json.loads(ws.receive_text()) == {"type": "ROM_RESET"}
+
+def test_invalid_rom_subscription_is_rejected():
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        for message in ({"holdMs": "long"}, {"intervalMs": None}, {"holdMs": -1}, {"intervalMs": "nan"}):
+            ws.send_text(json.dumps({"type": "SUBSCRIBE_ROM", **message}))
+            reply = json.loads(ws.receive_text())
+            assert reply["type"] == "ROM_SUBSCRIBED" and reply["error"]
+        ws.send_text(json.dumps({"type": "SUBSCRIBE_ROM", "holdMs": "300"}))
+        reply = json.loads(ws.receive_text())
+        assert reply["holdMs"] == 300 and reply["intervalMs"] == 500 and "error" not in reply
+
+def test_invalid_configuration_is_rejected():
+    client = TestClient(app)
+    invalid = [
+        ("CONFIGURE_ANNOTATIONS", {"tolerancePx": "wide"}),
+        ("CONFIGURE_ANNOTATIONS", {"tolerancePx": -2}),
+        ("CONFIGURE_SMOOTHING", {"minCutoff": 0}),
+        ("CONFIGURE_SMOOTHING", {"beta": "nan"}),
+        ("CONFIGURE_SMOOTHING", {"predictMs": [1]}),
+        ("CONFIGURE_SUPPRESSION", {"metricEpsilon": -0.5}),
+        ("CONFIGURE_SUPPRESSION", {"epsilons": [1.0]}),
+        ("CONFIGURE_SUPPRESSION", {"epsilons": {"knee-l": "inf"}}),
+    ]
+    with client.websocket_connect("/ws/analyze") as ws:
+        for kind, message in invalid:
+            ws.send_text(json.dumps({"type": kind, **message}))
+            reply = json.loads(ws.receive_text())
+            assert reply["error"] and "enabled" not in reply, (kind, message)
+        # Turning a feature off does not need valid parameters
+        ws.send_text(json.dumps({"type": "CONFIGURE_SMOOTHING", "enabled": False, "minCutoff": 0}))
+        assert json.loads(ws.receive_text()) == {"type": "SMOOTHING_CONFIGURED", "enabled": False}
+        ws.send_text(json.dumps(posture_message()))
+        assert json.loads(ws.receive_text())["type"] == "ANALYSIS_RESULT"
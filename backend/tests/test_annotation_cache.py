@@ -0,0 +1,93 @@
+import pytest
+import os
+import sys
+import json
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.analysis_session import process_frame
+from utils.batch_joint_analysis import MeasurementPlan
+from utils.posture_analysis import AnnotationCache, analyze_posture
+from models import Landmark
+from main import app
+
+def front_landmarks(shoulder_dy=0.0, shoulder_dx=0.0):
+    landmarks = [Landmark(x=0.5, y=0.5) for _ in range(33)]
+    landmarks[0] = Landmark(x=0.5, y=0.2)    # Nose
+    landmarks[7] = Landmark(x=0.55, y=0.2)   # Left ear
+    landmarks[8] = Landmark(x=0.45, y=0.2)   # Right ear
+    landmarks[11] = Landmark(x=0.6 + shoulder_dx, y=0.3 + shoulder_dy)  # Left shoulder
+    landmarks[12] = Landmark(x=0.4, y=0.3)   # Right shoulder
+    landmarks[23] = Landmark(x=0.55, y=0.6)  # Left hip
+    landmarks[24] = Landmark(x=0.45, y=0.6)  # Right hip
+    landmarks[27] = Landmark(x=0.55, y=0.9)  # Left ankle
+    landmarks[28] = Landmark(x=0.45, y=0.9)  # Right ankle
+    return landmarks
+
+def by_id(annotations):
+    return {a.id: a for a in annotations}
+
+def test_annotations_have_stable_ids():
+    result = analyze_posture("front", front_landmarks(), 1000, 1000)
+    assert set(by_id(result["annotations"])) == {"shoulder-line", "hip-line", "midline"}
+
+def test_cache_reuses_within_tolerance():
+    cache = AnnotationCache(tolerance_px=2.0)
+    first = analyze_posture("front", front_landmarks(), 1000, 1000, annotation_cache=cache)
+    changed, removed = cache.diff(first["annotations"])
+    assert len(changed) == 3 and removed == []
+
+    # 1 px of jitter on the left shoulder: everything is reused
+    second = analyze_posture("front", front_landmarks(shoulder_dx=0.001), 1000, 1000, annotation_cache=cache)
+    assert cache.diff(second["annotations"]) == ([], [])
+    assert by_id(second["annotations"])["shoulder-line"] is by_id(first["annotations"])["shoulder-line"]
+
+    # 10 px moves the shoulder line only
+    third = analyze_posture("front", front_landmarks(shoulder_dx=0.01), 1000, 1000, annotation_cache=cache)
+    changed, removed = cache.diff(third["annotations"])
+    assert [a.id for a in changed] == ["shoulder-line"]
+    assert changed[0].points[0] == {"x": 610.0, "y": 300.0}
+
+def test_cache_reports_removed_annotations():
+    cache = AnnotationCache()
+    tilted = analyze_posture("front", front_landmarks(shoulder_dy=0.05), 1000, 1000, annotation_cache=cache)
+    cache.diff(tilted["annotations"])
+    level = analyze_posture("front", front_landmarks(), 1000, 1000, annotation_cache=cache)
+    changed, removed = cache.diff(level["annotations"])
+    assert removed == ["uneven-shoulders"]
+    assert [a.id for a in changed] == ["shoulder-line"]
+
+def test_cache_invalidated_by_frame_size():
+    cache = AnnotationCache()
+    cache.diff(analyze_posture("front", front_landmarks(), 1000, 1000, annotation_cache=cache)["annotations"])
+    changed, _ = cache.diff(analyze_posture("front", front_landmarks(), 500, 500, annotation_cache=cache)["annotations"])
+    assert len(changed) == 3
+
+def test_fast_diff_matches_strict():
+    message = {"type": "POSTURE_SYNC", "view": "front", "width": 1000, "height": 1000,
+               "landmarks": [lm.dict() for lm in front_landmarks(shoulder_dy=0.05)]}
+    fast_cache, strict_cache = AnnotationCache(), AnnotationCache()
+    for _ in range(2):
+        fast = json.loads(process_frame("POSTURE_SYNC", message, MeasurementPlan([]), False, fast_cache).body)
+        strict = json.loads(process_frame("POSTURE_SYNC", message, MeasurementPlan([]), True, strict_cache).body)
+        fast.pop("timestamp"), strict.pop("timestamp")
+        assert fast == strict
+
+def test_websocket_annotation_diffs():
+    message = {"type": "POSTURE_SYNC", "view": "front", "width": 1000, "height": 1000,
+               "landmarks": [lm.dict() for lm in front_landmarks()]}
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "CONFIGURE_ANNOTATIONS", "tolerancePx": 3}))
+        assert json.loads(ws.receive_text()) == {"type": "ANNOTATIONS_CONFIGURED", "enabled": True}
+
+        ws.send_text(json.dumps(message))
+        first = json.loads(ws.receive_text())
+        ws.send_text(json.dumps(message))
+        second = json.loads(ws.receive_text())
+
+    assert {a["id"] for a in first["annotations"]} == {"shoulder-line", "hip-line", "midline"}
+    assert second["annotations"] == [] and second["removedAnnotations"] == []
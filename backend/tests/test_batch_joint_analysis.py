@@ -0,0 +1,123 @@
+import pytest
+import os
+import sys
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.joint_analysis import calculate_joint_angle
+from utils.batch_joint_analysis import MeasurementPlan, calculate_joint_angles_batch
+from models import JointMeasurementRequest
+
+DIRECTIONS = {
+    "cervical": ["flexion", "extension", "left-rotation", "right-rotation",
+                 "left-lateral-flexion", "right-lateral-flexion"],
+    "shoulder": ["flexion", "extension", "abduction", "adduction",
+                 "internal-rotation", "external-rotation"],
+    "thoracolumbar": ["flexion", "extension", "left-lateral-flexion", "right-lateral-flexion"],
+    "elbow": ["flexion", "extension"],
+    "wrist": ["flexion", "extension", "ulnar-deviation", "radial-deviation"],
+    "hip": ["flexion", "extension", "abduction"],
+    "knee": ["flexion", "extension"],
+    "ankle": ["dorsiflexion", "plantarflexion"],
+}
+
+def all_measurements():
+    measurements = []
+    for joint, directions in DIRECTIONS.items():
+        for direction in directions:
+            for side in ["left", "right", None]:
+                measurements.append(JointMeasurementRequest(
+                    id=f"{joint}-{direction}-{side}", jointType=joint, direction=direction, side=side
+                ))
+    return measurements
+
+def to_dicts(frame):
+    return [{"x": float(p[0]), "y": float(p[1]), "z": float(p[2]), "visibility": 1.0} for p in frame]
+
+def assert_matches_scalar(landmarks, world_landmarks=None):
+    measurements = all_measurements()
+    batch = calculate_joint_angles_batch(landmarks, measurements, 1280, 720, world_landmarks)
+    for f in range(landmarks.shape[0]):
+        lm_dicts = to_dicts(landmarks[f])
+        world_dicts = to_dicts(world_landmarks[f]) if world_landmarks is not None else None
+        for m in measurements:
+            expected = calculate_joint_angle(m.jointType, m.direction, lm_dicts, 1280, 720,
+                                             side=m.side, world_landmarks=world_dicts)
+            assert batch[m.id][f] == pytest.approx(expected, abs=1e-9), (m.id, f)
+
+def test_batch_matches_scalar_2d():
+    rng = np.random.default_rng(0)
+    landmarks = rng.uniform(0, 1, size=(40, 33, 3))
+    assert_matches_scalar(landmarks)
+
+def test_batch_matches_scalar_3d_cervical():
+    rng = np.random.default_rng(1)
+    landmarks = rng.uniform(0, 1, size=(20, 33, 3))
+    world = rng.normal(0, 0.5, size=(20, 33, 3))
+    assert_matches_scalar(landmarks, world)
+
+def test_batch_degenerate_frames():
+    # Coincident points exercise the zero-length vector branches
+    landmarks = np.full((3, 33, 3), 0.5)
+    landmarks[1, 11] = [0.6, 0.5, 0.0]
+    world = np.zeros((3, 33, 3))
+    assert_matches_scalar(landmarks)
+    assert_matches_scalar(landmarks, world)
+
+def test_batch_unknown_joint_is_nan():
+    landmarks = np.full((2, 33, 3), 0.5)
+    result = calculate_joint_angles_batch(
+        landmarks, [{"id": "x", "jointType": "finger", "direction": "flexion"}], 100, 100
+    )
+    assert np.isnan(result["x"]).all()
+
+def test_batch_rejects_bad_shape():
+    with pytest.raises(ValueError):
+        calculate_joint_angles_batch(np.zeros((2, 17, 3)), [], 100, 100)
+
+def test_plan_shares_duplicate_measurements():
+    rng = np.random.default_rng(2)
+    landmarks = rng.uniform(0, 1, size=(5, 33, 4))
+    measurements = [
+        {"id": "a", "jointType": "knee", "direction": "flexion", "side": "left"},
+        {"id": "b", "jointType": "knee", "direction": "flexion", "side": "left"},
+        {"id": "c", "jointType": "thoracolumbar", "direction": "flexion"},
+    ]
+    plan = MeasurementPlan(measurements)
+    assert len(plan) == 3
+    assert len(plan._steps) == 2
+    result = plan.evaluate(landmarks, 640, 480)
+    np.testing.assert_array_equal(result["a"], result["b"])
+
+def test_plan_evaluate_frame_matches_scalar():
+    rng = np.random.default_rng(3)
+    frame = rng.uniform(0, 1, size=(33, 4))
+    measurements = all_measurements()
+    results = MeasurementPlan(measurements).evaluate_frame(frame, 1280, 720)
+    lm_dicts = to_dicts(frame)
+    for m, (m_id, angle) in zip(measurements, results):
+        assert m_id == m.id
+        expected = calculate_joint_angle(m.jointType, m.direction, lm_dicts, 1280, 720, side=m.side)
+        assert angle == pytest.approx(expected, abs=1e-9)
+
+def test_plan_evaluate_frame_matches_block():
+    # The single-frame float path mirrors the block formulas, 3D and degenerate frames too
+    rng = np.random.default_rng(4)
+    landmarks = rng.uniform(0, 1, size=(6, 33, 3))
+    landmarks[5] = 0.5
+    world = rng.normal(0, 0.5, size=(6, 33, 3))
+    world[5] = 0.0
+    plan = MeasurementPlan(all_measurements() + [{"id": "x", "jointType": "finger", "direction": "flexion"}])
+    for world_landmarks in (None, world):
+        block = plan.evaluate(landmarks, 1280, 720, world_landmarks)
+        for f in range(landmarks.shape[0]):
+            frame_world = world_landmarks[f] if world_landmarks is not None else None
+            for m_id, angle in plan.evaluate_frame(landmarks[f], 1280, 720, frame_world):
+                if np.isnan(block[m_id][f]):
+                    assert angle is None
+                else:
+                    assert angle == pytest.approx(block[m_id][f], abs=1e-9), (m_id, f)
+    with pytest.raises(ValueError):
+        plan.evaluate_frame(np.zeros((17, 3)), 100, 100)
@@ -0,0 +1,102 @@
+import pytest
+import os
+import sys
+import io
+import json
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.batch_joint_analysis import MeasurementPlan
+from utils.batch_replay import analyze_session, read_session
+from utils.posture_analysis import analyze_posture
+from main import app
+
+MEASUREMENTS = [
+    {"id": "knee-l", "jointType": "knee", "direction": "flexion", "side": "left"},
+    {"id": "neck", "jointType": "cervical", "direction": "flexion"},
+]
+
+def make_frames(count=10, seed=0):
+    return np.random.default_rng(seed).uniform(0.1, 0.9, size=(count, 33, 4))
+
+def to_ndjson(frames, **extra):
+    lines = []
+    for i, frame in enumerate(frames):
+        landmarks = [{"x": p[0], "y": p[1], "z": p[2], "visibility": p[3]} for p in frame.tolist()]
+        lines.append(json.dumps({"landmarks": landmarks, "timestamp": i * 33, **extra}))
+    return ("\n".join(lines) + "\n").encode()
+
+def parse(lines):
+    return [json.loads(line) for chunk in lines for line in chunk.splitlines()]
+
+def test_ndjson_matches_frame_by_frame():
+    frames = make_frames()
+    plan = MeasurementPlan(MEASUREMENTS)
+    out = parse(analyze_session(read_session(to_ndjson(frames), block_size=4), plan))
+
+    assert out[-1] == {"type": "SUMMARY", "frames": 10, "errors": 0}
+    for i, line in enumerate(out[:-1]):
+        assert line["frame"] == i and line["timestamp"] == i * 33
+        expected = dict(plan.evaluate_frame(frames[i], 1280, 720))
+        assert line["angles"] == pytest.approx(expected)
+        metrics = analyze_posture("front", frames[i], 1280, 720)["metrics"]
+        assert line["metrics"]["shoulderAngle"] == metrics.shoulderAngle
+
+def test_ndjson_bad_line_is_reported():
+    data = to_ndjson(make_frames(3)).replace(b"\n", b"\n{not json}\n", 1)
+    out = parse(analyze_session(read_session(data), MeasurementPlan(MEASUREMENTS), posture=False))
+    assert [line["type"] for line in out] == ["FRAME", "ERROR", "FRAME", "FRAME", "SUMMARY"]
+    assert out[1]["frame"] == 1
+    assert "metrics" not in out[0]
+    assert out[-1]["errors"] == 1
+
+def test_malformed_line_does_not_cut_off_the_stream():
+    good = to_ndjson(make_frames(2)).splitlines()
+    # Landmarks as lists instead of objects
+    bad = json.dumps({"landmarks": make_frames(1)[0].tolist()}).encode()
+    client = TestClient(app)
+    response = client.post(
+        "/analyze/batch",
+        files={"file": ("session.ndjson", b"\n".join([good[0], bad, good[1]]))},
+        data={"measurements": json.dumps(MEASUREMENTS)}
+    )
+    assert response.status_code == 200
+    out = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in out] == ["FRAME", "ERROR", "FRAME", "SUMMARY"]
+    assert out[-1] == {"type": "SUMMARY", "frames": 2, "errors": 1}
+
+def test_ndjson_size_change_splits_blocks():
+    frames = make_frames(4)
+    data = to_ndjson(frames[:2], width=640, height=480) + to_ndjson(frames[2:], width=1280, height=720)
+    blocks = list(read_session(data))
+    assert [(b.start, b.width) for b in blocks] == [(0, 640), (2, 1280)]
+
+def test_npz_upload_streams_ndjson():
+    frames = make_frames(6)
+    buffer = io.BytesIO()
+    np.savez(buffer, landmarks=frames, world_landmarks=frames * 0.1, width=640, height=480, view="side")
+
+    client = TestClient(app)
+    response = client.post(
+        "/analyze/batch",
+        files={"file": ("session.npz", buffer.getvalue())},
+        data={"measurements": json.dumps(MEASUREMENTS), "block_size": "4"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    out = [json.loads(line) for line in response.text.splitlines()]
+    assert out[-1] == {"type": "SUMMARY", "frames": 6, "errors": 0}
+    # 3D cervical path uses the world landmarks
+    expected = MeasurementPlan(MEASUREMENTS).evaluate_frame(frames[5], 640, 480, frames[5] * 0.1)
+    assert out[5]["angles"] == pytest.approx(dict(expected))
+    assert out[5]["metrics"]["headForward"] is not None
+
+def test_upload_rejects_bad_input():
+    client = TestClient(app)
+    response = client.post("/analyze/batch", files={"file": ("s.ndjson", b"")}, data={"measurements": "[{}]"})
+    assert response.status_code == 400
+    response = client.post("/analyze/batch", files={"file": ("s.npz", b"garbage")})
+    assert response.status_code == 400
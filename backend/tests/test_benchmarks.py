@@ -0,0 +1,31 @@
+import pytest
+import os
+import sys
+import json
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.hot_paths import (
+    BASELINE_PATH, Measurement, build_benchmarks, build_image_benchmarks, compare, run_benchmarks,
+    synthetic_frames
+)
+
+def test_every_benchmark_runs_and_has_a_baseline():
+    # Small image: this checks the benchmarks run, not how fast
+    benches = build_benchmarks(synthetic_frames(4)) + build_image_benchmarks(160, 90)
+    results = run_benchmarks(benches, min_time=0, repeat=1)
+    assert all(m.ns > 0 for m in results)
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    # New benchmarks must be added to the stored baseline
+    assert {m.name for m in results} == set(baseline["benchmarks"])
+
+def test_compare_scales_by_calibration():
+    baseline = {"calibration_ns": 1000, "benchmarks": {"op": {"ns": 100, "peak_bytes": 0}}}
+    # Machine twice as slow: 250 ns is within 30% of the scaled 200 ns
+    assert compare([Measurement("op", 250, 0)], 2000, baseline, 0.3) == []
+    assert len(compare([Measurement("op", 270, 0)], 2000, baseline, 0.3)) == 1
+    assert len(compare([Measurement("op", 100, 4096)], 1000, baseline, 0.3)) == 1
+    # Benchmarks missing from the baseline are not regressions
+    assert compare([Measurement("new", 10 ** 9, 0)], 1000, baseline) == []
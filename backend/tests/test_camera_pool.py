@@ -0,0 +1,162 @@
+import pytest
+import os
+import sys
+import time
+import socket
+import asyncio
+import threading
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.camera_pool import CameraPool, parse_sources
+from utils.camera_stream import CameraManager
+from utils.pose_backends import NullPoseBackend
+import main
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture: a 100 fps camera of grey frames."""
+
+    def read(self, image=None):
+        time.sleep(0.01)
+        return True, np.full((60, 80, 3), 128, dtype=np.uint8)
+
+    def release(self):
+        pass
+
+class FakeCameraManager(CameraManager):
+    """A real pipeline whose device is a FakeCapture; source "missing" fails to open."""
+
+    def start(self, device_index=None):
+        if self.is_running:
+            return True
+        if self.source == "missing":
+            return False
+        self.set_pose_backend(NullPoseBackend())
+        self.cap = FakeCapture()
+        self._start_stages()
+        return True
+
+def test_parse_sources():
+    assert parse_sources("room1=0, room2=1,hall=rtsp://10.0.0.5/s?a=1") == {
+        "room1": 0, "room2": 1, "hall": "rtsp://10.0.0.5/s?a=1"
+    }
+    with pytest.raises(ValueError):
+        parse_sources("room1")
+    with pytest.raises(ValueError):
+        parse_sources(" , ")
+
+def test_cameras_are_created_once_per_id():
+    pool = CameraPool({"front": 0, "side": 1})
+    assert pool.default_id == "front"
+    assert pool.get() is pool.get("front")
+    assert pool.get("side") is not pool.get("front")
+    assert pool.get("side").source == 1
+    # Undeclared numeric ids open the device of that index, under one id
+    assert pool.get("3").source == 3
+    assert pool.get("003") is pool.get("3") and pool.get("003").camera_id == "3"
+    for camera_id in ("attic", "99999", "-1", "1.0"):
+        with pytest.raises(KeyError):
+            pool.get(camera_id)
+    assert set(pool.cameras) == {"front", "side", "3"}
+
+def test_failed_start_drops_the_camera():
+    async def scenario():
+        pool = CameraPool({"ok": "ok", "broken": "missing"}, factory=FakeCameraManager)
+        try:
+            assert await pool.start("broken") is None
+            assert "broken" not in pool.cameras and "broken" not in pool._camera_locks
+            camera = await pool.start("ok")
+            assert camera is pool.get("ok") and camera.is_running
+            # Stopping a camera that was never created creates nothing
+            await pool.stop("5")
+            assert set(pool.cameras) == {"ok"}
+        finally:
+            await pool.close()
+    asyncio.run(scenario())
+
+def test_idle_cameras_stop_unless_pinned_or_watched():
+    async def scenario():
+        pool = CameraPool({"a": "a", "b": "b", "c": "c"}, idle_timeout_s=5.0, factory=FakeCameraManager)
+        try:
+            for camera_id in "abc":
+                assert await pool.start(camera_id, pin=camera_id == "b")
+            # "c" has a viewer
+            viewer = pool.get("c").frames.subscribe()
+            await asyncio.wait_for(viewer.__anext__(), timeout=2)
+            assert await pool.reap_idle(now=100.0) == []
+            assert await pool.reap_idle(now=104.0) == []
+            assert await pool.reap_idle(now=105.0) == ["a"]
+            assert [camera.camera_id for camera in pool.running()] == ["b", "c"]
+            # Once the last viewer leaves, the timeout starts over
+            await viewer.aclose()
+            assert await pool.reap_idle(now=106.0) == []
+            assert await pool.reap_idle(now=111.0) == ["c"]
+            # An explicit stop unpins
+            await pool.stop("b")
+            assert pool.running() == [] and pool.pinned == set()
+        finally:
+            await pool.close()
+    asyncio.run(scenario())
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_camera_endpoints_by_id(monkeypatch):
+    pool = CameraPool({"room1": "room1", "room2": "room2", "broken": "missing"}, factory=FakeCameraManager)
+    monkeypatch.setattr(main, "camera_pool", pool)
+    client = TestClient(main.app)
+    try:
+        assert client.post("/camera/room1/start").json() == {"status": "success"}
+        assert client.post("/camera/broken/start").json() == {"status": "error"}
+        cameras = {camera["id"]: camera for camera in client.get("/cameras").json()["cameras"]}
+        assert cameras["room1"]["running"] and cameras["room1"]["pinned"]
+        assert not cameras["room2"]["running"] and not cameras["broken"]["running"]
+        assert client.get("/camera/room1/stats").json()["running"]
+        # The unprefixed routes address the default camera
+        assert client.get("/camera/stats").json()["running"]
+        assert client.post("/camera/beauty?tier=off").json()["tier"] == "off"
+        assert pool.get("room2").beauty.tier != "off"
+        assert client.post("/camera/room1/stop").json() == {"status": "success"}
+        assert pool.running() == []
+        assert client.get("/video_feed/broken").status_code == 503
+        assert client.get("/video_feed/attic").status_code == 404
+        assert client.post("/camera/attic/start").status_code == 404
+    finally:
+        for camera in pool.running():
+            camera.stop()
+
+def test_video_feed_starts_camera_and_idles_it_out(monkeypatch):
+    uvicorn = pytest.importorskip("uvicorn")
+    import httpx
+    pool = CameraPool({"room1": "room1", "room2": "room2"}, idle_timeout_s=0.2, factory=FakeCameraManager)
+    monkeypatch.setattr(main, "camera_pool", pool)
+    monkeypatch.setenv("VISION3_QOS", "0")
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    try:
+        with httpx.stream("GET", f"http://127.0.0.1:{port}/video_feed/room2", timeout=5) as response:
+            assert response.status_code == 200
+            assert next(response.iter_bytes()).startswith(b"--frame")
+            # A watched camera outlives the idle timeout
+            time.sleep(1.5)
+            assert [camera.camera_id for camera in pool.running()] == ["room2"]
+        deadline = time.time() + 5
+        while pool.running() and time.time() < deadline:
+            time.sleep(0.1)
+        assert pool.running() == []
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        for camera in pool.running():
+            camera.stop()
@@ -0,0 +1,144 @@
+import pytest
+import os
+import sys
+import time
+import threading
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.capture_pipeline import BufferPool, LatestSlot, PipelineFrame, StageStats
+from utils.camera_stream import CameraManager
+from utils.pose_backends import NullPoseBackend, PoseBackend
+
+class FakeCapture:
+    """Stands in for cv2.VideoCapture: a fixed-rate camera that fills the given buffer."""
+
+    def __init__(self, fps=200.0, shape=(120, 160, 3)):
+        self.interval = 1.0 / fps
+        self.shape = shape
+        self.reads = 0
+        self.buffers = set()
+
+    def read(self, image=None):
+        time.sleep(self.interval)
+        if image is None or image.shape != self.shape:
+            image = np.empty(self.shape, dtype=np.uint8)
+        self.buffers.add(id(image))
+        image[:] = self.reads % 256
+        self.reads += 1
+        return True, image
+
+    def release(self):
+        pass
+
+def test_slot_keeps_newest_and_releases_dropped():
+    pool = BufferPool()
+    slot = LatestSlot()
+    first = PipelineFrame(1, 0, pool.acquire((2, 2, 3)), pool)
+    second = PipelineFrame(2, 0, pool.acquire((2, 2, 3)), pool)
+    slot.put(first)
+    slot.put(second)
+    assert slot.dropped == 1
+    # The replaced frame went back to the pool
+    assert pool.acquire((2, 2, 3)) is first.image
+    assert slot.get(timeout=0).sequence == 2
+    assert slot.get(timeout=0) is None
+
+def test_shared_frame_returns_to_pool_after_last_release():
+    pool = BufferPool()
+    frame = PipelineFrame(1, 0, pool.acquire((2, 2)), pool, refs=2)
+    frame.release()
+    assert pool.acquire((2, 2)) is not frame.image
+    frame.release()
+    assert pool.acquire((2, 2)) is frame.image
+
+def test_pool_drops_buffers_of_another_size():
+    pool = BufferPool()
+    small = pool.acquire((2, 2))
+    pool.release(small)
+    assert pool.acquire((4, 4)) is not small
+    pool.release(small)
+    assert pool.acquire((4, 4)) is not small
+
+def test_closed_slot_wakes_waiting_consumer():
+    slot = LatestSlot()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(slot.get(timeout=5)))
+    thread.start()
+    time.sleep(0.02)
+    slot.close()
+    thread.join(timeout=1)
+    assert result == [None]
+
+def test_stage_stats_reports_fps():
+    stats = StageStats(window=0.05)
+    deadline = time.perf_counter() + 0.2
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        time.sleep(0.005)
+        stats.record(started)
+    snapshot = stats.snapshot()
+    assert 50 < snapshot["fps"] < 250
+    assert snapshot["ms"] >= 5
+
+def test_stages_run_in_parallel_and_recycle_buffers():
+    camera = CameraManager()
+    camera.set_pose_backend(NullPoseBackend())
+    capture = FakeCapture()
+    camera.cap = capture
+    camera._start_stages()
+    try:
+        time.sleep(0.5)
+        stats = camera.stage_stats()
+        frame = camera.get_video_frame()
+    finally:
+        camera.stop()
+    assert set(stats) == set(CameraManager.STAGES)
+    assert stats["capture"]["frames"] > 20
+    assert stats["encode"]["frames"] > 0
+    assert frame[:2] == b"\xff\xd8"
+    # Capture writes into a handful of recycled buffers, not one per frame
+    assert len(capture.buffers) <= 6
+
+class BlockingPose(PoseBackend):
+    """Holds its first frame until released, and notes whether it was closed mid-frame."""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.busy = False
+        self.closed_while_busy = None
+
+    def process(self, rgb, timestamp):
+        self.busy = True
+        self.entered.set()
+        self.release.wait()
+        self.busy = False
+        return None
+
+    def close(self):
+        self.closed_while_busy = self.busy
+
+def test_swapping_pose_backend_waits_for_the_frame_in_flight():
+    camera = CameraManager()
+    old = BlockingPose()
+    camera.set_pose_backend(old, every=1)
+    camera.cap = FakeCapture()
+    camera._start_stages()
+    try:
+        assert old.entered.wait(2)
+        swap = threading.Thread(target=camera.set_pose_backend, args=(NullPoseBackend(),))
+        swap.start()
+        swap.join(0.2)
+        # Still inside process(), so the old backend is neither replaced nor closed
+        assert swap.is_alive() and old.closed_while_busy is None
+        old.release.set()
+        swap.join(2)
+    finally:
+        old.release.set()
+        camera.stop()
+    assert not swap.is_alive()
+    assert old.closed_while_busy is False
+    assert camera.pose.backend is not old
@@ -0,0 +1,64 @@
+import pytest
+import os
+import sys
+import json
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.analysis_session import FrameResult
+from utils.change_suppression import ChangeSuppressor
+from main import app
+
+def joint_result(angle, timestamp):
+    return FrameResult("JOINT_RESULT", f"angle={angle}", timestamp, results=[("knee-l", angle)])
+
+def posture_result(shoulder, severity, timestamp):
+    return FrameResult("ANALYSIS_RESULT", f"shoulder={shoulder}", timestamp,
+                       metrics={"shoulderAngle": shoulder, "head_axes": [{"x": 1.0}]},
+                       issues=[("uneven-shoulders", severity)])
+
+def test_suppresses_noise_but_not_drift():
+    suppressor = ChangeSuppressor(angle_epsilon=1.0, heartbeat_ms=0)
+    sent = [suppressor.filter(joint_result(angle, i * 33))
+            for i, angle in enumerate([90.0, 90.4, 89.7, 90.6, 91.2, 91.3])]
+    # 91.2 is within 1 degree of every previous frame but 1.2 from the last sent one
+    assert sent == ["angle=90.0", None, None, None, "angle=91.2", None]
+    assert suppressor.suppressed == 4
+
+def test_none_and_per_id_epsilon():
+    suppressor = ChangeSuppressor(epsilons={"knee-l": 5.0}, heartbeat_ms=0)
+    assert suppressor.filter(joint_result(90.0, 0)) is not None
+    assert suppressor.filter(joint_result(94.0, 33)) is None
+    assert suppressor.filter(joint_result(None, 66)) is not None
+    assert suppressor.filter(joint_result(None, 99)) is None
+
+def test_severity_change_is_sent():
+    suppressor = ChangeSuppressor(heartbeat_ms=0)
+    assert suppressor.filter(posture_result(5.0, "mild", 0)) is not None
+    assert suppressor.filter(posture_result(5.1, "mild", 33)) is None
+    assert suppressor.filter(posture_result(5.1, "moderate", 66)) is not None
+
+def test_heartbeat_when_idle():
+    suppressor = ChangeSuppressor(heartbeat_ms=100)
+    sent = [suppressor.filter(joint_result(90.0, t)) for t in range(0, 250, 25)]
+    heartbeats = [json.loads(m) for m in sent[1:] if m is not None]
+    assert [h["timestamp"] for h in heartbeats] == [100, 200]
+    assert all(h["type"] == "HEARTBEAT" for h in heartbeats)
+
+def test_websocket_suppression():
+    landmarks = [{"x": 0.5, "y": 0.5} for _ in range(33)]
+    message = {"type": "POSTURE_SYNC", "view": "front", "width": 640, "height": 480, "landmarks": landmarks}
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "CONFIGURE_SUPPRESSION", "heartbeatMs": 60000}))
+        assert json.loads(ws.receive_text()) == {"type": "SUPPRESSION_CONFIGURED", "enabled": True}
+
+        for _ in range(3):
+            ws.send_text(json.dumps(message))
+        ws.send_text(json.dumps({"type": "RESET_ROM"}))
+        # Only the first result is sent; the identical frames are suppressed
+        assert json.loads(ws.receive_text())["type"] == "ANALYSIS_RESULT"
+        assert json.loads(ws.receive_text())["type"] == "ROM_RESET"
@@ -0,0 +1,91 @@
+import pytest
+import os
+import sys
+import json
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.analysis_session import inline_plan, process_frame
+from utils.batch_joint_analysis import MeasurementPlan
+from utils.frame_codec import encode_frame
+
+MEASUREMENTS = [
+    {"id": "knee-l", "jointType": "knee", "direction": "flexion", "side": "left"},
+    {"id": "neck", "jointType": "cervical", "direction": "flexion"},
+    {"id": "finger", "jointType": "finger", "direction": "flexion"},
+]
+
+def make_message(kind, view="front", seed=0):
+    rng = np.random.default_rng(seed)
+    landmarks = [{"x": float(x), "y": float(y), "z": 0.0, "visibility": 1.0}
+                 for x, y in rng.uniform(0.2, 0.8, size=(33, 2))]
+    return {"type": kind, "view": view, "width": 1280, "height": 720, "landmarks": landmarks}
+
+def without_timestamp(body):
+    data = json.loads(body)
+    data.pop("timestamp")
+    return data
+
+@pytest.mark.parametrize("view", ["front", "back", "side"])
+def test_fast_posture_matches_strict(view):
+    for seed in range(5):
+        message = make_message("POSTURE_SYNC", view, seed)
+        fast = process_frame("POSTURE_SYNC", message, MeasurementPlan([]))
+        strict = process_frame("POSTURE_SYNC", message, MeasurementPlan([]), strict=True)
+        assert fast.type == strict.type == "ANALYSIS_RESULT"
+        assert without_timestamp(fast.body) == without_timestamp(strict.body)
+
+def test_fast_joint_matches_strict():
+    message = make_message("JOINT_ANALYSIS")
+    plan = MeasurementPlan(MEASUREMENTS)
+    for payload in (message, dict(message, measurements=MEASUREMENTS)):
+        fast = process_frame("JOINT_ANALYSIS", payload, plan)
+        strict = process_frame("JOINT_ANALYSIS", payload, plan, strict=True)
+        assert without_timestamp(fast.body) == without_timestamp(strict.body)
+        assert fast.results == strict.results
+
+def test_fast_binary_matches_strict():
+    landmarks = np.random.default_rng(1).uniform(0, 1, size=(33, 4)).astype(np.float32)
+    data = encode_frame("JOINT_ANALYSIS", landmarks, 640, 480)
+    plan = MeasurementPlan(MEASUREMENTS)
+    fast = process_frame("JOINT_ANALYSIS", data, plan)
+    strict = process_frame("JOINT_ANALYSIS", data, plan, strict=True)
+    assert without_timestamp(fast.body) == without_timestamp(strict.body)
+
+def test_fast_path_skips_malformed_frame():
+    message = make_message("POSTURE_SYNC")
+    del message["landmarks"]
+    assert process_frame("POSTURE_SYNC", message, MeasurementPlan([])) is None
+
+def test_fast_path_skips_malformed_landmarks_and_measurements():
+    plan = MeasurementPlan(MEASUREMENTS)
+    message = make_message("JOINT_ANALYSIS")
+    for payload in (dict(message, landmarks=["x"] * 33), dict(message, landmarks=[{"x": 0.5}] * 33),
+                    dict(message, measurements=["knee"]), dict(message, measurements=[{"id": "a"}])):
+        assert process_frame("JOINT_ANALYSIS", payload, plan) is None
+
+def test_inline_measurements_compile_once():
+    assert inline_plan(MEASUREMENTS) is inline_plan([dict(m) for m in MEASUREMENTS])
+    assert inline_plan(MEASUREMENTS) is not inline_plan(MEASUREMENTS[:1])
+
+def test_fast_and_strict_paths_accept_the_same_messages():
+    posture = make_message("POSTURE_SYNC", "side")
+    joint = dict(make_message("JOINT_ANALYSIS"), measurements=MEASUREMENTS)
+    del joint["view"]
+    no_view = dict(posture)
+    del no_view["view"]
+    no_width = dict(posture)
+    del no_width["width"]
+    plan = MeasurementPlan([])
+    for message, valid in ((posture, True), (joint, True), (no_view, False), (no_width, False)):
+        kind = message["type"]
+        fast = process_frame(kind, message, plan)
+        if valid:
+            strict = process_frame(kind, message, plan, strict=True)
+            assert without_timestamp(fast.body) == without_timestamp(strict.body)
+        else:
+            assert fast is None
+            with pytest.raises(ValueError):
+                process_frame(kind, message, plan, strict=True)
@@ -0,0 +1,67 @@
+import pytest
+import os
+import sys
+import asyncio
+import threading
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.frame_broadcast import FrameBroadcaster
+
+def test_viewers_share_frames_published_from_another_thread():
+    hub = FrameBroadcaster()
+    frames = [bytes([i]) * 1000 for i in range(5)]
+
+    async def viewer(received):
+        async for sequence, frame in hub.subscribe():
+            received.append((sequence, frame))
+            if sequence == len(frames):
+                return
+
+    async def main():
+        received = [[] for _ in range(5)]
+        tasks = [asyncio.create_task(viewer(r)) for r in received]
+        await asyncio.sleep(0.01)
+        assert hub.subscribers == 5
+
+        def publish():
+            for frame in frames:
+                hub.publish(frame)
+                # Give viewers time to pick up each frame
+                threading.Event().wait(0.01)
+        await asyncio.get_running_loop().run_in_executor(None, publish)
+        await asyncio.wait_for(asyncio.gather(*tasks), 1)
+        return received
+
+    received = asyncio.run(main())
+    for r in received:
+        assert [s for s, _ in r] == [1, 2, 3, 4, 5]
+        # Every viewer gets the very same buffer object
+        assert all(frame is frames[s - 1] for s, frame in r)
+    assert hub.subscribers == 0
+
+def test_slow_viewer_skips_to_newest_frame():
+    hub = FrameBroadcaster()
+    for i in range(3):
+        hub.publish(bytes([i]))
+
+    async def main():
+        # Nothing is queued per viewer: it gets the newest frame only
+        first = await hub.next_frame(0)
+        hub.publish(b"late")
+        second = await hub.next_frame(first[0])
+        return first, second
+
+    assert asyncio.run(main()) == ((3, bytes([2])), (4, b"late"))
+
+def test_waiter_is_removed_on_timeout():
+    hub = FrameBroadcaster()
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await hub.next_frame(0, timeout=0.01)
+
+    asyncio.run(main())
+    assert all(not waiters for waiters in hub._waiters.values())
+    assert hub.publish(b"x") == 1
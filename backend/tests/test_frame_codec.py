@@ -0,0 +1,69 @@
+import pytest
+import os
+import sys
+import json
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.frame_codec import (
+    FrameDecodeError, HEADER, decode_frame, encode_frame, landmarks_to_array
+)
+from models import Landmark
+from main import app
+
+def make_landmarks():
+    rng = np.random.default_rng(0)
+    landmarks = rng.uniform(0, 1, size=(33, 4)).astype(np.float32)
+    landmarks[:, 3] = 1.0
+    return landmarks
+
+def test_round_trip():
+    landmarks = make_landmarks()
+    world = landmarks * 0.5
+    frame = decode_frame(encode_frame("JOINT_ANALYSIS", landmarks, 1280, 720, view="side", world_landmarks=world))
+    assert frame.type == "JOINT_ANALYSIS"
+    assert frame.view == "side"
+    assert (frame.width, frame.height) == (1280, 720)
+    np.testing.assert_array_equal(frame.landmarks, landmarks)
+    np.testing.assert_array_equal(frame.world_landmarks, world)
+
+def test_frame_size():
+    data = encode_frame("POSTURE_SYNC", make_landmarks(), 640, 480)
+    assert len(data) == HEADER.size + 33 * 4 * 4
+
+def test_decode_rejects_truncated_frame():
+    data = encode_frame("POSTURE_SYNC", make_landmarks(), 640, 480)
+    with pytest.raises(FrameDecodeError):
+        decode_frame(data[:-4])
+    with pytest.raises(FrameDecodeError):
+        decode_frame(data[:3])
+
+def test_landmarks_to_array():
+    arr = landmarks_to_array([Landmark(x=0.1, y=0.2), {"x": 0.3, "y": 0.4, "z": None, "visibility": None}])
+    np.testing.assert_allclose(arr, [[0.1, 0.2, 0.0, 1.0], [0.3, 0.4, 0.0, 1.0]], rtol=1e-6)
+
+def test_websocket_binary_matches_json():
+    landmarks = make_landmarks()
+    measurements = [{"id": "elbow-l", "jointType": "elbow", "direction": "flexion", "side": "left"}]
+    json_landmarks = [{"x": float(x), "y": float(y), "z": float(z), "visibility": float(v)} for x, y, z, v in landmarks]
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "JOINT_ANALYSIS", "width": 1280, "height": 720,
+                                 "landmarks": json_landmarks, "measurements": measurements}))
+        json_result = json.loads(ws.receive_text())
+
+        ws.send_text(json.dumps({"type": "NEGOTIATE", "encoding": "binary", "measurements": measurements}))
+        assert json.loads(ws.receive_text())["encoding"] == "binary"
+
+        ws.send_bytes(encode_frame("JOINT_ANALYSIS", landmarks, 1280, 720))
+        binary_result = json.loads(ws.receive_text())
+
+        ws.send_bytes(encode_frame("POSTURE_SYNC", landmarks, 1280, 720, view="front"))
+        assert json.loads(ws.receive_text())["type"] == "ANALYSIS_RESULT"
+
+    assert binary_result["type"] == "JOINT_RESULT"
+    assert binary_result["results"][0]["angle"] == pytest.approx(json_result["results"][0]["angle"], abs=1e-6)
@@ -0,0 +1,122 @@
+import pytest
+import os
+import sys
+import time
+import asyncio
+import cv2
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.frame_sources import (
+    ImageSequenceSource, SyntheticSource, VideoFileSource, open_source
+)
+from utils.camera_stream import CameraManager
+from utils.pose_backends import PoseBackend
+from benchmarks.camera_load import parse_args, run_benchmark, stats_url
+
+def read_all(source, count, image=None):
+    frames, stamps = [], []
+    for _ in range(count):
+        ok, image = source.read(image)
+        assert ok
+        frames.append(image.copy())
+        stamps.append(source.timestamp)
+    return frames, stamps
+
+def test_synthetic_frames_are_reproducible_and_reuse_the_buffer():
+    first, stamps = read_all(SyntheticSource(64, 48, fps=20, pace="fast"), 3)
+    second, _ = read_all(SyntheticSource(64, 48, fps=20, pace="fast"), 3)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+    assert not np.array_equal(first[0], first[1])
+    assert stamps == [0.0, 50.0, 100.0]
+    source = SyntheticSource(64, 48, pace="fast")
+    buffer = np.empty((48, 64, 3), dtype=np.uint8)
+    assert source.read(buffer)[1] is buffer
+
+def test_realtime_pacing_follows_timestamps():
+    source = SyntheticSource(32, 24, fps=50, pace="realtime")
+    started = time.perf_counter()
+    read_all(source, 11)
+    # 10 intervals of 20 ms after the first frame
+    assert 0.18 < time.perf_counter() - started < 0.5
+
+def test_finite_synthetic_source_loops_with_increasing_timestamps():
+    source = SyntheticSource(32, 24, fps=10, pace="fast", frame_count=2)
+    frames, stamps = read_all(source, 5)
+    assert stamps == [0.0, 100.0, 200.0, 300.0, 400.0]
+    np.testing.assert_array_equal(frames[0], frames[2])
+
+@pytest.fixture
+def clip(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for i in range(4):
+        writer.write(np.full((48, 64, 3), i * 60, dtype=np.uint8))
+    writer.release()
+    return path
+
+def test_video_file_reports_pts_and_loops(clip):
+    source = VideoFileSource(clip, pace="fast")
+    assert source.isOpened() and source.fps == 10
+    frames, stamps = read_all(source, 6)
+    assert stamps == pytest.approx([0, 100, 200, 300, 400, 500])
+    assert abs(int(frames[4].mean()) - int(frames[0].mean())) < 5
+    once = VideoFileSource(clip, pace="fast", loop=False)
+    read_all(once, 4)
+    assert once.read() == (False, None)
+
+def test_image_sequence_from_directory_and_glob(tmp_path):
+    for i in (2, 0, 1):
+        cv2.imwrite(str(tmp_path / f"frame{i}.png"), np.full((8, 8, 3), i * 50, dtype=np.uint8))
+    (tmp_path / "notes.txt").write_text("not an image")
+    source = ImageSequenceSource(str(tmp_path), fps=5, pace="fast")
+    frames, stamps = read_all(source, 4)
+    assert [int(f[0, 0, 0]) for f in frames] == [0, 50, 100, 0]
+    assert stamps == [0.0, 200.0, 400.0, 600.0]
+    assert len(ImageSequenceSource(str(tmp_path / "frame[01].png")).paths) == 2
+    assert not ImageSequenceSource(str(tmp_path / "*.jpg")).isOpened()
+
+def test_open_source_parses_virtual_sources(clip):
+    synthetic = open_source("synthetic:?size=320x240&fps=15&pace=fast")
+    assert (synthetic.width, synthetic.height, synthetic.fps, synthetic.pace) == (320, 240, 15, "fast")
+    assert isinstance(open_source(f"file:{clip}?loop=0"), VideoFileSource)
+    with pytest.raises(ValueError):
+        open_source("synthetic:?pace=warp")
+    # Anything else still goes to OpenCV
+    assert isinstance(open_source(clip), cv2.VideoCapture)
+
+class StampRecorder(PoseBackend):
+    def __init__(self):
+        self.timestamps = []
+
+    def process(self, rgb, timestamp):
+        self.timestamps.append(timestamp)
+        return None
+
+def test_camera_stamps_frames_with_source_time():
+    camera = CameraManager("synthetic:?size=160x120&fps=10&pace=fast", "virtual")
+    recorder = StampRecorder()
+    camera.set_pose_backend(recorder, every=1)
+    assert camera.start()
+    try:
+        time.sleep(0.3)
+        assert camera.get_video_frame()[:2] == b"\xff\xd8"
+    finally:
+        camera.stop()
+    stamps = recorder.timestamps
+    assert len(stamps) > 1
+    # Media time, 100 ms per frame, not the wall clock
+    assert all((b - a) % 100 == 0 and b > a for a, b in zip(stamps, stamps[1:]))
+    assert not CameraManager("synthetic:?pace=warp").start()
+
+def test_benchmark_runs_on_a_virtual_source():
+    args = parse_args(["--source", "synthetic:?size=160x120&pace=fast", "--duration", "0.3",
+                       "--viewers", "2", "--beauty", "off"])
+    report = asyncio.run(run_benchmark(args))
+    assert report["stages"]["capture"]["fps"] > 30
+    assert report["viewers"] == 2 and all(v["frames"] > 1 for v in report["per_viewer"])
+    assert stats_url("http://h:8000/video_feed/room1") == "http://h:8000/camera/room1/stats"
+    assert stats_url("http://h:8000/video_feed") == "http://h:8000/camera/stats"
@@ -0,0 +1,65 @@
+import pytest
+import os
+import sys
+import json
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.landmark_filter import LandmarkSmoother
+from main import app
+
+FPS = 30.0
+
+def frame(x, visibility=1.0):
+    landmarks = np.full((33, 4), 0.5)
+    landmarks[:, 0] = x
+    landmarks[:, 3] = visibility
+    return landmarks
+
+def test_reduces_jitter_on_still_subject():
+    rng = np.random.default_rng(0)
+    smoother = LandmarkSmoother()
+    raw, smoothed = [], []
+    for i in range(90):
+        x = 0.5 + rng.normal(0, 0.01)
+        raw.append(x)
+        smoothed.append(smoother(frame(x), i / FPS)[0, 0])
+    assert np.std(smoothed[30:]) < np.std(raw[30:]) / 2
+
+def test_low_visibility_landmarks_hold_position():
+    smoother = LandmarkSmoother(min_visibility=0.5)
+    smoother(frame(0.5), 0.0)
+    out = smoother(frame(0.9, visibility=0.1), 1 / FPS)
+    assert out[0, 0] == pytest.approx(0.5)
+    # Visibility column passes through unchanged
+    assert out[0, 3] == pytest.approx(0.1)
+
+def test_kalman_prediction_reduces_lag():
+    plain = LandmarkSmoother()
+    predicted = LandmarkSmoother(predict_ms=100)
+    speed = 0.3  # normalized units per second
+    for i in range(60):
+        t = i / FPS
+        lag_plain = speed * t - plain(frame(speed * t), t)[0, 0]
+        lag_predicted = speed * t - predicted(frame(speed * t), t)[0, 0]
+    assert abs(lag_predicted) < abs(lag_plain)
+
+def test_gap_resets_filter():
+    smoother = LandmarkSmoother()
+    smoother(frame(0.2), 0.0)
+    out = smoother(frame(0.8), 5.0)
+    assert out[0, 0] == pytest.approx(0.8)
+
+def test_websocket_smoothing_enabled():
+    landmarks = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "CONFIGURE_SMOOTHING", "predictMs": 50}))
+        assert json.loads(ws.receive_text()) == {"type": "SMOOTHING_CONFIGURED", "enabled": True}
+        for _ in range(2):
+            ws.send_text(json.dumps({"type": "POSTURE_SYNC", "view": "front", "width": 640,
+                                     "height": 480, "landmarks": landmarks}))
+            assert json.loads(ws.receive_text())["type"] == "ANALYSIS_RESULT"
@@ -0,0 +1,87 @@
+import pytest
+import os
+import sys
+import json
+import time
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.metrics import Histogram, MetricsRegistry
+from utils.camera_stream import STEP_SECONDS, CameraManager
+from utils.pose_backends import PoseBackend
+import main
+
+def samples(text):
+    """{series: value} of a text exposition, skipping comments."""
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            result[series] = float(value)
+    return result
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("t_seconds", "Test.", ["step"], buckets=(0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 2.0):
+        histogram.observe(value, "read")
+    series = samples("\n".join(histogram.render()))
+    assert series['t_seconds_bucket{step="read",le="0.01"}'] == 2
+    assert series['t_seconds_bucket{step="read",le="0.1"}'] == 3
+    assert series['t_seconds_bucket{step="read",le="+Inf"}'] == 4
+    assert series['t_seconds_count{step="read"}'] == 4
+    assert series['t_seconds_sum{step="read"}'] == pytest.approx(2.065)
+    with pytest.raises(ValueError):
+        histogram.observe(1.0)
+
+def test_gauges_and_registry():
+    registry = MetricsRegistry()
+    connections = registry.gauge("t_connections", "Open connections.")
+    assert registry.gauge("t_connections", "Again.") is connections
+    connections.inc()
+    connections.inc()
+    connections.dec()
+    registry.gauge("t_depth", "Queue depth.", ["queue"], callback=lambda: {("a\"b",): 3})
+    registry.counter("t_broken_total", "Fails.", callback=lambda: 1 / 0)
+    text = registry.render()
+    # A failing callback drops its own metric, not the scrape
+    assert "# TYPE t_connections gauge" in text and "t_broken_total" not in text
+    series = samples(text)
+    assert series["t_connections"] == 1
+    assert series['t_depth{queue="a\\"b"}'] == 3
+
+class SlowPose(PoseBackend):
+    def process(self, rgb, timestamp):
+        time.sleep(0.002)
+        return None
+
+def test_camera_steps_are_timed():
+    camera = CameraManager("synthetic:?size=160x120&fps=200&pace=fast", "metrics-test")
+    camera.set_pose_backend(SlowPose(), every=1)
+    assert camera.start()
+    try:
+        time.sleep(0.4)
+    finally:
+        camera.stop()
+    for step in ("read", "flip", "beauty", "pose", "encode"):
+        counts, total = STEP_SECONDS.snapshot("metrics-test", step)
+        assert counts[-1] > 0, step
+    counts, total = STEP_SECONDS.snapshot("metrics-test", "pose")
+    assert total / counts[-1] >= 0.002
+
+def test_metrics_endpoint_reports_ws_steps_and_connections():
+    client = TestClient(main.app)
+    landmarks = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "POSTURE_SYNC", "view": "front", "width": 640, "height": 480,
+                                 "landmarks": landmarks}))
+        assert json.loads(ws.receive_text())["type"] == "ANALYSIS_RESULT"
+        response = client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        series = samples(response.text)
+        assert series["vision3_ws_connections"] == 1
+    for step in ("parse", "validate", "queue", "analyze", "serialize", "send"):
+        assert series[f'vision3_ws_step_seconds_count{{step="{step}"}}'] >= 1, step
+    assert "vision3_analysis_pending" in series
+    assert samples(client.get("/metrics").text)["vision3_ws_connections"] == 0
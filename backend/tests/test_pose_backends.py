@@ -0,0 +1,76 @@
+import pytest
+import os
+import sys
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pose_backends import (
+    NullPoseBackend, PoseBackend, PoseRunner, create_pose_backend, draw_pose
+)
+from utils.posture_analysis import analyze_posture
+from benchmarks.hot_paths import synthetic_frames
+
+class FixedPose(PoseBackend):
+    """Returns the same landmarks for every image and remembers what it saw."""
+    name = "fixed"
+
+    def __init__(self, landmarks):
+        self.landmarks = landmarks.astype(np.float32)
+        self.shapes = []
+
+    def process(self, rgb, timestamp):
+        self.shapes.append(rgb.shape)
+        return self.landmarks, None
+
+def frame(width=1280, height=720):
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+def test_runner_skips_frames_and_downscales():
+    backend = FixedPose(synthetic_frames(1)[0])
+    runner = PoseRunner(backend, every=3, width=320)
+    estimates = [runner.submit(frame(), timestamp=i) for i in range(7)]
+    # Frames 0, 3 and 6 are inferred, the rest reuse the previous estimate
+    assert runner.inferences == 3
+    assert backend.shapes == [(180, 320, 3)] * 3
+    assert [e.sequence for e in estimates] == [0, 0, 0, 3, 3, 3, 6]
+    assert estimates[-1].timestamp == 6
+    # Normalized landmarks describe the full-size frame
+    assert (estimates[-1].width, estimates[-1].height) == (1280, 720)
+
+def test_mirror_flips_image_x_only():
+    landmarks = synthetic_frames(1)[0]
+    runner = PoseRunner(FixedPose(landmarks), every=1)
+    estimate = runner.submit(frame(), 0, mirror=True)
+    np.testing.assert_allclose(estimate.landmarks[:, 0], 1.0 - landmarks[:, 0], atol=1e-6)
+    np.testing.assert_allclose(estimate.landmarks[:, 1:], landmarks[:, 1:], atol=1e-6)
+
+def test_no_detection_keeps_previous_estimate():
+    class Flaky(FixedPose):
+        def process(self, rgb, timestamp):
+            return super().process(rgb, timestamp) if timestamp == 0 else None
+    runner = PoseRunner(Flaky(synthetic_frames(1)[0]), every=1)
+    runner.submit(frame(), 0)
+    assert runner.submit(frame(), 1).timestamp == 0
+
+def test_null_backend_never_infers():
+    runner = PoseRunner(NullPoseBackend(), every=1)
+    assert runner.submit(frame(), 0) is None
+    assert runner.inferences == 0
+
+def test_create_pose_backend_by_name():
+    assert isinstance(create_pose_backend("none"), NullPoseBackend)
+    # auto degrades to no inference rather than failing startup
+    assert isinstance(create_pose_backend("auto"), PoseBackend)
+    with pytest.raises(ValueError):
+        create_pose_backend("openpose")
+
+def test_estimate_feeds_posture_analysis_and_drawing():
+    runner = PoseRunner(FixedPose(synthetic_frames(1)[0]), every=1)
+    estimate = runner.submit(frame(), 0, mirror=True)
+    result = analyze_posture("front", estimate.landmarks, estimate.width, estimate.height)
+    assert result["metrics"].shoulderAngle is not None
+    image = frame()
+    draw_pose(image, estimate)
+    assert image.any()
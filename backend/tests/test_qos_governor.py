@@ -0,0 +1,167 @@
+import pytest
+import os
+import sys
+import json
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.qos_governor import (
+    QOS_LEVELS, RECOVER_INTERVALS, UNRESTRICTED, saturation, LatencyWindow, QosGovernor, QosSettings
+)
+from utils.camera_pool import CameraPool
+from utils.camera_stream import CameraManager
+from main import analysis_latency, app
+
+class FakeCamera:
+    """Just the parts of CameraManager and CameraPool the governor talks to."""
+
+    def __init__(self, tier="balanced", stages=None):
+        self.camera_id = "0"
+        self.is_running = True
+        self.qos = UNRESTRICTED
+        self.tier = tier
+        self.stages = stages or {"enhance": {"fps": 30.0, "ms": 10.0, "frames": 1}}
+
+    def effective_qos(self, limits=None):
+        limits = self.qos if limits is None else limits
+        order = ["off", "fast", "balanced", "full"]
+        return limits._replace(beauty_tier=min(self.tier, limits.beauty_tier, key=order.index))
+
+    def stage_stats(self):
+        return self.stages
+
+    def running(self):
+        return [self] if self.is_running else []
+
+def loaded(window, latency_ms, now, count=50):
+    for _ in range(count):
+        window.record(latency_ms, now)
+
+def test_steps_down_while_over_target_skipping_no_op_levels():
+    window = LatencyWindow(window_s=1.0)
+    camera = FakeCamera(tier="balanced")
+    governor = QosGovernor(camera, window, target_p95_ms=50, interval_s=1.0)
+    loaded(window, 80, now=0.0)
+    # Level 1 only caps beauty at "balanced", which this camera already uses
+    assert governor.tick(now=0.5) == 2
+    assert camera.qos == QOS_LEVELS[2]
+    # The next step waits until the previous one could show in the window
+    loaded(window, 80, now=1.0)
+    assert governor.tick(now=1.5) is None
+    loaded(window, 80, now=2.5)
+    assert governor.tick(now=2.6) == 3
+    assert governor.status()["cameras"]["0"]["stages"]["enhance"]["load"] == pytest.approx(0.3)
+
+def test_recovers_after_sustained_headroom():
+    window = LatencyWindow(window_s=1.0)
+    camera = FakeCamera(tier="full")
+    governor = QosGovernor(camera, window, target_p95_ms=50, interval_s=1.0)
+    governor.level, camera.qos = 3, QOS_LEVELS[3]
+    changes = []
+    for i in range(4 * RECOVER_INTERVALS):
+        loaded(window, 10, now=float(i))
+        changes.append(governor.tick(now=float(i) + 0.5))
+    assert [c for c in changes if c is not None] == [2, 1, 0]
+    assert camera.qos == UNRESTRICTED
+
+def test_holds_between_thresholds_and_when_camera_is_off():
+    window = LatencyWindow(window_s=1.0)
+    camera = FakeCamera()
+    governor = QosGovernor(camera, window, target_p95_ms=50)
+    governor.level, camera.qos = 4, QOS_LEVELS[4]
+    for i in range(2 * RECOVER_INTERVALS):
+        # Under target, but not by enough to risk a step up
+        loaded(window, 40, now=float(i))
+        assert governor.tick(now=float(i) + 0.5) is None
+    camera.is_running = False
+    loaded(window, 500, now=100.0)
+    assert governor.tick(now=100.5) is None
+    assert governor.level == 4
+
+def preview_stages(enhance_ms):
+    return {
+        "capture": {"fps": 30.0, "ms": 2.0, "frames": 100},
+        "enhance": {"fps": 30.0, "ms": enhance_ms, "frames": 100},
+        "encode": {"fps": 30.0, "ms": 5.0, "frames": 100},
+    }
+
+def test_saturated_preview_stage_steps_down_while_latency_is_fine():
+    window = LatencyWindow(window_s=1.0)
+    # Beauty takes 32 of the 33 ms between frames
+    camera = FakeCamera(tier="full", stages=preview_stages(32.0))
+    governor = QosGovernor(camera, window, target_p95_ms=50, interval_s=1.0)
+    assert saturation(camera.stage_stats()) == pytest.approx(0.96)
+    changes = []
+    for i in range(0, 40, 2):
+        loaded(window, 10, now=float(i))
+        changes.append(governor.tick(now=float(i) + 0.5))
+    # Down through the preview levels, but never into the pose rate
+    assert [c for c in changes if c is not None] == list(range(1, 7))
+    assert camera.qos.pose_throttle == 1
+    assert governor.status()["saturation"] == pytest.approx(0.96)
+
+def test_busy_preview_stage_holds_off_recovery():
+    window = LatencyWindow(window_s=1.0)
+    # Under the saturation threshold, but without the headroom to step up
+    camera = FakeCamera(tier="full", stages=preview_stages(20.0))
+    governor = QosGovernor(camera, window, target_p95_ms=50, interval_s=1.0)
+    governor.level, camera.qos = 3, QOS_LEVELS[3]
+    for i in range(2 * RECOVER_INTERVALS):
+        loaded(window, 10, now=float(i))
+        assert governor.tick(now=float(i) + 0.5) is None
+    camera.stages = preview_stages(10.0)
+    changes = [governor.tick(now=100.0 + i) for i in range(RECOVER_INTERVALS)]
+    assert changes[-1] == 2
+
+def test_latency_window_forgets_old_samples():
+    window = LatencyWindow(window_s=2.0)
+    window.record(100, now=0.0)
+    window.record(5, now=3.0)
+    assert window.recent(now=3.5) == [5]
+
+def test_camera_uses_lower_of_configured_and_capped_settings():
+    camera = CameraManager()
+    saved = (camera.beauty.tier, camera.jpeg_quality, camera.qos)
+    try:
+        camera.beauty.tier = "fast"
+        camera.jpeg_quality = 70
+        camera.qos = QosSettings("balanced", 80, 0.5, 2)
+        effective = camera.effective_qos()
+        # An operator's cheaper choice is never raised by the cap
+        assert effective == QosSettings("fast", 70, 0.5, 2)
+        assert camera.effective_qos(UNRESTRICTED).beauty_tier == "fast"
+    finally:
+        camera.beauty.tier, camera.jpeg_quality, camera.qos = saved
+
+def test_joint_analysis_latency_is_recorded():
+    before = len(analysis_latency.recent())
+    landmarks = [{"x": 0.5, "y": 0.5, "z": 0.0, "visibility": 1.0} for _ in range(33)]
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({
+            "type": "JOINT_ANALYSIS", "width": 640, "height": 480, "landmarks": landmarks,
+            "measurements": [{"id": "knee", "jointType": "knee", "direction": "flexion", "side": "left"}]
+        }))
+        assert json.loads(ws.receive_text())["type"] == "JOINT_RESULT"
+    assert len(analysis_latency.recent()) == before + 1
+    assert client.get("/qos").json()["level"] == 0
+
+def test_level_applies_to_every_camera_of_the_pool():
+    pool = CameraPool({"a": 0, "b": 1})
+    cameras = [pool.get("a"), pool.get("b")]
+    cameras[0].beauty.tier = "full"
+    cameras[1].beauty.tier = "off"
+    for camera in cameras:
+        # Marked running without opening a device
+        camera.is_running = True
+    window = LatencyWindow(window_s=1.0)
+    governor = QosGovernor(pool, window, target_p95_ms=50)
+    loaded(window, 80, now=0.0)
+    # Camera "b" has nothing to give at level 1, but camera "a" does
+    assert governor.tick(now=0.5) == 1
+    assert [camera.qos for camera in cameras] == [QOS_LEVELS[1]] * 2
+    # Cameras created later start at the current level
+    assert pool.get("2").qos == QOS_LEVELS[1]
+    assert set(governor.status()["cameras"]) == {"a", "b"}
@@ -0,0 +1,72 @@
+import pytest
+import os
+import sys
+import json
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.rom_tracker import RunningRom, RomTracker
+from main import app
+
+def test_running_stats_without_hold():
+    rom = RunningRom()
+    for i, value in enumerate([10.0, 30.0, 20.0]):
+        rom.update(value, i * 100)
+    summary = rom.summary()
+    assert summary["min"] == 10.0
+    assert summary["max"] == 30.0
+    assert summary["mean"] == pytest.approx(20.0)
+    assert summary["peakAt"] == 100
+    assert summary["current"] == 20.0
+
+def test_hold_filter_ignores_spikes():
+    rom = RunningRom(hold_ms=100)
+    # 33 ms frames: a one-frame spike to 80, then 30 held for several frames
+    values = [0, 10, 80, 10, 20, 30, 30, 30, 30, 30, 5]
+    for i, value in enumerate(values):
+        rom.update(value, i * 33)
+    assert rom.max == 30
+    # 30 first arrives at frame 5 and has been held 100 ms by frame 9
+    assert rom.peak_at == 9 * 33
+    # The final single-frame dip is not held long enough to count
+    assert rom.min > 5
+
+def test_hold_filter_with_sparse_frames():
+    # Frames further apart than the hold time: a lone spike is still not held
+    rom = RunningRom(hold_ms=100)
+    for i, value in enumerate([0, 80, 0, 40, 40]):
+        rom.update(value, i * 500)
+    assert rom.max == 40
+    # 40 arrives at 1500 ms; only the next frame shows it was held
+    assert rom.peak_at == 2000
+
+def test_tracker_rate_limits_summaries():
+    tracker = RomTracker(interval_ms=500)
+    tracker.update([("a", 10.0), ("b", None)], 0)
+    assert tracker.due(0)
+    summaries = tracker.summaries(0)
+    assert [s["id"] for s in summaries] == ["a"]
+    assert not tracker.due(200)
+    assert tracker.due(500)
+
+def test_websocket_rom_summary_only():
+    landmarks = [{"x": 0.5, "y": 0.5} for _ in range(33)]
+    landmarks[25] = {"x": 0.5, "y": 0.8}  # Knee
+    landmarks[27] = {"x": 0.8, "y": 0.8}  # Ankle
+    measurements = [{"id": "knee-l", "jointType": "knee", "direction": "flexion", "side": "left"}]
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "REGISTER_MEASUREMENTS", "measurements": measurements}))
+        ws.receive_text()
+        ws.send_text(json.dumps({"type": "SUBSCRIBE_ROM", "intervalMs": 0, "perFrameResults": False}))
+        assert json.loads(ws.receive_text())["type"] == "ROM_SUBSCRIBED"
+
+        ws.send_text(json.dumps({"type": "JOINT_ANALYSIS", "width": 1000, "height": 1000, "landmarks": landmarks}))
+        summary = json.loads(ws.receive_text())
+
+    assert summary["type"] == "ROM_SUMMARY"
+    assert summary["summaries"][0]["id"] == "knee-l"
+    assert summary["summaries"][0]["max"] == pytest.approx(90.0)
@@ -0,0 +1,138 @@
+import pytest
+import os
+import sys
+import json
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.frame_codec import LandmarkFrame, encode_frame
+from utils.session_recorder import MAX_CHUNK_FRAMES, SessionReader, SessionRecorder
+from main import app
+
+def make_frame(seed, world=True, view="front"):
+    rng = np.random.default_rng(seed)
+    landmarks = rng.uniform(0, 1, size=(33, 4)).astype(np.float32)
+    world_landmarks = rng.normal(0, 0.5, size=(33, 4)).astype(np.float32) if world else None
+    return LandmarkFrame("JOINT_ANALYSIS", view, 1280, 720, landmarks, world_landmarks)
+
+def record(path, count, chunk_frames=4, quantize=True):
+    recorder = SessionRecorder(str(path), chunk_frames=chunk_frames, quantize=quantize)
+    frames = [make_frame(i, world=i % 3 != 0, view="side" if i % 2 else "front") for i in range(count)]
+    for i, frame in enumerate(frames):
+        recorder.append(frame, 1000 + i * 33)
+    return recorder, frames
+
+@pytest.mark.parametrize("quantize", [True, False])
+def test_round_trip(tmp_path, quantize):
+    recorder, frames = record(tmp_path / "s", 10, quantize=quantize)
+    recorder.close()
+
+    reader = SessionReader(str(tmp_path / "s"))
+    assert len(reader) == 10
+    assert len(reader.chunks) == 3
+    data = reader.read()
+    tolerance = 1e-4 if quantize else 0
+    np.testing.assert_allclose(data.landmarks, [f.landmarks for f in frames], atol=tolerance)
+    assert data.views == [f.view for f in frames]
+    for i, frame in enumerate(frames):
+        if frame.world_landmarks is None:
+            assert np.isnan(data.world_landmarks[i]).all()
+        else:
+            np.testing.assert_allclose(data.world_landmarks[i], frame.world_landmarks, atol=tolerance)
+
+def test_quantized_columns_are_int16(tmp_path):
+    recorder, _ = record(tmp_path / "s", 2)
+    recorder.close()
+    column = np.load(tmp_path / "s" / "chunk-000000" / "landmarks.npy", mmap_mode="r")
+    assert column.dtype == np.int16 and column.shape == (4, 33, 4)
+
+def test_time_range_reads_only_matching_chunks(tmp_path):
+    recorder, frames = record(tmp_path / "s", 10)
+    recorder.close()
+    reader = SessionReader(str(tmp_path / "s"))
+
+    data = reader.read(1000 + 3 * 33, 1000 + 6 * 33)
+    assert data.timestamps.tolist() == [1099, 1132, 1165]
+    assert list(reader._slices(1000 + 3 * 33, 1000 + 6 * 33)) == [(0, 3, 4), (1, 0, 2)]
+    assert len(reader.read(5000, 6000).timestamps) == 0
+
+    replayed = list(reader.replay(1000 + 8 * 33))
+    assert [t for t, _ in replayed] == [1264, 1297]
+    assert replayed[0][1].view == "front" and replayed[0][1].world_landmarks is not None
+    assert replayed[1][1].view == "side" and replayed[1][1].world_landmarks is None
+
+def test_unclosed_recording_is_readable(tmp_path):
+    # Simulates a crash: the last chunk was never closed
+    recorder, _ = record(tmp_path / "s", 6)
+    for column in recorder._columns.values():
+        column.flush()
+    reader = SessionReader(str(tmp_path / "s"))
+    assert len(reader) == 6 and reader.end == 1000 + 5 * 33
+
+def test_chunk_size_is_bounded(tmp_path):
+    for chunk_frames in (0, -1, MAX_CHUNK_FRAMES + 1):
+        with pytest.raises(ValueError):
+            SessionRecorder(str(tmp_path / "rec"), chunk_frames=chunk_frames)
+    assert not (tmp_path / "rec").exists()
+
+def test_websocket_recording(tmp_path, monkeypatch):
+    monkeypatch.setenv("VISION3_RECORD_DIR", str(tmp_path))
+    frame = make_frame(0)
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "NEGOTIATE", "encoding": "binary"}))
+        ws.receive_text()
+        ws.send_text(json.dumps({"type": "START_RECORDING", "sessionId": "patient-1"}))
+        assert json.loads(ws.receive_text()) == {"type": "RECORDING_STARTED", "recording": True, "sessionId": "patient-1"}
+
+        for _ in range(3):
+            ws.send_bytes(encode_frame("JOINT_ANALYSIS", frame.landmarks, 1280, 720, world_landmarks=frame.world_landmarks))
+            ws.receive_text()
+        ws.send_text(json.dumps({"type": "STOP_RECORDING"}))
+        assert json.loads(ws.receive_text()) == {"type": "RECORDING_STOPPED", "frames": 3}
+
+        ws.send_text(json.dumps({"type": "START_RECORDING", "sessionId": "../escape"}))
+        assert json.loads(ws.receive_text())["recording"] is False
+        for chunk_frames in (0, -5, 10 ** 9, "60", 2.5, True):
+            ws.send_text(json.dumps({"type": "START_RECORDING", "sessionId": "bad", "chunkFrames": chunk_frames}))
+            reply = json.loads(ws.receive_text())
+            assert reply["recording"] is False and "chunkFrames" in reply["error"]
+        assert not (tmp_path / "bad").exists()
+
+    data = SessionReader(str(tmp_path / "patient-1")).read()
+    np.testing.assert_allclose(data.landmarks[2], frame.landmarks, atol=1e-4)
+
+def test_recording_keeps_frames_dropped_by_coalescing(tmp_path, monkeypatch):
+    monkeypatch.setenv("VISION3_RECORD_DIR", str(tmp_path))
+    frame = make_frame(0)
+    data = encode_frame("JOINT_ANALYSIS", frame.landmarks, 1280, 720)
+    sent = 200
+
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "NEGOTIATE", "encoding": "binary", "coalesce": True}))
+        ws.receive_text()
+        ws.send_text(json.dumps({"type": "START_RECORDING", "sessionId": "flood"}))
+        assert json.loads(ws.receive_text())["recording"] is True
+        for _ in range(sent):
+            ws.send_bytes(data)
+        ws.send_text(json.dumps({"type": "STOP_RECORDING"}))
+        replies = []
+        while not replies or replies[-1]["type"] != "RECORDING_STOPPED":
+            replies.append(json.loads(ws.receive_text()))
+
+    # Every frame sent is recorded, however many coalescing analyzed
+    assert replies[-1]["frames"] == sent
+    timestamps = SessionReader(str(tmp_path / "flood")).read().timestamps
+    assert len(timestamps) == sent and np.all(np.diff(timestamps) >= 0)
+
+def test_recording_disabled_without_directory(monkeypatch):
+    monkeypatch.delenv("VISION3_RECORD_DIR", raising=False)
+    client = TestClient(app)
+    with client.websocket_connect("/ws/analyze") as ws:
+        ws.send_text(json.dumps({"type": "START_RECORDING"}))
+        assert json.loads(ws.receive_text())["recording"] is False
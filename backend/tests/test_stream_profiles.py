@@ -0,0 +1,124 @@
+import pytest
+import os
+import sys
+import time
+import asyncio
+import cv2
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.stream_profiles import (
+    FULL, LADDER, PROFILES, RECOVER_WINDOWS, StreamProfile, VariantStream, ViewerAdapter,
+    custom_profile, ladder_from
+)
+from utils.camera_stream import CameraManager
+from utils.pose_backends import NullPoseBackend
+import main
+
+def test_rate_limited_variant_keeps_its_average_rate():
+    variant = VariantStream(StreamProfile("t", 640, 60, 10))
+    # 30 fps capture with a little jitter
+    frames = [i / 30 + (0.003 if i % 2 else -0.003) for i in range(90)]
+    assert sum(variant.due(t) for t in frames) in (29, 30, 31)
+    assert all(VariantStream(StreamProfile("t", 640, 60)).due(t) for t in frames)
+
+def test_slow_viewer_steps_down_and_recovers():
+    adapter = ViewerAdapter(FULL, window_s=1.0)
+    # Gets one frame in three for two windows (each switch restarts the window)
+    changes = [adapter.record(i * 3, i * 0.1) for i in range(22)]
+    assert [c.name for c in changes if c] == ["high", "medium"]
+    # Then keeps up with every frame of the new variant
+    changes = [adapter.record(i, 2.2 + i * 0.1) for i in range(11 * RECOVER_WINDOWS + 1)]
+    assert [c.name for c in changes if c] == ["high"]
+
+def test_adapter_never_goes_above_the_requested_profile_or_below_the_last():
+    adapter = ViewerAdapter(PROFILES["low"], window_s=0.5)
+    assert [p.name for p in adapter.ladder] == ["low", "minimal"]
+    for i in range(100):
+        adapter.record(i * 10, i * 0.1)
+    assert adapter.profile.name == "minimal"
+
+def test_custom_profiles():
+    custom = custom_profile(PROFILES["medium"], quality=40)
+    assert custom == StreamProfile("custom", 960, 40, 20)
+    assert custom_profile(FULL) is FULL
+    assert ladder_from(custom)[1:] == [p for p in LADDER if p.cost() < custom.cost()]
+    for bad in ({"quality": 0}, {"width": -1}, {"max_fps": -2}):
+        with pytest.raises(ValueError):
+            custom_profile(FULL, **bad)
+
+def test_variants_are_encoded_once_and_shared():
+    camera = CameraManager("synthetic:?size=320x240&fps=60&pace=realtime", "variants-test")
+    camera.set_pose_backend(NullPoseBackend())
+    camera.beauty.tier = "off"
+    low = StreamProfile("t", 160, 50, 15)
+
+    async def watch():
+        viewers = [camera.stream(low).subscribe() for _ in range(2)]
+        full = camera.stream(FULL).subscribe()
+        first = [await viewer.__anext__() for viewer in viewers]
+        assert camera.viewers == 2
+        await full.__anext__()
+        assert camera.viewers == 3
+        # Same variant frame, same bytes object for both viewers
+        assert first[0][1] is first[1][1]
+        started, received = time.perf_counter(), 0
+        while time.perf_counter() - started < 1.0:
+            await viewers[0].__anext__()
+            received += 1
+        for viewer in viewers + [full]:
+            await viewer.aclose()
+        return first[0][1], received
+
+    assert camera.start()
+    try:
+        jpeg, received = asyncio.run(watch())
+    finally:
+        camera.stop()
+    image = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape == (120, 160, 3)
+    assert 10 <= received <= 17
+    assert camera.viewers == 0
+    assert camera.stream(low) is camera.stream(low)
+
+def test_video_feed_rejects_bad_profiles():
+    client = TestClient(main.app)
+    assert client.get("/video_feed?profile=ultra").status_code == 400
+    assert client.get("/video_feed?quality=0").status_code == 400
+
+def test_stream_switches_variant_when_the_adapter_says_so(monkeypatch):
+    switched = []
+
+    class SwitchOnce:
+        def __init__(self, profile):
+            self.profile = profile
+
+        def record(self, sequence, now):
+            if not switched:
+                switched.append(PROFILES["minimal"])
+                return PROFILES["minimal"]
+            return None
+
+    monkeypatch.setattr(main, "ViewerAdapter", SwitchOnce)
+    camera = CameraManager("synthetic:?size=640x480&fps=60", "switch-test")
+    camera.set_pose_backend(NullPoseBackend())
+
+    async def read_parts(count):
+        frames = main.gen_frames(camera, FULL, adaptive=True)
+        parts = [await frames.__anext__() for _ in range(count)]
+        viewers = camera.viewers
+        await frames.aclose()
+        return parts, viewers
+
+    assert camera.start()
+    try:
+        parts, viewers = asyncio.run(read_parts(6))
+    finally:
+        camera.stop()
+    first = cv2.imdecode(np.frombuffer(parts[1], np.uint8), cv2.IMREAD_COLOR)
+    second = cv2.imdecode(np.frombuffer(parts[4], np.uint8), cv2.IMREAD_COLOR)
+    assert first.shape[1] == 640 and second.shape[1] == 320
+    assert viewers == 1 and camera.viewers == 0
@@ -0,0 +1,147 @@
+import pytest
+import os
+import sys
+import time
+import threading
+import queue
+import cv2
+import numpy as np
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils.video_recorder import RecordingIndex, VideoRecorder
+from utils.camera_pool import CameraPool
+from utils.camera_stream import CameraManager
+from utils.pose_backends import NullPoseBackend
+import main
+
+def frame(value, width=64, height=48):
+    return np.full((height, width, 3), value, np.uint8)
+
+def test_segments_and_index(tmp_path):
+    recorder = VideoRecorder(str(tmp_path / "rec"), "t", fps=10, segment_s=1.0)
+    image = frame(100)
+    for i in range(25):
+        assert recorder.offer(1000 + i * 100, image)
+    # The recorder keeps its own copy
+    image[:] = 0
+    # A size change starts a new segment
+    recorder.offer(3500, frame(50, 32, 24))
+    summary = recorder.close()
+    assert summary["frames"] == 26 and summary["dropped"] == 0 and summary["segments"] == 4
+    assert not recorder.offer(3600, frame(0))
+
+    index = RecordingIndex(str(tmp_path / "rec"))
+    assert len(index) == 26
+    assert [s["frames"] for s in index.segments] == [10, 10, 5, 1]
+    video, number, stamp = index.locate(2350)
+    assert os.path.basename(video) == "segment-000001.mp4" and (number, stamp) == (3, 2300)
+    assert index.locate(999) is None
+    capture = cv2.VideoCapture(video)
+    frames = []
+    while True:
+        ok, image = capture.read()
+        if not ok:
+            break
+        frames.append(image)
+    capture.release()
+    assert len(frames) == 10 and abs(int(frames[3].mean()) - 100) <= 10
+    with pytest.raises(FileExistsError):
+        VideoRecorder(str(tmp_path / "rec"))
+
+class StalledRecorder(VideoRecorder):
+    def __init__(self, *args, **kwargs):
+        self.release = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _write(self, timestamp, image):
+        self.release.wait()
+        super()._write(timestamp, image)
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    recorder = StalledRecorder(str(tmp_path / "rec"), queue_size=3)
+    assert recorder.offer(0, frame(0))
+    while recorder.status()["queued"]:
+        time.sleep(0.01)
+    started = time.perf_counter()
+    accepted = sum(recorder.offer(i, frame(i)) for i in range(1, 50))
+    assert time.perf_counter() - started < 0.5
+    # The stalled encoder holds the first; three more fit in the queue
+    assert accepted == 3 and recorder.dropped == 46
+    recorder.release.set()
+    summary = recorder.close()
+    assert summary["frames"] == 4 and summary["queued"] == 0
+
+def test_camera_recording_keeps_capture_timestamps(tmp_path):
+    camera = CameraManager("synthetic:?size=160x120&fps=60&pace=realtime", "record-test")
+    camera.set_pose_backend(NullPoseBackend())
+    assert camera.start()
+    try:
+        camera.start_recording(VideoRecorder(str(tmp_path / "rec"), camera.camera_id, fps=60))
+        other = VideoRecorder(str(tmp_path / "other"))
+        with pytest.raises(RuntimeError):
+            camera.start_recording(other)
+        other.close()
+        time.sleep(0.5)
+    finally:
+        camera.stop()
+    assert not camera.recording and camera.stop_recording() is None
+    index = RecordingIndex(str(tmp_path / "rec"))
+    timestamps = index.segments[0]["timestamps"]
+    assert len(index) >= 15
+    # 60 fps media time
+    assert np.all(np.diff(timestamps) > 0) and np.median(np.diff(timestamps)) in (16, 17)
+
+def test_recording_endpoints(tmp_path, monkeypatch):
+    pool = CameraPool({"room1": "synthetic:?size=160x120&fps=30"}, idle_timeout_s=0)
+    monkeypatch.setattr(main, "camera_pool", pool)
+    client = TestClient(main.app)
+    monkeypatch.delenv("VISION3_RECORD_DIR", raising=False)
+    assert client.post("/camera/room1/recording/start").status_code == 400
+    monkeypatch.setenv("VISION3_RECORD_DIR", str(tmp_path))
+    assert client.post("/camera/room1/recording/start?name=../x").status_code == 400
+    assert client.post("/camera/room1/recording/stop").status_code == 404
+    try:
+        response = client.post("/camera/room1/recording/start?name=visit1")
+        assert response.status_code == 200
+        assert client.post("/camera/room1/recording/start").status_code == 409
+        assert client.get("/camera/room1/recording").json()["recording"]
+        # Counted as busy, so the idle reaper leaves the unwatched camera running
+        assert client.get("/cameras").json()["cameras"][0]["recording"]
+        time.sleep(0.4)
+        summary = client.post("/camera/room1/recording/stop").json()
+    finally:
+        for camera in pool.running():
+            camera.stop()
+    assert summary["frames"] > 0 and summary["path"] == os.path.join(str(tmp_path), "video", "visit1")
+    assert len(RecordingIndex(summary["path"])) == summary["frames"]
+
+def raise_full(item):
+    raise queue.Full
+
+def test_offer_racing_close_counts_a_drop(tmp_path, monkeypatch):
+    recorder = VideoRecorder(str(tmp_path / "rec"), queue_size=1)
+    # The queue fills between the full() check and the put, as when close() queues its stop marker
+    monkeypatch.setattr(recorder._queue, "full", lambda: False)
+    monkeypatch.setattr(recorder._queue, "put_nowait", raise_full)
+    assert not recorder.offer(0, frame(0))
+    assert recorder.dropped == 1
+    monkeypatch.undo()
+    assert recorder.close()["frames"] == 0
+
+class FailingRecorder(StalledRecorder):
+    def _write(self, timestamp, image):
+        self.release.wait()
+        raise OSError("disk full")
+
+def test_drops_from_both_threads_add_up(tmp_path):
+    recorder = FailingRecorder(str(tmp_path / "rec"), queue_size=2)
+    accepted = sum(recorder.offer(i, frame(i)) for i in range(10))
+    # The capture thread drops while the encoder thread fails to write what it took
+    recorder.release.set()
+    summary = recorder.close()
+    assert summary["frames"] == 0 and summary["error"] == "disk full"
+    assert summary["dropped"] == recorder.dropped == 10
+    assert accepted < 10
@@ -0,0 +1,90 @@
+import pytest
+import os
+import sys
+import asyncio
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from utils import webrtc_stream
+from utils.webrtc_stream import BitrateController, WebRtcPublisher, profile_for_bitrate, required_bitrate
+from utils.stream_profiles import FULL, LADDER, PROFILES
+from utils.camera_stream import CameraManager
+from utils.pose_backends import NullPoseBackend
+import main
+
+def test_bitrate_backs_off_on_loss_and_creeps_back():
+    controller = BitrateController(100_000, 2_000_000, 1_000_000)
+    assert controller.update(0.2) == 900_000
+    assert controller.update(0.05) == 900_000
+    assert controller.update(0.0) == 945_000
+    for _ in range(50):
+        controller.update(0.5)
+    assert controller.bitrate == 100_000
+    for _ in range(200):
+        controller.update(0.0)
+    assert controller.bitrate == 2_000_000
+
+def test_profile_follows_bitrate():
+    assert profile_for_bitrate(LADDER, 10_000_000) is FULL
+    assert profile_for_bitrate(LADDER, required_bitrate(PROFILES["medium"])) == PROFILES["medium"]
+    assert profile_for_bitrate(LADDER, 1000) == PROFILES["minimal"]
+    # Never above the ladder's first profile
+    low = [PROFILES["low"], PROFILES["minimal"]]
+    assert profile_for_bitrate(low, 10_000_000) == PROFILES["low"]
+
+def test_loopback_peer_receives_h264_video():
+    aiortc = pytest.importorskip("aiortc")
+    camera = CameraManager("synthetic:?size=320x240&fps=30", "webrtc-test")
+    camera.set_pose_backend(NullPoseBackend())
+    publisher = WebRtcPublisher()
+
+    async def watch():
+        client = aiortc.RTCPeerConnection()
+        client.addTransceiver("video", direction="recvonly")
+        received = asyncio.get_running_loop().create_future()
+        client.on("track", lambda track: received.set_result(track))
+        await client.setLocalDescription(await client.createOffer())
+        offer = client.localDescription
+        peer = await publisher.answer(camera, offer.sdp, offer.type, PROFILES["medium"])
+        answer = peer.connection.localDescription
+        await client.setRemoteDescription(answer)
+        track = await asyncio.wait_for(received, 10)
+        frames = [await asyncio.wait_for(track.recv(), 10) for _ in range(5)]
+        viewers = camera.viewers
+        status = publisher.status()
+        assert await publisher.close(peer.peer_id)
+        assert not await publisher.close(peer.peer_id)
+        await client.close()
+        return answer.sdp, frames, viewers, status
+
+    assert camera.start()
+    try:
+        sdp, frames, viewers, status = asyncio.run(watch())
+    finally:
+        camera.stop()
+    video = next(line for line in sdp.splitlines() if line.startswith("m=video"))
+    first_payload = video.split()[3]
+    assert f"a=rtpmap:{first_payload} H264/90000" in sdp
+    assert (frames[-1].width, frames[-1].height) == (320, 240)
+    assert frames[-1].pts > frames[0].pts
+    assert viewers == 1 and camera.viewers == 0
+    assert status[0]["camera"] == "webrtc-test" and status[0]["frames"] >= 5
+
+def test_offer_endpoint_errors(monkeypatch):
+    client = TestClient(main.app)
+    offer = {"sdp": "v=0\r\nm=video 9 UDP/TLS/RTP/SAVPF 96\r\n", "type": "offer"}
+    assert client.post("/webrtc/offer", json={**offer, "profile": "ultra"}).status_code == 400
+    assert client.post("/camera/nope/webrtc/offer", json=offer).status_code == 404
+    assert client.delete("/webrtc/unknown").status_code == 404
+    monkeypatch.setattr(webrtc_stream, "RTCPeerConnection", None)
+    assert client.post("/webrtc/offer", json=offer).status_code == 501
+    assert client.get("/webrtc").json() == {"available": False, "peers": []}
+
+def test_missing_encoder_attribute_warns_once(monkeypatch, capsys):
+    monkeypatch.setattr(webrtc_stream, "_encoder_missing_warned", False)
+    sender = object()
+    assert webrtc_stream._encoder_of(sender) is None
+    assert webrtc_stream._encoder_of(sender) is None
+    assert capsys.readouterr().out.count("no encoder attribute") == 1
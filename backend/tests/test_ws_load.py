@@ -0,0 +1,71 @@
+import pytest
+import os
+import sys
+import socket
+import threading
+import time
+import asyncio
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.ws_load import ClientStats, aggregate, frame_kind, parse_args, synthetic_motion
+
+def test_frame_kind_interleaves_by_ratio():
+    kinds = [frame_kind(i, 0.25) for i in range(100)]
+    assert kinds.count("JOINT_ANALYSIS") == 25
+    # Evenly spread, never two joint frames in a row at this ratio
+    assert all(not (a == b == "JOINT_ANALYSIS") for a, b in zip(kinds, kinds[1:]))
+    assert set(frame_kind(i, 0.0) for i in range(10)) == {"POSTURE_SYNC"}
+    assert set(frame_kind(i, 1.0) for i in range(10)) == {"JOINT_ANALYSIS"}
+
+def test_synthetic_motion_moves_the_arm():
+    frames = synthetic_motion(120, fps=30)
+    assert frames.shape == (120, 33, 4)
+    wrist_height = frames[:, 15, 1]
+    # The wrist rises well above its resting height during the cycle
+    assert wrist_height.max() - wrist_height.min() > 0.2
+
+def test_aggregate_counts_lost_and_late():
+    a, b = ClientStats(0), ClientStats(1)
+    a.sent, a.results, a.dropped, a.late = 10, 7, 2, 1
+    a.latencies_ms = [1.0] * 6 + [200.0]
+    b.sent, b.results = 5, 5
+    b.latencies_ms = [2.0] * 5
+    for s in (a, b):
+        s.started_at, s.finished_at = 0.0, 1.0
+    report = aggregate([a, b])
+    assert report["lost"] == 1
+    assert report["late"] == 1
+    assert report["throughput"] == pytest.approx(12.0)
+    assert report["max_ms"] == 200.0
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_load_run_against_live_server():
+    pytest.importorskip("websockets")
+    uvicorn = pytest.importorskip("uvicorn")
+    from main import app
+    from benchmarks.ws_load import run_load
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    try:
+        args = parse_args(["--url", f"ws://127.0.0.1:{port}/ws/analyze", "--clients", "3",
+                           "--fps", "20", "--duration", "0.5", "--late-ms", "1000"])
+        report = asyncio.run(run_load(args))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+    assert report["sent"] == 30
+    assert report["results"] + report["dropped"] == 30
+    assert report["lost"] == 0
+    assert report["p95_ms"] is not None
@@ -0,0 +1,71 @@
+"""Runs posture/joint analysis jobs off the asyncio event loop.
+
+Each WebSocket connection awaits its job before submitting the next one, so
+results stay in order per connection while different connections run in
+parallel. A global queue-depth limit bounds the work accepted at once; jobs
+beyond it are rejected with ``AnalysisOverloaded`` instead of piling up.
+
+Configured through environment variables:
+
+* ``VISION3_ANALYSIS_EXECUTOR``: ``thread`` (default), ``process`` or
+  ``inline`` (run on the event loop, the legacy behaviour)
+* ``VISION3_ANALYSIS_WORKERS``: pool size (default: executor's own default)
+* ``VISION3_ANALYSIS_QUEUE_DEPTH``: max jobs queued or running (default 64)
+"""
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+EXECUTOR_MODES = ["inline", "thread", "process"]
+
+
+class AnalysisOverloaded(RuntimeError):
+    """Raised when the executor's queue-depth limit is reached."""
+
+
+class AnalysisExecutor:
+    def __init__(self, mode: str = "thread", max_workers: Optional[int] = None, max_queue_depth: int = 64):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.pending = 0
+        self._pool: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls) -> "AnalysisExecutor":
+        workers = os.environ.get("VISION3_ANALYSIS_WORKERS")
+        return cls(
+            mode=os.environ.get("VISION3_ANALYSIS_EXECUTOR", "thread"),
+            max_workers=int(workers) if workers else None,
+            max_queue_depth=int(os.environ.get("VISION3_ANALYSIS_QUEUE_DEPTH", "64")),
+        )
+
+    def _get_pool(self) -> Executor:
+        # Created lazily so importing the app never forks worker processes
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analysis")
+        return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` in the pool; args must be picklable in process mode."""
+        if self.mode == "inline":
+            return fn(*args)
+        if self.pending >= self.max_queue_depth:
+            raise AnalysisOverloaded(f"Analysis queue full ({self.pending} jobs)")
+        # pending is only touched from the event loop thread, so no lock is needed
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_pool(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
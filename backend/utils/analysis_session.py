@@ -0,0 +1,659 @@
+"""Per-connection state and message handling for ``/ws/analyze``."""
+import asyncio
+import json
+import math
+import os
+import re
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from models import (
+    AnalysisRequest, AnalysisResponse, JointAnalysisRequest, JointAnalysisResponse,
+    JointMeasurementRequest
+)
+from .posture_analysis import AnnotationCache, analyze_posture
+from .joint_analysis import calculate_joint_angle
+from .batch_joint_analysis import MeasurementPlan, measurement_spec
+from .analysis_executor import AnalysisExecutor, AnalysisOverloaded
+from .rom_tracker import RomTracker
+from .landmark_filter import LandmarkSmoother
+from .session_recorder import DEFAULT_CHUNK_FRAMES, MAX_CHUNK_FRAMES, SessionRecorder, recording_root
+from .change_suppression import (
+    DEFAULT_ANGLE_EPSILON, DEFAULT_HEARTBEAT_MS, DEFAULT_METRIC_EPSILON, ChangeSuppressor
+)
+from .fast_codec import (
+    STRICT_VALIDATION, dumps, encode_analysis_result, encode_joint_result, loads, model_fields,
+    timestamp_ms
+)
+from .qos_governor import LatencyWindow
+from .metrics import REGISTRY
+from .frame_codec import (
+    FRAME_ERRORS, LandmarkFrame, MESSAGE_TYPES, PROTOCOL_VERSION, decode_frame, frame_from_message,
+    landmarks_to_array
+)
+
+SUPPORTED_ENCODINGS = ["json", "binary"]
+FRAME_TYPES = ("POSTURE_SYNC", "JOINT_ANALYSIS")
+CONTROL_TYPES = (
+    "NEGOTIATE", "REGISTER_MEASUREMENTS", "SUBSCRIBE_ROM", "RESET_ROM", "UNSUBSCRIBE_ROM",
+    "CONFIGURE_SMOOTHING", "CONFIGURE_SUPPRESSION", "CONFIGURE_ANNOTATIONS",
+    "START_RECORDING", "STOP_RECORDING",
+)
+
+# Recording ids become directory names
+RECORDING_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+# Distinct inline measurement lists kept compiled, per process
+INLINE_PLAN_CACHE_SIZE = 64
+
+STEP_SECONDS = REGISTRY.histogram(
+    "vision3_ws_step_seconds",
+    "Time per /ws/analyze message spent in each handling step "
+    "(parse, validate, queue, analyze, serialize, send).",
+    ["step"]
+)
+DROPPED_FRAMES = REGISTRY.counter(
+    "vision3_ws_dropped_frames_total",
+    "Frames dropped by coalescing or executor overload, by type.",
+    ["type"]
+)
+
+
+@lru_cache(maxsize=INLINE_PLAN_CACHE_SIZE)
+def _compiled_plan(specs: Tuple[Tuple[str, str, str, Optional[str]], ...]) -> MeasurementPlan:
+    return MeasurementPlan(specs)
+
+
+def inline_plan(measurements: List[Any]) -> MeasurementPlan:
+    """Plan for the ``measurements`` a JSON frame carries, compiled once per distinct list.
+
+    Clients sending the legacy format repeat the same list with every
+    frame, so it is looked up by value instead of compiled per message.
+    """
+    return _compiled_plan(tuple(measurement_spec(m) for m in measurements))
+
+
+def non_negative(message: Dict[str, Any], key: str, default: float, allow_zero: bool = True) -> float:
+    """``message[key]`` as a finite number >= 0 (> 0 unless ``allow_zero``); raises ValueError otherwise."""
+    value = message.get(key, default)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a number, got {value!r}")
+    if not math.isfinite(number) or number < 0 or (number == 0 and not allow_zero):
+        bound = ">= 0" if allow_zero else "> 0"
+        raise ValueError(f"{key} must be a finite number {bound}, got {value!r}")
+    return number
+
+
+class FrameResult(NamedTuple):
+    """Serialized result of one analyzed frame.
+
+    ``results`` holds the (id, angle) pairs of a JOINT_RESULT, ``metrics``
+    and ``issues`` (id, severity) the content of an ANALYSIS_RESULT, so the
+    session can track ROM and suppress unchanged results without parsing
+    ``body`` again. In annotation diff mode, ``annotation_cache`` is the
+    cache after this frame (a copy when analyzed in a worker process).
+    ``timings`` are the seconds the worker spent validating, analyzing and
+    serializing the frame; None where a step was not timed separately.
+    """
+    type: str
+    body: str
+    timestamp: int
+    results: Optional[List[Tuple[str, Optional[float]]]] = None
+    metrics: Optional[Dict[str, Any]] = None
+    issues: Optional[List[Tuple[str, str]]] = None
+    annotations_changed: bool = False
+    annotation_cache: Optional[AnnotationCache] = None
+    timings: Optional[Tuple[Optional[float], Optional[float], Optional[float]]] = None
+
+
+def posture_response(
+    view: str,
+    landmarks: Any,
+    width: int,
+    height: int,
+    annotation_cache: Optional[AnnotationCache] = None
+) -> AnalysisResponse:
+    result = analyze_posture(
+        view=view,
+        landmarks=landmarks,
+        width=width,
+        height=height,
+        annotation_cache=annotation_cache
+    )
+    if annotation_cache is None:
+        return AnalysisResponse(
+            metrics=result["metrics"],
+            issues=result["issues"]
+        )
+    changed, removed = annotation_cache.diff(result["annotations"])
+    return AnalysisResponse(
+        metrics=result["metrics"],
+        issues=result["issues"],
+        annotations=changed,
+        removedAnnotations=removed
+    )
+
+
+def json_joint_response(message: Dict[str, Any], plan: MeasurementPlan) -> JointAnalysisResponse:
+    # Validate and parse using Pydantic
+    request = JointAnalysisRequest(**message)
+
+    if request.measurements is None:
+        # Session-registered measurements: evaluate the compiled plan
+        world = landmarks_to_array(request.worldLandmarks, np.float64) if request.worldLandmarks else None
+        landmarks = landmarks_to_array(request.landmarks, np.float64)
+        pairs = plan.evaluate_frame(landmarks, request.width, request.height, world)
+        return JointAnalysisResponse(results=[{"id": m_id, "angle": angle} for m_id, angle in pairs])
+
+    results = []
+    # Pre-convert landmarks to dict once for performance
+    landmarks_dict = [lm.dict() for lm in request.landmarks]
+    world_landmarks_dict = [lm.dict() for lm in request.worldLandmarks] if request.worldLandmarks else None
+
+    for m in request.measurements:
+        angle = calculate_joint_angle(
+            joint_type=m.jointType,
+            direction=m.direction,
+            landmarks=landmarks_dict,
+            width=request.width,
+            height=request.height,
+            side=m.side,
+            world_landmarks=world_landmarks_dict
+        )
+        results.append({"id": m.id, "angle": angle})
+
+    return JointAnalysisResponse(results=results)
+
+
+def strict_process_frame(
+    kind: str,
+    payload: Any,
+    plan: MeasurementPlan,
+    annotation_cache: Optional[AnnotationCache] = None
+) -> Optional[FrameResult]:
+    """Debug path: full Pydantic validation of requests and responses."""
+    if isinstance(payload, LandmarkFrame):
+        if payload.type == "POSTURE_SYNC":
+            response = posture_response(payload.view, payload.landmarks, payload.width, payload.height,
+                                        annotation_cache)
+        else:
+            pairs = plan.evaluate_frame(payload.landmarks, payload.width, payload.height, payload.world_landmarks)
+            response = JointAnalysisResponse(results=[{"id": m_id, "angle": angle} for m_id, angle in pairs])
+    elif kind == "POSTURE_SYNC":
+        request = AnalysisRequest(**payload)
+        response = posture_response(request.view, request.landmarks, request.width, request.height,
+                                    annotation_cache)
+    else:
+        try:
+            response = json_joint_response(payload, plan)
+        except Exception as e:
+            print(f"Error processing JOINT_ANALYSIS: {e}")
+            return None
+
+    if isinstance(response, JointAnalysisResponse):
+        pairs = [(r.id, r.angle) for r in response.results]
+        return FrameResult(response.type, response.json(), response.timestamp, pairs)
+    issues = [(issue.id, issue.severity) for issue in response.issues]
+    return FrameResult(response.type, response.json(), response.timestamp,
+                       metrics=model_fields(response.metrics), issues=issues,
+                       annotations_changed=bool(response.annotations or response.removedAnnotations),
+                       annotation_cache=annotation_cache)
+
+
+def process_frame(
+    kind: str,
+    payload: Any,
+    plan: MeasurementPlan,
+    strict: bool = False,
+    annotation_cache: Optional[AnnotationCache] = None
+) -> Optional[FrameResult]:
+    """Analyze one frame and return its serialized result, if any.
+
+    Module-level and free of session state so it can run in a worker
+    thread or process. Unless ``strict`` is set, JSON frames skip Pydantic:
+    they are converted straight to landmark arrays, models are built
+    without validation and the response is encoded by ``fast_codec``.
+    With an ``annotation_cache``, posture results carry annotation diffs.
+    """
+    started = time.perf_counter()
+    if isinstance(payload, (bytes, bytearray)):
+        try:
+            payload = decode_frame(payload)
+        except ValueError as e:
+            print(f"Error processing binary frame: {e}")
+            return None
+
+    if strict:
+        try:
+            result = strict_process_frame(kind, payload, plan, annotation_cache)
+            if result is not None:
+                # Validation is interleaved with the analysis here
+                result = result._replace(timings=(None, time.perf_counter() - started, None))
+            return result
+        except ValueError as e:
+            if isinstance(payload, LandmarkFrame):
+                print(f"Error processing landmark frame: {e}")
+                return None
+            raise
+
+    try:
+        if isinstance(payload, dict):
+            if payload.get("measurements") is not None:
+                plan = inline_plan(payload["measurements"])
+            payload = frame_from_message(payload)
+
+        validated = time.perf_counter()
+        timestamp = timestamp_ms()
+        if payload.type == "POSTURE_SYNC":
+            result = analyze_posture(payload.view, payload.landmarks, payload.width, payload.height,
+                                     annotation_cache=annotation_cache)
+            changed, removed = annotation_cache.diff(result["annotations"]) if annotation_cache else ([], None)
+            analyzed = time.perf_counter()
+            body = encode_analysis_result(result["metrics"], result["issues"], timestamp, changed, removed)
+            return FrameResult("ANALYSIS_RESULT", body, timestamp,
+                               metrics=model_fields(result["metrics"]),
+                               issues=[(issue.id, issue.severity) for issue in result["issues"]],
+                               annotations_changed=bool(changed or removed),
+                               annotation_cache=annotation_cache,
+                               timings=(validated - started, analyzed - validated, time.perf_counter() - analyzed))
+        pairs = plan.evaluate_frame(payload.landmarks, payload.width, payload.height, payload.world_landmarks)
+        analyzed = time.perf_counter()
+        body = encode_joint_result(pairs, timestamp)
+        return FrameResult("JOINT_RESULT", body, timestamp, pairs,
+                           timings=(validated - started, analyzed - validated, time.perf_counter() - analyzed))
+    except FRAME_ERRORS as e:
+        print(f"Error processing {kind} frame: {e}")
+        return None
+
+
+class DecodedFrame(NamedTuple):
+    """A frame decoded on arrival (to record it), with the plan for inline measurements."""
+    frame: LandmarkFrame
+    plan: Optional[MeasurementPlan]
+    seconds: float
+
+
+class LatestFrameSlots:
+    """Holds only the newest pending frame of each type (latest frame wins)."""
+
+    def __init__(self):
+        self._pending: Dict[str, Any] = {}
+        self._ready = asyncio.Event()
+        self.dropped: Dict[str, int] = {kind: 0 for kind in FRAME_TYPES}
+        self._reported: Dict[str, int] = dict(self.dropped)
+
+    def put(self, kind: str, payload: Any) -> None:
+        if kind in self._pending:
+            self.dropped[kind] += 1
+            DROPPED_FRAMES.inc(1, kind)
+        self._pending[kind] = payload
+        self._ready.set()
+
+    async def take(self) -> List[Tuple[str, Any]]:
+        await self._ready.wait()
+        self._ready.clear()
+        items = list(self._pending.items())
+        self._pending.clear()
+        return items
+
+    def drop_report(self) -> Optional[str]:
+        """FRAME_STATS message if frames were dropped since the last report."""
+        new_drops = {kind: self.dropped[kind] - self._reported[kind] for kind in FRAME_TYPES}
+        if not any(new_drops.values()):
+            return None
+        self._reported = dict(self.dropped)
+        return dumps({
+            "type": "FRAME_STATS",
+            "dropped": new_drops,
+            "totalDropped": dict(self.dropped)
+        })
+
+
+class AnalysisSession:
+    """Protocol state negotiated by one ``/ws/analyze`` client."""
+
+    def __init__(self, executor: AnalysisExecutor, latency: Optional[LatencyWindow] = None):
+        self.executor = executor
+        # Shared record of JOINT_ANALYSIS latencies, watched by the QoS governor
+        self.latency = latency
+        self.encoding = "json"
+        self.coalesce = False
+        self.strict = STRICT_VALIDATION
+        self.plan = MeasurementPlan([])
+        self.slots = LatestFrameSlots()
+        # Server-side ROM summaries, enabled by SUBSCRIBE_ROM
+        self.rom: Optional[RomTracker] = None
+        self.per_frame_results = True
+        # Landmark smoothing, enabled by CONFIGURE_SMOOTHING
+        self.smoother: Optional[LandmarkSmoother] = None
+        self.world_smoother: Optional[LandmarkSmoother] = None
+        # Dead-band suppression of unchanged results, enabled by CONFIGURE_SUPPRESSION
+        self.suppressor: Optional[ChangeSuppressor] = None
+        # Annotation diffs in ANALYSIS_RESULT, enabled by CONFIGURE_ANNOTATIONS
+        self.annotation_cache: Optional[AnnotationCache] = None
+        # Landmark recording, enabled by START_RECORDING
+        self.recorder: Optional[SessionRecorder] = None
+        self.recording_id: Optional[str] = None
+
+    def classify(self, raw: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+        """Return (message type, payload) for a raw ASGI receive message.
+
+        Frames are only peeked at here; validation and decoding happen in
+        ``process`` so frames dropped by coalescing cost nothing (unless
+        they are recorded, see ``receive_frame``).
+        """
+        data = raw.get("bytes")
+        if data is not None:
+            if self.encoding != "binary":
+                print("Binary frame received before binary encoding was negotiated")
+                return None, None
+            if len(data) < 2 or data[1] not in MESSAGE_TYPES:
+                print("Error processing binary frame: unknown message type")
+                return None, None
+            return MESSAGE_TYPES[data[1]], data
+
+        started = time.perf_counter()
+        message = loads(raw["text"])
+        STEP_SECONDS.observe(time.perf_counter() - started, "parse")
+        return message.get("type"), message
+
+    def handle_control(self, kind: str, message: Dict[str, Any]) -> str:
+        """Apply a control message (see ``CONTROL_TYPES``) and return the reply."""
+        if kind == "REGISTER_MEASUREMENTS":
+            error = self.register_measurements(message.get("measurements", []))
+            if error is not None:
+                return json.dumps({"type": "MEASUREMENTS_REGISTERED", "count": len(self.plan), "error": error})
+            return json.dumps({"type": "MEASUREMENTS_REGISTERED", "count": len(self.plan)})
+
+        if kind == "SUBSCRIBE_ROM":
+            try:
+                rom = RomTracker(
+                    hold_ms=non_negative(message, "holdMs", 0),
+                    interval_ms=non_negative(message, "intervalMs", 500)
+                )
+            except ValueError as e:
+                return json.dumps({"type": "ROM_SUBSCRIBED", "error": str(e)})
+            self.rom = rom
+            self.per_frame_results = bool(message.get("perFrameResults", True))
+            return json.dumps({
+                "type": "ROM_SUBSCRIBED",
+                "holdMs": self.rom.hold_ms,
+                "intervalMs": self.rom.interval_ms,
+                "perFrameResults": self.per_frame_results
+            })
+
+        if kind == "RESET_ROM":
+            if self.rom is not None:
+                self.rom.reset()
+            return json.dumps({"type": "ROM_RESET"})
+
+        if kind == "UNSUBSCRIBE_ROM":
+            self.rom = None
+            self.per_frame_results = True
+            return json.dumps({"type": "ROM_UNSUBSCRIBED"})
+
+        if kind == "CONFIGURE_SMOOTHING":
+            return self.configure_smoothing(message)
+
+        if kind == "CONFIGURE_SUPPRESSION":
+            return self.configure_suppression(message)
+
+        if kind == "START_RECORDING":
+            return self.start_recording(message)
+
+        if kind == "STOP_RECORDING":
+            frames = self.stop_recording()
+            return json.dumps({"type": "RECORDING_STOPPED", "frames": frames})
+
+        if kind == "CONFIGURE_ANNOTATIONS":
+            enabled = bool(message.get("enabled", True))
+            try:
+                tolerance_px = non_negative(message, "tolerancePx", 2.0) if enabled else None
+            except ValueError as e:
+                return json.dumps({"type": "ANNOTATIONS_CONFIGURED", "error": str(e)})
+            # A fresh cache makes the next result carry the full annotation set
+            self.annotation_cache = AnnotationCache(tolerance_px) if enabled else None
+            return json.dumps({"type": "ANNOTATIONS_CONFIGURED", "enabled": enabled})
+
+        requested = message.get("encoding", "json")
+        self.encoding = requested if requested in SUPPORTED_ENCODINGS else "json"
+        self.coalesce = bool(message.get("coalesce", False))
+        self.strict = bool(message.get("strict", STRICT_VALIDATION))
+        reply = {
+            "type": "NEGOTIATED",
+            "encoding": self.encoding,
+            "coalesce": self.coalesce,
+            "strict": self.strict,
+            "version": PROTOCOL_VERSION
+        }
+        if "measurements" in message:
+            error = self.register_measurements(message["measurements"])
+            if error is not None:
+                reply["error"] = error
+        return json.dumps(reply)
+
+    def register_measurements(self, measurements: List[Dict[str, Any]]) -> Optional[str]:
+        """Replace the session plan; returns the error and keeps the old plan if one is invalid."""
+        try:
+            # Compiled once here instead of re-dispatching every measurement per frame
+            self.plan = MeasurementPlan([JointMeasurementRequest(**m) for m in measurements])
+        except (TypeError, ValueError) as e:
+            # Pydantic's ValidationError is a ValueError; a non-dict entry raises TypeError
+            return str(e)
+        return None
+
+    def configure_smoothing(self, message: Dict[str, Any]) -> str:
+        enabled = bool(message.get("enabled", True))
+        try:
+            params = {
+                # Zero cutoffs would divide by zero in the filter
+                "min_cutoff": non_negative(message, "minCutoff", 1.0, allow_zero=False),
+                "beta": non_negative(message, "beta", 0.3),
+                "d_cutoff": non_negative(message, "dCutoff", 1.0, allow_zero=False),
+                "min_visibility": non_negative(message, "minVisibility", 0.5),
+                "predict_ms": non_negative(message, "predictMs", 0.0),
+            } if enabled else {}
+        except ValueError as e:
+            return json.dumps({"type": "SMOOTHING_CONFIGURED", "error": str(e)})
+        self.smoother = LandmarkSmoother(**params) if enabled else None
+        self.world_smoother = LandmarkSmoother(**params) if enabled else None
+        return json.dumps({"type": "SMOOTHING_CONFIGURED", "enabled": enabled})
+
+    def configure_suppression(self, message: Dict[str, Any]) -> str:
+        enabled = bool(message.get("enabled", True))
+        try:
+            epsilons = message.get("epsilons", {})
+            if not isinstance(epsilons, dict):
+                raise ValueError(f"epsilons must be an object, got {epsilons!r}")
+            suppressor = ChangeSuppressor(
+                metric_epsilon=non_negative(message, "metricEpsilon", DEFAULT_METRIC_EPSILON),
+                angle_epsilon=non_negative(message, "angleEpsilon", DEFAULT_ANGLE_EPSILON),
+                epsilons={key: non_negative(epsilons, key, 0.0) for key in epsilons},
+                heartbeat_ms=non_negative(message, "heartbeatMs", DEFAULT_HEARTBEAT_MS)
+            ) if enabled else None
+        except ValueError as e:
+            return json.dumps({"type": "SUPPRESSION_CONFIGURED", "error": str(e)})
+        self.suppressor = suppressor
+        return json.dumps({"type": "SUPPRESSION_CONFIGURED", "enabled": enabled})
+
+    def start_recording(self, message: Dict[str, Any]) -> str:
+        root = recording_root()
+        if root is None:
+            return json.dumps({"type": "RECORDING_STARTED", "recording": False,
+                               "error": "Recording is disabled on this server"})
+        session_id = str(message.get("sessionId") or uuid.uuid4().hex)
+        if not RECORDING_ID_PATTERN.fullmatch(session_id):
+            return json.dumps({"type": "RECORDING_STARTED", "recording": False,
+                               "error": "Invalid sessionId"})
+        chunk_frames = message.get("chunkFrames", DEFAULT_CHUNK_FRAMES)
+        # Checked before the running recording is stopped, which a bad request keeps
+        if (isinstance(chunk_frames, bool) or not isinstance(chunk_frames, int)
+                or not 1 <= chunk_frames <= MAX_CHUNK_FRAMES):
+            return json.dumps({"type": "RECORDING_STARTED", "recording": False,
+                               "error": f"chunkFrames must be an integer from 1 to {MAX_CHUNK_FRAMES}"})
+        self.stop_recording()
+        try:
+            self.recorder = SessionRecorder(
+                os.path.join(root, session_id),
+                chunk_frames=chunk_frames,
+                quantize=bool(message.get("quantize", True))
+            )
+        except (OSError, ValueError) as e:
+            return json.dumps({"type": "RECORDING_STARTED", "recording": False, "error": str(e)})
+        self.recording_id = session_id
+        return json.dumps({"type": "RECORDING_STARTED", "recording": True, "sessionId": session_id})
+
+    def stop_recording(self) -> int:
+        """Close the recording, if any, and return its frame count."""
+        if self.recorder is None:
+            return 0
+        self.recorder.close()
+        frames = self.recorder.frames
+        self.recorder = None
+        self.recording_id = None
+        return frames
+
+    def close(self) -> None:
+        """Release per-connection resources when the socket goes away."""
+        self.stop_recording()
+
+    def emit(self, result: FrameResult) -> Optional[str]:
+        """The message to send for a result, after dead-band suppression."""
+        if self.suppressor is None:
+            return result.body
+        return self.suppressor.filter(result)
+
+    def decode(self, payload: Any) -> Tuple[LandmarkFrame, Optional[MeasurementPlan]]:
+        """Decode a frame on the event loop, for the stateful stages below.
+
+        Returns the frame and, for JSON messages carrying their own
+        measurements, a plan for them.
+        """
+        plan = None
+        if isinstance(payload, dict):
+            if payload.get("measurements") is not None:
+                plan = inline_plan(payload["measurements"])
+            return frame_from_message(payload), plan
+        return decode_frame(payload), plan
+
+    def receive_frame(self, kind: str, payload: Any) -> Any:
+        """Take a frame as it arrives, before coalescing; returns what to analyze, or None.
+
+        While recording, every frame is decoded and recorded here with its
+        receipt time, including frames that coalescing drops later. The
+        decoded frame is passed on so it is not decoded twice.
+        """
+        if self.recorder is None:
+            return payload
+        started = time.perf_counter()
+        try:
+            frame, plan = self.decode(payload)
+        except FRAME_ERRORS as e:
+            print(f"Error decoding {kind} frame: {e}")
+            return None
+        decoded = DecodedFrame(frame, plan, time.perf_counter() - started)
+        # Raw landmarks, before smoothing, for audit and re-analysis
+        try:
+            self.recorder.append(frame, timestamp_ms())
+        except (OSError, ValueError) as e:
+            print(f"Error recording {kind} frame: {e}")
+        return decoded
+
+    def smooth(self, frame: LandmarkFrame) -> LandmarkFrame:
+        """Run a frame through the session's smoothing filters.
+
+        Runs on the event loop because the filter state is per session; it
+        is a few vectorized operations per frame.
+        """
+        now = time.monotonic()
+        landmarks = self.smoother(frame.landmarks, now)
+        world = frame.world_landmarks
+        if world is not None:
+            world = self.world_smoother(world, now)
+        return frame._replace(landmarks=landmarks, world_landmarks=world)
+
+    async def process(self, kind: str, payload: Any) -> Optional[FrameResult]:
+        """Run one frame through the executor; overload counts as a dropped frame."""
+        plan = self.plan
+        decoding = 0.0
+        if isinstance(payload, DecodedFrame):
+            payload, frame_plan, decoding = payload
+        elif self.smoother is not None:
+            started = time.perf_counter()
+            try:
+                payload, frame_plan = self.decode(payload)
+            except FRAME_ERRORS as e:
+                print(f"Error decoding {kind} frame: {e}")
+                return None
+            decoding = time.perf_counter() - started
+        else:
+            frame_plan = None
+        if frame_plan is not None:
+            plan = frame_plan
+        if self.smoother is not None:
+            payload = self.smooth(payload)
+        cache = self.annotation_cache if kind == "POSTURE_SYNC" else None
+        dispatched = time.perf_counter()
+        try:
+            result = await self.executor.run(process_frame, kind, payload, plan, self.strict, cache)
+        except AnalysisOverloaded:
+            self.slots.dropped[kind] += 1
+            DROPPED_FRAMES.inc(1, kind)
+            return None
+        if result is not None and result.timings is not None:
+            self.observe_timings(result.timings, time.perf_counter() - dispatched, decoding)
+        if cache is not None and result is not None and self.annotation_cache is cache:
+            # Process workers mutate a copy; keep theirs (a no-op for threads)
+            self.annotation_cache = result.annotation_cache
+        return result
+
+    @staticmethod
+    def observe_timings(timings: Tuple[Optional[float], ...], round_trip: float, decoding: float) -> None:
+        """Record a frame's worker timings; the rest of the round trip was queueing."""
+        validate, analyze, serialize = timings
+        if decoding or validate is not None:
+            # Frames decoded here for smoothing or recording arrive at the worker validated
+            STEP_SECONDS.observe(decoding + (validate or 0.0), "validate")
+        for step, seconds in (("analyze", analyze), ("serialize", serialize)):
+            if seconds is not None:
+                STEP_SECONDS.observe(seconds, step)
+        worked = sum(seconds for seconds in timings if seconds is not None)
+        STEP_SECONDS.observe(max(0.0, round_trip - worked), "queue")
+
+    async def handle_frame(self, kind: str, payload: Any) -> List[str]:
+        """Process one frame and return every message to send for it, in order."""
+        started = time.perf_counter()
+        result = await self.process(kind, payload)
+        messages = []
+        if result is not None:
+            if self.latency is not None and kind == "JOINT_ANALYSIS":
+                self.latency.record((time.perf_counter() - started) * 1000)
+            tracked = self.rom is not None and result.results is not None
+            if tracked:
+                self.rom.update(result.results, result.timestamp)
+            if not tracked or self.per_frame_results:
+                body = self.emit(result)
+                if body is not None:
+                    messages.append(body)
+            if tracked and self.rom.due(result.timestamp):
+                messages.append(dumps({
+                    "type": "ROM_SUMMARY",
+                    "summaries": self.rom.summaries(result.timestamp),
+                    "timestamp": result.timestamp
+                }))
+        report = self.slots.drop_report()
+        if report is not None:
+            messages.append(report)
+        return messages
+
+    async def analyze_latest(self, send: Callable[[str], Awaitable[None]]) -> None:
+        """Analyzer loop for coalescing mode: always work on the newest frames."""
+        while True:
+            for kind, payload in await self.slots.take():
+                for message in await self.handle_frame(kind, payload):
+                    await send(message)
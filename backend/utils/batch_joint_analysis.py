@@ -0,0 +1,682 @@
+"""Vectorized joint-angle engine operating on whole blocks of frames.
+
+Landmarks are passed as a ``(frames, 33, C)`` NumPy array (``C >= 2``;
+columns are x, y, z, visibility in MediaPipe's normalized coordinates).
+Every formula mirrors its scalar counterpart in ``joint_analysis`` exactly,
+which remains the reference implementation for equivalence tests.
+
+A single live frame is too small for NumPy to pay off, so
+``MeasurementPlan.evaluate_frame`` runs the same formulas on plain floats
+through ``FramePoints`` (the per-frame twin of ``LandmarkBlock``).
+"""
+import math
+from functools import cached_property, lru_cache, partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .joint_analysis import LANDMARKS
+
+NUM_LANDMARKS = 33
+
+_VERTICAL = np.array([0.0, -1.0])
+
+
+def _dot(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum('...i,...i->...', a, b)
+
+
+def _normalize(v: np.ndarray) -> np.ndarray:
+    """Row-wise normalization; zero-length rows stay zero (as normalize_3d)."""
+    mag = np.linalg.norm(v, axis=-1, keepdims=True)
+    return np.divide(v, mag, out=np.zeros_like(v), where=mag != 0)
+
+
+def signed_angle_between_vectors_2d(v1: np.ndarray, v2: np.ndarray) -> np.ndarray:
+    """Signed angle from v1 to v2 in degrees, wrapped to [-180, 180]."""
+    diff = np.arctan2(v2[..., 1], v2[..., 0]) - np.arctan2(v1[..., 1], v1[..., 0])
+    diff = np.where(diff > np.pi, diff - 2 * np.pi, diff)
+    diff = np.where(diff < -np.pi, diff + 2 * np.pi, diff)
+    return np.degrees(diff)
+
+
+def angle_between_vectors_2d(v1: np.ndarray, v2: np.ndarray) -> np.ndarray:
+    """Absolute angle between two 2D vectors in degrees (0 for zero vectors)."""
+    mags = np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1)
+    cos_angle = np.divide(_dot(v1, v2), mags, out=np.ones_like(mags), where=mags != 0)
+    return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
+
+
+def _wrap_degrees(angle: np.ndarray) -> np.ndarray:
+    """Wrap degrees to (-180, 180] the way the scalar cervical path does."""
+    angle = np.where(angle <= -180, angle + 360, angle)
+    return np.where(angle > 180, angle - 360, angle)
+
+
+def _reject(v: np.ndarray, axis: np.ndarray) -> np.ndarray:
+    """Remove the component of v along the (unit) axis."""
+    return v - _dot(v, axis)[..., None] * axis
+
+
+class LandmarkBlock:
+    """Pixel-space view of a landmark block with lazily cached shared geometry.
+
+    Midpoints and the 3D torso frame are computed at most once per block, no
+    matter how many measurements read them.
+    """
+
+    def __init__(
+        self,
+        landmarks: np.ndarray,
+        width: int,
+        height: int,
+        world_landmarks: Optional[np.ndarray] = None
+    ):
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        if landmarks.ndim != 3 or landmarks.shape[1] != NUM_LANDMARKS or landmarks.shape[2] < 2:
+            raise ValueError(f"Expected landmarks of shape (frames, {NUM_LANDMARKS}, C>=2), got {landmarks.shape}")
+        if world_landmarks is not None:
+            world_landmarks = np.asarray(world_landmarks, dtype=np.float64)
+            if world_landmarks.size == 0:
+                world_landmarks = None
+            elif world_landmarks.shape[:2] != landmarks.shape[:2] or world_landmarks.shape[2] < 3:
+                raise ValueError(f"world_landmarks shape {world_landmarks.shape} does not match landmarks {landmarks.shape}")
+
+        self.landmarks = landmarks
+        self.world_landmarks = world_landmarks
+        self.width = width
+        self.height = height
+        self.pixels = landmarks[..., :2] * np.array([width, height], dtype=np.float64)
+
+    @property
+    def frames(self) -> int:
+        return self.landmarks.shape[0]
+
+    def point(self, index: int) -> np.ndarray:
+        return self.pixels[:, index]
+
+    @cached_property
+    def shoulder_mid(self) -> np.ndarray:
+        return (self.point(LANDMARKS['LEFT_SHOULDER']) + self.point(LANDMARKS['RIGHT_SHOULDER'])) / 2
+
+    @cached_property
+    def hip_mid(self) -> np.ndarray:
+        return (self.point(LANDMARKS['LEFT_HIP']) + self.point(LANDMARKS['RIGHT_HIP'])) / 2
+
+    @cached_property
+    def ear_mid(self) -> np.ndarray:
+        return (self.point(LANDMARKS['LEFT_EAR']) + self.point(LANDMARKS['RIGHT_EAR'])) / 2
+
+    @cached_property
+    def torso_vector(self) -> np.ndarray:
+        """Hip midpoint -> shoulder midpoint, in pixels."""
+        return self.shoulder_mid - self.hip_mid
+
+    @cached_property
+    def neck_angle_2d(self) -> np.ndarray:
+        """Head-vs-torso angle used by the 2D cervical flexion paths."""
+        v_head = self.ear_mid - self.shoulder_mid
+        v_torso = self.torso_vector
+        angle = np.degrees(np.arctan2(v_head[:, 1], v_head[:, 0]) - np.arctan2(v_torso[:, 1], v_torso[:, 0]))
+        return _wrap_degrees(angle)
+
+    @cached_property
+    def torso_frame_3d(self) -> Dict[str, np.ndarray]:
+        """Orthonormal torso frame and neck/ear vectors from world landmarks."""
+        w = self.world_landmarks[..., :3]
+        ear_mid = (w[:, LANDMARKS['LEFT_EAR']] + w[:, LANDMARKS['RIGHT_EAR']]) / 2
+        shoulder_mid = (w[:, LANDMARKS['LEFT_SHOULDER']] + w[:, LANDMARKS['RIGHT_SHOULDER']]) / 2
+        hip_mid = (w[:, LANDMARKS['LEFT_HIP']] + w[:, LANDMARKS['RIGHT_HIP']]) / 2
+
+        up = _normalize(shoulder_mid - hip_mid)
+        right = _normalize(w[:, LANDMARKS['RIGHT_SHOULDER']] - w[:, LANDMARKS['LEFT_SHOULDER']])
+        forward = np.cross(right, up)
+        right_ortho = _normalize(np.cross(up, forward))
+        return {
+            "up": up,
+            "forward": forward,
+            "right": right_ortho,
+            "neck": ear_mid - shoulder_mid,
+            "ear_line": w[:, LANDMARKS['RIGHT_EAR']] - w[:, LANDMARKS['LEFT_EAR']],
+        }
+
+
+@lru_cache(maxsize=None)
+def _side_index(name: str, side: str) -> int:
+    return LANDMARKS[('LEFT_' if side == 'left' else 'RIGHT_') + name]
+
+
+def _zeros(block: LandmarkBlock) -> np.ndarray:
+    return np.zeros(block.frames)
+
+
+def _normalize_straight(angle: np.ndarray) -> np.ndarray:
+    """Map a signed inter-segment angle so that 0 means a straight limb."""
+    return np.where(angle > 0, 180 - angle, 180 + angle)
+
+
+def _cervical_rom(block: LandmarkBlock, direction: str, side: Optional[str]) -> np.ndarray:
+    if block.world_landmarks is not None:
+        frame = block.torso_frame_3d
+        if direction in ['flexion', 'extension']:
+            sag = _reject(frame["neck"], frame["right"])
+            angle = np.degrees(np.arctan2(_dot(sag, frame["forward"]), _dot(sag, frame["up"])))
+            return angle if direction == 'flexion' else -angle
+        elif direction in ['left-lateral-flexion', 'right-lateral-flexion']:
+            cor = _reject(frame["neck"], frame["forward"])
+            angle = np.degrees(np.arctan2(_dot(cor, frame["right"]), _dot(cor, frame["up"])))
+            return angle if direction == 'right-lateral-flexion' else -angle
+        elif direction in ['left-rotation', 'right-rotation']:
+            trans = _reject(frame["ear_line"], frame["up"])
+            angle = np.degrees(np.arctan2(_dot(trans, frame["forward"]), _dot(trans, frame["right"])))
+            return angle if direction == 'left-rotation' else -angle
+
+    if direction in ['flexion', 'extension']:
+        facing_left = block.point(LANDMARKS['NOSE'])[:, 0] < block.point(LANDMARKS['LEFT_EAR'])[:, 0]
+        angle = block.neck_angle_2d
+        return np.where(facing_left, -angle, angle)
+
+    elif direction in ['left-rotation', 'right-rotation']:
+        lms = block.landmarks
+        if lms.shape[2] < 3:
+            return _zeros(block)
+        n = lms[:, LANDMARKS['NOSE']]
+        le = lms[:, LANDMARKS['LEFT_EAR']]
+        re = lms[:, LANDMARKS['RIGHT_EAR']]
+        head_x = n[:, 0] - (le[:, 0] + re[:, 0]) / 2
+        head_z = n[:, 2] - (le[:, 2] + re[:, 2]) / 2
+        z_scale = 2.5
+        yaw = np.degrees(np.arctan2(head_x, -head_z * z_scale))
+        return -yaw if direction == 'left-rotation' else yaw
+
+    elif direction in ['left-lateral-flexion', 'right-lateral-flexion']:
+        return -block.neck_angle_2d
+
+    return _zeros(block)
+
+
+def _shoulder_rom(block: LandmarkBlock, direction: str, side: Optional[str]) -> np.ndarray:
+    if not side:
+        return _zeros(block)
+    shoulder = block.point(_side_index('SHOULDER', side))
+    elbow = block.point(_side_index('ELBOW', side))
+
+    if direction in ['flexion', 'extension', 'abduction', 'adduction']:
+        hip = block.point(_side_index('HIP', side))
+        angle = signed_angle_between_vectors_2d(hip - shoulder, elbow - shoulder)
+        if direction == 'flexion':
+            return np.where(angle > 0, np.abs(angle), 0.0)
+        elif direction == 'extension':
+            return np.where(angle < 0, np.abs(angle), 0.0)
+        if (side == 'left') == (direction == 'abduction'):
+            return np.maximum(0, angle)
+        return np.maximum(0, -angle)
+
+    elif direction in ['internal-rotation', 'external-rotation']:
+        wrist = block.point(_side_index('WRIST', side))
+        return np.abs(angle_between_vectors_2d(shoulder - elbow, wrist - elbow) - 90)
+    return _zeros(block)
+
+
+def _thoracolumbar_rom(block: LandmarkBlock, direction: str, side: Optional[str]) -> np.ndarray:
+    v_torso = block.torso_vector
+    if direction in ['flexion', 'extension']:
+        return angle_between_vectors_2d(_VERTICAL, v_torso)
+    elif direction in ['left-lateral-flexion', 'right-lateral-flexion']:
+        angle = signed_angle_between_vectors_2d(_VERTICAL, v_torso)
+        return np.maximum(0, angle) if direction == 'right-lateral-flexion' else np.maximum(0, -angle)
+    return _zeros(block)
+
+
+def _elbow_rom(block: LandmarkBlock, direction: str, side: Optional[str]) -> np.ndarray:
+    if not side:
+        return _zeros(block)
+    shoulder = block.point(_side_index('SHOULDER', side))
+    elbow = block.point(_side_index('ELBOW', side))
+    wrist = block.point(_side_index('WRIST', side))
+    angle = signed_angle_between_vectors_2d(shoulder - elbow, wrist - elbow)
+    norm_angle = _normalize_straight(angle)
+    if direction == 'extension':
+        return np.where(angle > 0, np.maximum(0, -norm_angle), np.maximum(0, norm_angle))
+    return np.abs(norm_angle)
+
+
+def _knee_rom(block: LandmarkBlock, direction: str, side: Optional[str]) -> np.ndarray:
+    if not side:
+        return _zeros(block)
+    hip = block.point(_side_index('HIP', side))
+    knee = block.point(_side_index('KNEE', side))
+    ankle = block.point(_side_index('ANKLE', side))
+    angle = signed_angle_between_vectors_2d(hip - knee, ankle - knee)
+    return np.abs(_normalize_straight(angle))
+
+
+def _hip_rom(block: LandmarkBlock, direction: str, side: Optional[str]) -> np.ndarray:
+    if not side:
+        return _zeros(block)
+    shoulder = block.point(_side_index('SHOULDER', side))
+    hip = block.point(_side_index('HIP', side))
+    knee = block.point(_side_index('KNEE', side))
+    norm_angle = _normalize_straight(signed_angle_between_vectors_2d(shoulder - hip, knee - hip))
+    if direction == 'flexion':
+        return np.where(norm_angle > 0, np.abs(norm_angle), 0.0)
+    elif direction == 'extension':
+        return np.where(norm_angle < 0, np.abs(norm_angle), 0.0)
+    return np.abs(norm_angle)
+
+
+def _wrist_rom(block: LandmarkBlock, direction: str, side: Optional[str]) -> np.ndarray:
+    if not side:
+        return _zeros(block)
+    elbow = block.point(_side_index('ELBOW', side))
+    wrist = block.point(_side_index('WRIST', side))
+    v_forearm = elbow - wrist
+
+    if direction in ['ulnar-deviation', 'radial-deviation']:
+        finger = block.point(_side_index('PINKY' if direction == 'ulnar-deviation' else 'THUMB', side))
+        angle = signed_angle_between_vectors_2d(v_forearm, finger - wrist)
+        return np.where(angle > 0, np.abs(angle - 180), np.abs(angle + 180))
+
+    index = block.point(_side_index('INDEX', side))
+    angle = signed_angle_between_vectors_2d(v_forearm, index - wrist)
+    return np.abs(np.where(angle > 0, angle - 180, angle + 180))
+
+
+def _ankle_rom(block: LandmarkBlock, direction: str, side: Optional[str]) -> np.ndarray:
+    if not side:
+        return _zeros(block)
+    knee = block.point(_side_index('KNEE', side))
+    ankle = block.point(_side_index('ANKLE', side))
+    foot = block.point(_side_index('FOOT_INDEX', side))
+    angle = signed_angle_between_vectors_2d(knee - ankle, foot - ankle)
+    return np.abs(np.where(angle > 0, 90 - angle, -90 - angle))
+
+
+ROM_FUNCTIONS: Dict[str, Callable[[LandmarkBlock, str, Optional[str]], np.ndarray]] = {
+    'cervical': _cervical_rom,
+    'shoulder': _shoulder_rom,
+    'thoracolumbar': _thoracolumbar_rom,
+    'elbow': _elbow_rom,
+    'wrist': _wrist_rom,
+    'hip': _hip_rom,
+    'knee': _knee_rom,
+    'ankle': _ankle_rom,
+}
+
+
+# --- Single frame on plain floats ---
+
+Vec2 = Tuple[float, float]
+Vec3 = Tuple[float, float, float]
+
+
+def _signed_angle(v1: Vec2, v2: Vec2) -> float:
+    diff = math.atan2(v2[1], v2[0]) - math.atan2(v1[1], v1[0])
+    if diff > math.pi:
+        diff -= 2 * math.pi
+    elif diff < -math.pi:
+        diff += 2 * math.pi
+    return math.degrees(diff)
+
+
+def _angle(v1: Vec2, v2: Vec2) -> float:
+    mags = math.hypot(v1[0], v1[1]) * math.hypot(v2[0], v2[1])
+    if mags == 0:
+        return 0.0
+    cos_angle = (v1[0] * v2[0] + v1[1] * v2[1]) / mags
+    if cos_angle != cos_angle:
+        return math.nan
+    return math.degrees(math.acos(max(-1.0, min(1.0, cos_angle))))
+
+
+def _sub(a: Sequence[float], b: Sequence[float]) -> Tuple[float, ...]:
+    return tuple(x - y for x, y in zip(a, b))
+
+
+def _mid(a: Sequence[float], b: Sequence[float]) -> Tuple[float, ...]:
+    return tuple((x + y) / 2 for x, y in zip(a, b))
+
+
+def _dot3(a: Vec3, b: Vec3) -> float:
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+
+def _cross3(a: Vec3, b: Vec3) -> Vec3:
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+
+def _normalize3(v: Vec3) -> Vec3:
+    mag = math.sqrt(_dot3(v, v))
+    return (v[0] / mag, v[1] / mag, v[2] / mag) if mag != 0 else (0.0, 0.0, 0.0)
+
+
+def _reject3(v: Vec3, axis: Vec3) -> Vec3:
+    d = _dot3(v, axis)
+    return (v[0] - d * axis[0], v[1] - d * axis[1], v[2] - d * axis[2])
+
+
+def _straight(angle: float) -> float:
+    return 180 - angle if angle > 0 else 180 + angle
+
+
+def _rows(landmarks: Any, columns: int, name: str) -> List[List[float]]:
+    rows = landmarks.tolist() if isinstance(landmarks, np.ndarray) else [list(row) for row in landmarks]
+    if len(rows) != NUM_LANDMARKS or any(len(row) < columns for row in rows):
+        raise ValueError(f"Expected {name} of shape ({NUM_LANDMARKS}, C>={columns})")
+    return rows
+
+
+class FramePoints:
+    """One frame in pixel space as Python floats, with the shared geometry of ``LandmarkBlock``."""
+
+    def __init__(self, landmarks: Any, width: int, height: int, world_landmarks: Any = None):
+        self.landmarks = _rows(landmarks, 2, "landmarks")
+        if world_landmarks is not None and len(world_landmarks) == 0:
+            world_landmarks = None
+        self.world_landmarks = _rows(world_landmarks, 3, "world_landmarks") if world_landmarks is not None else None
+        self.pixels = [(row[0] * width, row[1] * height) for row in self.landmarks]
+
+    def point(self, index: int) -> Vec2:
+        return self.pixels[index]
+
+    @cached_property
+    def shoulder_mid(self) -> Vec2:
+        return _mid(self.point(LANDMARKS['LEFT_SHOULDER']), self.point(LANDMARKS['RIGHT_SHOULDER']))
+
+    @cached_property
+    def hip_mid(self) -> Vec2:
+        return _mid(self.point(LANDMARKS['LEFT_HIP']), self.point(LANDMARKS['RIGHT_HIP']))
+
+    @cached_property
+    def ear_mid(self) -> Vec2:
+        return _mid(self.point(LANDMARKS['LEFT_EAR']), self.point(LANDMARKS['RIGHT_EAR']))
+
+    @cached_property
+    def torso_vector(self) -> Vec2:
+        return _sub(self.shoulder_mid, self.hip_mid)
+
+    @cached_property
+    def neck_angle_2d(self) -> float:
+        v_head = _sub(self.ear_mid, self.shoulder_mid)
+        v_torso = self.torso_vector
+        angle = math.degrees(math.atan2(v_head[1], v_head[0]) - math.atan2(v_torso[1], v_torso[0]))
+        if angle <= -180:
+            return angle + 360
+        return angle - 360 if angle > 180 else angle
+
+    @cached_property
+    def torso_frame_3d(self) -> Dict[str, Vec3]:
+        w = [row[:3] for row in self.world_landmarks]
+        ear_mid = _mid(w[LANDMARKS['LEFT_EAR']], w[LANDMARKS['RIGHT_EAR']])
+        shoulder_mid = _mid(w[LANDMARKS['LEFT_SHOULDER']], w[LANDMARKS['RIGHT_SHOULDER']])
+        hip_mid = _mid(w[LANDMARKS['LEFT_HIP']], w[LANDMARKS['RIGHT_HIP']])
+        up = _normalize3(_sub(shoulder_mid, hip_mid))
+        right = _normalize3(_sub(w[LANDMARKS['RIGHT_SHOULDER']], w[LANDMARKS['LEFT_SHOULDER']]))
+        forward = _cross3(right, up)
+        return {
+            "up": up,
+            "forward": forward,
+            "right": _normalize3(_cross3(up, forward)),
+            "neck": _sub(ear_mid, shoulder_mid),
+            "ear_line": _sub(w[LANDMARKS['RIGHT_EAR']], w[LANDMARKS['LEFT_EAR']]),
+        }
+
+
+def _cervical_frame(p: FramePoints, direction: str, side: Optional[str]) -> float:
+    if p.world_landmarks is not None:
+        frame = p.torso_frame_3d
+        if direction in ['flexion', 'extension']:
+            sag = _reject3(frame["neck"], frame["right"])
+            angle = math.degrees(math.atan2(_dot3(sag, frame["forward"]), _dot3(sag, frame["up"])))
+            return angle if direction == 'flexion' else -angle
+        elif direction in ['left-lateral-flexion', 'right-lateral-flexion']:
+            cor = _reject3(frame["neck"], frame["forward"])
+            angle = math.degrees(math.atan2(_dot3(cor, frame["right"]), _dot3(cor, frame["up"])))
+            return angle if direction == 'right-lateral-flexion' else -angle
+        elif direction in ['left-rotation', 'right-rotation']:
+            trans = _reject3(frame["ear_line"], frame["up"])
+            angle = math.degrees(math.atan2(_dot3(trans, frame["forward"]), _dot3(trans, frame["right"])))
+            return angle if direction == 'left-rotation' else -angle
+
+    if direction in ['flexion', 'extension']:
+        facing_left = p.point(LANDMARKS['NOSE'])[0] < p.point(LANDMARKS['LEFT_EAR'])[0]
+        return -p.neck_angle_2d if facing_left else p.neck_angle_2d
+
+    elif direction in ['left-rotation', 'right-rotation']:
+        n = p.landmarks[LANDMARKS['NOSE']]
+        le = p.landmarks[LANDMARKS['LEFT_EAR']]
+        re = p.landmarks[LANDMARKS['RIGHT_EAR']]
+        if len(n) < 3:
+            return 0.0
+        head_x = n[0] - (le[0] + re[0]) / 2
+        head_z = n[2] - (le[2] + re[2]) / 2
+        yaw = math.degrees(math.atan2(head_x, -head_z * 2.5))
+        return -yaw if direction == 'left-rotation' else yaw
+
+    elif direction in ['left-lateral-flexion', 'right-lateral-flexion']:
+        return -p.neck_angle_2d
+
+    return 0.0
+
+
+def _shoulder_frame(p: FramePoints, direction: str, side: Optional[str]) -> float:
+    if not side:
+        return 0.0
+    shoulder = p.point(_side_index('SHOULDER', side))
+    elbow = p.point(_side_index('ELBOW', side))
+
+    if direction in ['flexion', 'extension', 'abduction', 'adduction']:
+        hip = p.point(_side_index('HIP', side))
+        angle = _signed_angle(_sub(hip, shoulder), _sub(elbow, shoulder))
+        if direction == 'flexion':
+            return abs(angle) if angle > 0 else 0.0
+        elif direction == 'extension':
+            return abs(angle) if angle < 0 else 0.0
+        if (side == 'left') == (direction == 'abduction'):
+            return max(0.0, angle)
+        return max(0.0, -angle)
+
+    elif direction in ['internal-rotation', 'external-rotation']:
+        wrist = p.point(_side_index('WRIST', side))
+        return abs(_angle(_sub(shoulder, elbow), _sub(wrist, elbow)) - 90)
+    return 0.0
+
+
+def _thoracolumbar_frame(p: FramePoints, direction: str, side: Optional[str]) -> float:
+    v_torso = p.torso_vector
+    if direction in ['flexion', 'extension']:
+        return _angle((0.0, -1.0), v_torso)
+    elif direction in ['left-lateral-flexion', 'right-lateral-flexion']:
+        angle = _signed_angle((0.0, -1.0), v_torso)
+        return max(0.0, angle) if direction == 'right-lateral-flexion' else max(0.0, -angle)
+    return 0.0
+
+
+def _elbow_frame(p: FramePoints, direction: str, side: Optional[str]) -> float:
+    if not side:
+        return 0.0
+    shoulder = p.point(_side_index('SHOULDER', side))
+    elbow = p.point(_side_index('ELBOW', side))
+    wrist = p.point(_side_index('WRIST', side))
+    angle = _signed_angle(_sub(shoulder, elbow), _sub(wrist, elbow))
+    norm_angle = _straight(angle)
+    if direction == 'extension':
+        return max(0.0, -norm_angle) if angle > 0 else max(0.0, norm_angle)
+    return abs(norm_angle)
+
+
+def _knee_frame(p: FramePoints, direction: str, side: Optional[str]) -> float:
+    if not side:
+        return 0.0
+    hip = p.point(_side_index('HIP', side))
+    knee = p.point(_side_index('KNEE', side))
+    ankle = p.point(_side_index('ANKLE', side))
+    return abs(_straight(_signed_angle(_sub(hip, knee), _sub(ankle, knee))))
+
+
+def _hip_frame(p: FramePoints, direction: str, side: Optional[str]) -> float:
+    if not side:
+        return 0.0
+    shoulder = p.point(_side_index('SHOULDER', side))
+    hip = p.point(_side_index('HIP', side))
+    knee = p.point(_side_index('KNEE', side))
+    norm_angle = _straight(_signed_angle(_sub(shoulder, hip), _sub(knee, hip)))
+    if direction == 'flexion':
+        return abs(norm_angle) if norm_angle > 0 else 0.0
+    elif direction == 'extension':
+        return abs(norm_angle) if norm_angle < 0 else 0.0
+    return abs(norm_angle)
+
+
+def _wrist_frame(p: FramePoints, direction: str, side: Optional[str]) -> float:
+    if not side:
+        return 0.0
+    elbow = p.point(_side_index('ELBOW', side))
+    wrist = p.point(_side_index('WRIST', side))
+    v_forearm = _sub(elbow, wrist)
+
+    if direction in ['ulnar-deviation', 'radial-deviation']:
+        finger = p.point(_side_index('PINKY' if direction == 'ulnar-deviation' else 'THUMB', side))
+        angle = _signed_angle(v_forearm, _sub(finger, wrist))
+        return abs(angle - 180) if angle > 0 else abs(angle + 180)
+
+    index = p.point(_side_index('INDEX', side))
+    angle = _signed_angle(v_forearm, _sub(index, wrist))
+    return abs(angle - 180 if angle > 0 else angle + 180)
+
+
+def _ankle_frame(p: FramePoints, direction: str, side: Optional[str]) -> float:
+    if not side:
+        return 0.0
+    knee = p.point(_side_index('KNEE', side))
+    ankle = p.point(_side_index('ANKLE', side))
+    foot = p.point(_side_index('FOOT_INDEX', side))
+    angle = _signed_angle(_sub(knee, ankle), _sub(foot, ankle))
+    return abs(90 - angle if angle > 0 else -90 - angle)
+
+
+FRAME_FUNCTIONS: Dict[str, Callable[[FramePoints, str, Optional[str]], float]] = {
+    'cervical': _cervical_frame,
+    'shoulder': _shoulder_frame,
+    'thoracolumbar': _thoracolumbar_frame,
+    'elbow': _elbow_frame,
+    'wrist': _wrist_frame,
+    'hip': _hip_frame,
+    'knee': _knee_frame,
+    'ankle': _ankle_frame,
+}
+
+
+def _unknown_joint_frame(points: FramePoints, direction: str, side: Optional[str]) -> None:
+    return None
+
+
+def measurement_spec(measurement: Any) -> Tuple[str, str, str, Optional[str]]:
+    """Return (id, jointType, direction, side) from a model, a plain dict or such a tuple."""
+    if isinstance(measurement, tuple):
+        m_id, joint_type, direction, side = measurement
+        return m_id, joint_type, direction, side
+    if isinstance(measurement, dict):
+        return (measurement["id"], measurement["jointType"],
+                measurement["direction"], measurement.get("side"))
+    return measurement.id, measurement.jointType, measurement.direction, measurement.side
+
+
+def _unknown_joint(block: LandmarkBlock, direction: str, side: Optional[str]) -> np.ndarray:
+    # Frames where the scalar path returns None come back as NaN
+    return np.full(block.frames, np.nan)
+
+
+def calculate_block_angle(block: LandmarkBlock, joint_type: str, direction: str,
+                          side: Optional[str] = None) -> np.ndarray:
+    """Angles for one measurement over every frame of a block.
+
+    Frames where the scalar path would return ``None`` (unknown joint type)
+    come back as NaN.
+    """
+    func = ROM_FUNCTIONS.get(joint_type, _unknown_joint)
+    return np.asarray(func(block, direction, side), dtype=np.float64)
+
+
+class MeasurementPlan:
+    """A measurement set compiled once and evaluated on many frames.
+
+    Joint-type dispatch is resolved at compile time, identical measurements
+    share one computation, and every measurement evaluated on the same
+    ``LandmarkBlock`` (or ``FramePoints`` for one frame) reuses its cached
+    midpoints and torso frame. Plans are picklable, so they can be shipped
+    to a process-pool worker.
+    """
+
+    def __init__(self, measurements: Iterable[Any]):
+        self._steps: List[Tuple[Tuple[str, str, Optional[str]], Callable[[LandmarkBlock], np.ndarray]]] = []
+        self._frame_steps: List[Tuple[Tuple[str, str, Optional[str]], Callable[[FramePoints], Optional[float]]]] = []
+        self._outputs: List[Tuple[str, Tuple[str, str, Optional[str]]]] = []
+        seen = set()
+        for m in measurements:
+            m_id, joint_type, direction, side = measurement_spec(m)
+            key = (joint_type, direction, side)
+            if key not in seen:
+                seen.add(key)
+                func = ROM_FUNCTIONS.get(joint_type, _unknown_joint)
+                self._steps.append((key, partial(func, direction=direction, side=side)))
+                frame_func = FRAME_FUNCTIONS.get(joint_type, _unknown_joint_frame)
+                self._frame_steps.append((key, partial(frame_func, direction=direction, side=side)))
+            self._outputs.append((m_id, key))
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    def evaluate_block(self, block: LandmarkBlock) -> Dict[str, np.ndarray]:
+        computed = {key: np.asarray(step(block), dtype=np.float64) for key, step in self._steps}
+        return {m_id: computed[key] for m_id, key in self._outputs}
+
+    def evaluate(
+        self,
+        landmarks: np.ndarray,
+        width: int,
+        height: int,
+        world_landmarks: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        return self.evaluate_block(LandmarkBlock(landmarks, width, height, world_landmarks))
+
+    def evaluate_frame(
+        self,
+        landmarks: np.ndarray,
+        width: int,
+        height: int,
+        world_landmarks: Optional[np.ndarray] = None
+    ) -> List[Tuple[str, Optional[float]]]:
+        """Evaluate a single ``(33, C)`` frame into (id, angle) pairs; NaN becomes None.
+
+        Runs on Python floats: one ``tolist`` per frame instead of NumPy
+        calls sized for one row.
+        """
+        points = FramePoints(landmarks, width, height, world_landmarks)
+        computed = {}
+        for key, step in self._frame_steps:
+            angle = step(points)
+            computed[key] = None if angle is None or angle != angle else float(angle)
+        return [(m_id, computed[key]) for m_id, key in self._outputs]
+
+
+def calculate_joint_angles_batch(
+    landmarks: np.ndarray,
+    measurements: Iterable[Any],
+    width: int,
+    height: int,
+    world_landmarks: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """Compute every measurement for every frame of a landmark sequence.
+
+    Args:
+        landmarks: ``(frames, 33, C)`` normalized landmarks, ``C >= 2``.
+        measurements: ``JointMeasurementRequest`` models or equivalent dicts.
+        width, height: frame size used for pixel conversion.
+        world_landmarks: optional ``(frames, 33, C>=3)`` world landmarks,
+            enabling the 3D cervical path like ``calculate_joint_angle``.
+
+    Returns:
+        Mapping of measurement id to a ``(frames,)`` float64 array.
+    """
+    return MeasurementPlan(measurements).evaluate(landmarks, width, height, world_landmarks)
@@ -0,0 +1,211 @@
+"""Offline re-analysis of recorded landmark sessions.
+
+A session is either NDJSON (one frame message per line, in the same shape
+as ``/ws/analyze`` frames) or an ``.npz`` archive with a ``landmarks``
+array of shape ``(frames, 33, C)`` and optional ``world_landmarks``,
+``timestamps``, ``width``, ``height`` and ``view`` entries.
+
+Consecutive frames with the same size, view and layout are grouped into
+blocks of up to ``block_size`` frames; joint angles for a whole block come
+from one ``MeasurementPlan.evaluate`` call. Results are yielded as NDJSON
+lines so the HTTP layer can stream them while later blocks are computed.
+"""
+import io
+import json
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .batch_joint_analysis import MeasurementPlan
+from .fast_codec import dumps, model_fields
+from .frame_codec import FRAME_ERRORS, landmarks_to_array
+from .posture_analysis import analyze_posture
+
+DEFAULT_BLOCK_SIZE = 256
+
+
+class FrameBlock(NamedTuple):
+    """Consecutive frames analyzed together."""
+    start: int
+    width: int
+    height: int
+    view: str
+    landmarks: np.ndarray  # (frames, 33, C)
+    world_landmarks: Optional[np.ndarray]
+    timestamps: Optional[List[Any]]
+
+
+class BatchError(NamedTuple):
+    """A frame that could not be parsed; reported in the output stream."""
+    frame: int
+    detail: str
+
+
+def _ndjson_blocks(
+    lines: Iterable[bytes],
+    width: int,
+    height: int,
+    view: str,
+    block_size: int
+) -> Iterator[Any]:
+    pending: List[Tuple[np.ndarray, Optional[np.ndarray], Any]] = []
+    key = None
+    start = 0
+
+    def flush() -> Optional[FrameBlock]:
+        if not pending:
+            return None
+        w, h, v, _, has_world = key
+        return FrameBlock(
+            start=start,
+            width=w,
+            height=h,
+            view=v,
+            landmarks=np.stack([p[0] for p in pending]),
+            world_landmarks=np.stack([p[1] for p in pending]) if has_world else None,
+            timestamps=[p[2] for p in pending]
+        )
+
+    index = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            message = json.loads(line)
+            landmarks = landmarks_to_array(message["landmarks"], np.float64)
+            world = message.get("worldLandmarks")
+            world = landmarks_to_array(world, np.float64) if world else None
+            frame_key = (
+                int(message.get("width", width)),
+                int(message.get("height", height)),
+                message.get("view", view),
+                landmarks.shape,
+                world is not None and world.shape == landmarks.shape,
+            )
+        except FRAME_ERRORS as e:
+            # Flush first so output stays in frame order
+            block = flush()
+            if block is not None:
+                yield block
+            pending, key = [], None
+            yield BatchError(index, str(e))
+            index += 1
+            continue
+
+        if frame_key != key or len(pending) >= block_size:
+            block = flush()
+            if block is not None:
+                yield block
+            pending, key, start = [], frame_key, index
+        pending.append((landmarks, world if frame_key[4] else None, message.get("timestamp")))
+        index += 1
+
+    block = flush()
+    if block is not None:
+        yield block
+
+
+def _npz_blocks(data: bytes, width: int, height: int, view: str, block_size: int) -> Iterator[FrameBlock]:
+    # Loaded eagerly so a corrupt archive fails before streaming starts
+    try:
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            if "landmarks" not in archive:
+                raise ValueError("npz archive has no 'landmarks' array")
+            landmarks = np.asarray(archive["landmarks"], dtype=np.float64)
+            world = archive["world_landmarks"] if "world_landmarks" in archive else None
+            timestamps = archive["timestamps"].tolist() if "timestamps" in archive else None
+            width = int(archive["width"]) if "width" in archive else width
+            height = int(archive["height"]) if "height" in archive else height
+            view = str(archive["view"]) if "view" in archive else view
+    except (OSError, zipfile.BadZipFile) as e:
+        raise ValueError(f"Invalid npz archive: {e}") from e
+
+    if landmarks.ndim != 3:
+        raise ValueError(f"Expected landmarks of shape (frames, 33, C), got {landmarks.shape}")
+    if world is not None:
+        world = np.asarray(world, dtype=np.float64)
+        if world.shape[0] != landmarks.shape[0]:
+            raise ValueError("world_landmarks and landmarks have different frame counts")
+
+    return (
+        FrameBlock(
+            start=start,
+            width=width,
+            height=height,
+            view=view,
+            landmarks=landmarks[start:start + block_size],
+            world_landmarks=world[start:start + block_size] if world is not None else None,
+            timestamps=timestamps[start:start + block_size] if timestamps is not None else None
+        )
+        for start in range(0, landmarks.shape[0], block_size)
+    )
+
+
+def read_session(
+    data: bytes,
+    filename: str = "",
+    width: int = 1280,
+    height: int = 720,
+    view: str = "front",
+    block_size: int = DEFAULT_BLOCK_SIZE
+) -> Iterator[Any]:
+    """Yield ``FrameBlock``s (and ``BatchError``s for bad NDJSON lines).
+
+    The format is picked from the filename, falling back to sniffing the
+    zip signature of ``.npz`` archives. ``width``, ``height`` and ``view``
+    are defaults for frames that do not carry their own. Raises
+    ``ValueError`` for an unreadable archive.
+    """
+    if filename.endswith(".npz") or data[:4] == b"PK\x03\x04":
+        return _npz_blocks(data, width, height, view, block_size)
+    return _ndjson_blocks(io.BytesIO(data), width, height, view, block_size)
+
+
+def _angle_rows(angles: Dict[str, np.ndarray], frames: int) -> List[Dict[str, Optional[float]]]:
+    ids = list(angles)
+    if not ids:
+        return [{} for _ in range(frames)]
+    values = np.stack([angles[m_id] for m_id in ids], axis=1)
+    rows = np.where(np.isnan(values), None, values).tolist()
+    return [dict(zip(ids, row)) for row in rows]
+
+
+def analyze_block(block: FrameBlock, plan: MeasurementPlan, posture: bool = True) -> Iterator[str]:
+    """NDJSON result lines for every frame of one block."""
+    angles = plan.evaluate(block.landmarks, block.width, block.height, block.world_landmarks)
+    for offset, row in enumerate(_angle_rows(angles, block.landmarks.shape[0])):
+        line: Dict[str, Any] = {"type": "FRAME", "frame": block.start + offset}
+        if block.timestamps is not None:
+            line["timestamp"] = block.timestamps[offset]
+        line["angles"] = row
+        if posture:
+            result = analyze_posture(block.view, block.landmarks[offset], block.width, block.height)
+            line["metrics"] = model_fields(result["metrics"])
+            line["issues"] = [{"id": issue.id, "severity": issue.severity} for issue in result["issues"]]
+        yield dumps(line) + "\n"
+
+
+def analyze_session(blocks: Iterable[Any], plan: MeasurementPlan, posture: bool = True) -> Iterator[str]:
+    """Stream NDJSON lines for a whole session, ending with a SUMMARY line.
+
+    Errors do not abort the stream: unparseable frames and blocks become
+    ERROR lines, so one corrupt frame does not cost the rest of the session.
+    Each block is yielded as a single chunk.
+    """
+    frames = 0
+    errors = 0
+    for block in blocks:
+        if isinstance(block, BatchError):
+            errors += 1
+            yield dumps({"type": "ERROR", "frame": block.frame, "detail": block.detail}) + "\n"
+            continue
+        try:
+            lines = list(analyze_block(block, plan, posture))
+        except ValueError as e:
+            errors += block.landmarks.shape[0]
+            yield dumps({"type": "ERROR", "frame": block.start, "detail": str(e)}) + "\n"
+            continue
+        frames += len(lines)
+        yield "".join(lines)
+    yield dumps({"type": "SUMMARY", "frames": frames, "errors": errors}) + "\n"
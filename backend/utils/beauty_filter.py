@@ -0,0 +1,147 @@
+"""Preview enhancement (skin smoothing, tone, colour) in quality tiers.
+
+``full`` is the original pipeline: a full-resolution bilateral filter,
+CLAHE on the LAB lightness and a 10% HSV saturation boost, now with the
+CLAHE object reused and the saturation done through a lookup table. The
+cheaper tiers work in YCrCb, which converts several times faster than
+LAB: they smooth a downscaled copy and bring its luma back to full
+resolution with a guided filter that uses the full frame as guide, so
+edges stay sharp while flat skin areas take the smoothed values.
+``off`` returns the frame untouched.
+
+At 1280x720 on one core: full ~140 ms, balanced ~23 ms, fast ~13 ms
+(see ``python -m benchmarks.hot_paths -k beauty``).
+"""
+import os
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+BEAUTY_TIERS = ("off", "fast", "balanced", "full")
+DEFAULT_BEAUTY_TIER = "balanced"
+DEFAULT_BEAUTY_STRENGTH = 5
+
+# Downscale factor of the smoothing pass, and whether the tier runs CLAHE
+TIER_SCALES: Dict[str, int] = {"fast": 4, "balanced": 2, "full": 1}
+TIER_CLAHE: Dict[str, bool] = {"fast": False, "balanced": True, "full": True}
+
+SATURATION_BOOST = 1.1
+GUIDED_RADIUS = 2
+GUIDED_EPS = 256.0  # Variance (in 8-bit levels squared) below which detail counts as noise
+
+
+def _saturation_lut() -> np.ndarray:
+    # Same arithmetic as the float HSV path: scale S, clip, truncate
+    identity = np.arange(256, dtype=np.float32)
+    boosted = np.clip(identity * np.float32(SATURATION_BOOST), 0, 255).astype(np.uint8)
+    return np.dstack([identity.astype(np.uint8), boosted, identity.astype(np.uint8)])
+
+
+def _chroma_lut() -> np.ndarray:
+    # Scaling Cr/Cb away from neutral grey is a saturation boost in YCrCb
+    identity = np.arange(256, dtype=np.float32)
+    boosted = np.clip(np.rint(128 + (identity - 128) * SATURATION_BOOST), 0, 255).astype(np.uint8)
+    return np.dstack([identity.astype(np.uint8), boosted, boosted])
+
+
+class BeautyFilter:
+    """Applies the enhancement of one quality tier; reusable across frames."""
+
+    def __init__(self, tier: str = DEFAULT_BEAUTY_TIER, strength: int = DEFAULT_BEAUTY_STRENGTH):
+        self.tier = tier
+        self.strength = strength
+        self._clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        self._hsv_lut = _saturation_lut()
+        self._chroma_lut = _chroma_lut()
+
+    @classmethod
+    def from_env(cls) -> "BeautyFilter":
+        return cls(tier=os.environ.get("VISION3_BEAUTY_TIER", DEFAULT_BEAUTY_TIER))
+
+    @property
+    def tier(self) -> str:
+        return self._tier
+
+    @tier.setter
+    def tier(self, tier: str) -> None:
+        if tier not in BEAUTY_TIERS:
+            raise ValueError(f"Unknown beauty tier: {tier}")
+        self._tier = tier
+
+    @property
+    def strength(self) -> int:
+        return self._strength
+
+    @strength.setter
+    def strength(self, strength: int) -> None:
+        # 0-10; the default 5 gives the original sigmaColor of 75
+        self._strength = max(0, min(10, int(strength)))
+
+    def apply(self, frame: np.ndarray, tier: Optional[str] = None) -> np.ndarray:
+        """Enhanced copy of a BGR ``frame``, or ``frame`` itself when off.
+
+        ``tier`` overrides the configured tier for this frame only.
+        """
+        tier = tier or self._tier
+        if tier == "off":
+            return frame
+        if tier == "full":
+            return self._full(frame)
+        return self._downscaled(frame, TIER_SCALES[tier], TIER_CLAHE[tier])
+
+    __call__ = apply
+
+    def _full(self, frame: np.ndarray) -> np.ndarray:
+        if self._strength:
+            frame = cv2.bilateralFilter(frame, d=9, sigmaColor=15.0 * self._strength, sigmaSpace=75)
+        lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
+        cv2.insertChannel(self._clahe.apply(cv2.extractChannel(lab, 0)), lab, 0)
+        enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+        hsv = cv2.cvtColor(enhanced, cv2.COLOR_BGR2HSV)
+        return cv2.cvtColor(cv2.LUT(hsv, self._hsv_lut, dst=hsv), cv2.COLOR_HSV2BGR)
+
+    def _downscaled(self, frame: np.ndarray, scale: int, clahe: bool) -> np.ndarray:
+        ycc = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb)
+        if self._strength:
+            height, width = frame.shape[:2]
+            small = cv2.resize(ycc, (width // scale, height // scale), interpolation=cv2.INTER_AREA)
+            smooth_small = cv2.bilateralFilter(small, d=5, sigmaColor=15.0 * self._strength,
+                                               sigmaSpace=75.0 / scale)
+            # Only luma needs full-resolution edges; chroma is upsampled
+            # plainly, as 4:2:0 video does
+            luma = guided_upsample(cv2.extractChannel(ycc, 0), cv2.extractChannel(small, 0),
+                                   cv2.extractChannel(smooth_small, 0))
+            ycc = cv2.resize(smooth_small, (width, height), interpolation=cv2.INTER_LINEAR)
+            cv2.insertChannel(luma, ycc, 0)
+        if clahe:
+            cv2.insertChannel(self._clahe.apply(cv2.extractChannel(ycc, 0)), ycc, 0)
+        return cv2.cvtColor(cv2.LUT(ycc, self._chroma_lut, dst=ycc), cv2.COLOR_YCrCb2BGR)
+
+
+def guided_upsample(
+    frame: np.ndarray,
+    small: np.ndarray,
+    smooth_small: np.ndarray,
+    radius: int = GUIDED_RADIUS,
+    eps: float = GUIDED_EPS
+) -> np.ndarray:
+    """Bring ``smooth_small`` (a filtered ``small``) back to the size of ``frame``.
+
+    Fast guided filter, per channel: fit ``smooth ~ a * small + b`` over small
+    windows at low resolution, upsample ``a`` and ``b`` and apply them to the
+    full-resolution frame, which keeps its edges where the filter kept them.
+    """
+    ksize = (2 * radius + 1, 2 * radius + 1)
+    guide = small.astype(np.float32)
+    target = smooth_small.astype(np.float32)
+    mean_i = cv2.boxFilter(guide, -1, ksize)
+    mean_p = cv2.boxFilter(target, -1, ksize)
+    var_i = cv2.boxFilter(guide * guide, -1, ksize) - mean_i * mean_i
+    cov_ip = cv2.boxFilter(guide * target, -1, ksize) - mean_i * mean_p
+    a = cov_ip / (var_i + eps)
+    b = mean_p - a * mean_i
+    height, width = frame.shape[:2]
+    a = cv2.resize(cv2.boxFilter(a, -1, ksize), (width, height), interpolation=cv2.INTER_LINEAR)
+    b = cv2.resize(cv2.boxFilter(b, -1, ksize), (width, height), interpolation=cv2.INTER_LINEAR)
+    return cv2.add(cv2.multiply(frame, a, dtype=cv2.CV_32F), b, dtype=cv2.CV_8U)
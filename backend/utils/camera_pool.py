@@ -0,0 +1,230 @@
+"""Keyed pool of camera pipelines, one ``CameraManager`` per camera id.
+
+One host can drive several cameras (say, the two or three rooms a
+mini-PC is wired to). Cameras are declared with ``VISION3_CAMERAS`` as
+comma-separated ``id=source`` pairs, where a source is a device index or
+anything ``cv2.VideoCapture`` opens::
+
+    VISION3_CAMERAS="room1=0,room2=1,hall=rtsp://10.0.0.5/stream"
+
+Without it the pool serves device 0 as camera ``"0"``; numeric ids that
+are not declared map to the device of that index either way, for the
+first ``MAX_UNDECLARED_DEVICES`` devices. Such ids are normalised, so
+``"007"`` is camera ``"7"``, and a camera whose device fails to open is
+dropped again rather than kept around.
+
+A camera starts when its first viewer connects (or on an explicit start)
+and is stopped by ``reap_idle`` once it has had no viewers for
+``idle_timeout_s``. Explicitly started cameras are pinned and keep
+running until explicitly stopped, for consumers that do not subscribe to
+frames, such as ``/camera/posture``. A camera that is recording is not
+stopped for being idle either.
+"""
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Union
+
+from .camera_stream import CameraManager
+from .qos_governor import UNRESTRICTED, QosSettings
+
+DEFAULT_IDLE_TIMEOUT_S = 30.0
+REAP_INTERVAL_S = 1.0
+# Undeclared numeric ids beyond this are not a device anyone has
+MAX_UNDECLARED_DEVICES = 64
+
+Source = Union[int, str]
+
+
+def parse_sources(spec: str) -> Dict[str, Source]:
+    """``"room1=0,hall=rtsp://..."`` -> ``{"room1": 0, "hall": "rtsp://..."}``."""
+    sources: Dict[str, Source] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        camera_id, sep, source = entry.partition("=")
+        if not sep or not camera_id.strip() or not source.strip():
+            raise ValueError(f"Camera entries must look like id=source, got {entry!r}")
+        source = source.strip()
+        sources[camera_id.strip()] = int(source) if source.isdigit() else source
+    if not sources:
+        raise ValueError("No cameras configured")
+    return sources
+
+
+class CameraPool:
+    """Creates, starts and stops ``CameraManager`` instances by camera id."""
+
+    def __init__(
+        self,
+        sources: Optional[Dict[str, Source]] = None,
+        idle_timeout_s: float = DEFAULT_IDLE_TIMEOUT_S,
+        factory: Any = CameraManager
+    ):
+        self.sources: Dict[str, Source] = dict(sources or {"0": 0})
+        self.default_id = next(iter(self.sources))
+        self.idle_timeout_s = idle_timeout_s
+        self.factory = factory
+        self.cameras: Dict[str, CameraManager] = {}
+        self.pinned: Set[str] = set()
+        self._qos = UNRESTRICTED
+        self._idle_since: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Start and stop of one camera block on the device; serialize them per camera
+        self._camera_locks: Dict[str, threading.Lock] = {}
+
+    @classmethod
+    def from_env(cls) -> "CameraPool":
+        spec = os.environ.get("VISION3_CAMERAS")
+        return cls(
+            sources=parse_sources(spec) if spec else None,
+            idle_timeout_s=float(os.environ.get("VISION3_CAMERA_IDLE_S", DEFAULT_IDLE_TIMEOUT_S))
+        )
+
+    def resolve(self, camera_id: Optional[str] = None) -> str:
+        """The canonical id of ``camera_id`` (default camera if None); KeyError if it is unknown."""
+        if camera_id is None:
+            return self.default_id
+        if camera_id in self.sources:
+            return camera_id
+        if camera_id.isdecimal() and int(camera_id) < MAX_UNDECLARED_DEVICES:
+            return str(int(camera_id))
+        raise KeyError(f"Unknown camera: {camera_id}")
+
+    def source_of(self, camera_id: str) -> Source:
+        camera_id = self.resolve(camera_id)
+        return self.sources[camera_id] if camera_id in self.sources else int(camera_id)
+
+    def get(self, camera_id: Optional[str] = None) -> CameraManager:
+        """The pipeline of ``camera_id`` (default camera if None), created on first use."""
+        camera_id = self.resolve(camera_id)
+        with self._lock:
+            camera = self.cameras.get(camera_id)
+            if camera is None:
+                camera = self.factory(self.source_of(camera_id), camera_id)
+                camera.qos = self._qos
+                self.cameras[camera_id] = camera
+                self._camera_locks[camera_id] = threading.Lock()
+            return camera
+
+    def running(self) -> List[CameraManager]:
+        with self._lock:
+            return [camera for camera in self.cameras.values() if camera.is_running]
+
+    @property
+    def qos(self) -> QosSettings:
+        return self._qos
+
+    @qos.setter
+    def qos(self, qos: QosSettings) -> None:
+        # Applies to every camera, including ones started later
+        with self._lock:
+            self._qos = qos
+            for camera in self.cameras.values():
+                camera.qos = qos
+
+    def _start(self, camera_id: str, pin: bool) -> Optional[CameraManager]:
+        while True:
+            camera = self.get(camera_id)
+            with self._lock:
+                lock = self._camera_locks.get(camera_id)
+            if lock is None:
+                continue
+            with lock:
+                if self.cameras.get(camera_id) is not camera:
+                    # Dropped after a failed start while this one waited; start the new one
+                    continue
+                if camera.start():
+                    self._idle_since.pop(camera_id, None)
+                    if pin:
+                        self.pinned.add(camera_id)
+                    return camera
+                # Keeps bad ids and unplugged devices from piling up
+                with self._lock:
+                    del self.cameras[camera_id]
+                    del self._camera_locks[camera_id]
+                return None
+
+    def _stop(self, camera_id: str, only_if_idle: bool = False) -> bool:
+        with self._lock:
+            camera = self.cameras.get(camera_id)
+            if camera is None:
+                return True
+            lock = self._camera_locks[camera_id]
+        with lock:
+            if self.cameras.get(camera_id) is not camera:
+                return True
+            if only_if_idle and (camera_id in self.pinned or camera.viewers or camera.recording):
+                # A viewer or an explicit start arrived since the check
+                return False
+            self.pinned.discard(camera_id)
+            self._idle_since.pop(camera_id, None)
+            if camera.is_running:
+                camera.stop()
+            return True
+
+    async def start(self, camera_id: Optional[str] = None, pin: bool = False) -> Optional[CameraManager]:
+        """Start a camera if it is not running; ``pin`` exempts it from the idle timeout.
+
+        Returns the running camera, or None if it could not be opened. Use
+        this camera rather than one from an earlier ``get``, which a failed
+        start in between may have replaced.
+        """
+        camera_id = self.resolve(camera_id)
+        # Opening the device blocks, so keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, self._start, camera_id, pin)
+
+    async def stop(self, camera_id: Optional[str] = None) -> None:
+        camera_id = self.resolve(camera_id)
+        await asyncio.get_running_loop().run_in_executor(None, self._stop, camera_id)
+
+    async def reap_idle(self, now: Optional[float] = None) -> List[str]:
+        """Stop unpinned cameras that have had no viewers or recording for the idle timeout."""
+        now = time.monotonic() if now is None else now
+        idle = []
+        with self._lock:
+            cameras = list(self.cameras.items())
+        for camera_id, camera in cameras:
+            if not camera.is_running or camera_id in self.pinned or camera.viewers or camera.recording:
+                self._idle_since.pop(camera_id, None)
+                continue
+            since = self._idle_since.setdefault(camera_id, now)
+            if now - since >= self.idle_timeout_s:
+                idle.append(camera_id)
+        loop = asyncio.get_running_loop()
+        stopped = []
+        for camera_id in idle:
+            if await loop.run_in_executor(None, self._stop, camera_id, True):
+                print(f"Camera {camera_id} idle for {self.idle_timeout_s:.0f}s, stopped")
+                stopped.append(camera_id)
+        return stopped
+
+    async def run(self, interval_s: float = REAP_INTERVAL_S) -> None:
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await self.reap_idle()
+            except Exception as e:
+                print(f"Camera pool error: {e}")
+
+    async def close(self) -> None:
+        for camera in self.running():
+            await self.stop(camera.camera_id)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Declared and created cameras with their state."""
+        with self._lock:
+            ids = list(dict.fromkeys([*self.sources, *self.cameras]))
+            cameras = dict(self.cameras)
+        return [
+            {
+                "id": camera_id,
+                "running": camera_id in cameras and cameras[camera_id].is_running,
+                "viewers": cameras[camera_id].viewers if camera_id in cameras else 0,
+                "pinned": camera_id in self.pinned,
+                "recording": camera_id in cameras and cameras[camera_id].recording,
+            }
+            for camera_id in ids
+        ]
@@ -2,136 +2,380 @@ import cv2
 import numpy as np
 import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 
-# Stub out mediapipe since the current environment lacks the legacy solutions module
-# and we are processing MediaPipe on the frontend anyway.
-class MockPose:
-    def __init__(self, **kwargs): pass
-    def process(self, image): return None
-    def close(self): pass
+from .beauty_filter import BeautyFilter
+from .capture_pipeline import BufferPool, LatestSlot, PipelineFrame, StageStats
+from .fast_codec import timestamp_ms
+from .frame_broadcast import FrameBroadcaster
+from .frame_sources import FrameSource, open_source
+from .metrics import REGISTRY
+from .pose_backends import PoseBackend, PoseEstimate, PoseRunner, draw_pose
+from .qos_governor import UNRESTRICTED, QosSettings, cap_tier
+from .stream_profiles import FULL, VARIANT_IDLE_S, StreamProfile, VariantStream
+from .video_recorder import VideoRecorder
+
+STEP_SECONDS = REGISTRY.histogram(
+    "vision3_camera_step_seconds",
+    "Time per frame spent in each camera pipeline step (read, flip, beauty, pose, encode, variants).",
+    ["camera", "step"]
+)
 
 class CameraManager:
-    _instance = None
-    _lock = threading.Lock()
-
-    def __new__(cls):
-        with cls._lock:
-            if cls._instance is None:
-                cls._instance = super(CameraManager, cls).__new__(cls)
-                cls._instance._initialized = False
-            return cls._instance
-
-    def __init__(self):
-        if self._initialized:
-            return
-            
+    """Capture pipeline of one camera; ``CameraPool`` keeps one per camera id."""
+
+    STAGES = ("capture", "enhance", "infer", "encode")
+
+    def __init__(self, source: Union[int, str] = 0, camera_id: str = "0"):
+        # A device index, a virtual source ("synthetic:", "file:", "images:"),
+        # or anything else cv2.VideoCapture opens (file, URL)
+        self.source = source
+        self.camera_id = camera_id
         self.cap = None
         self.is_running = False
         self.current_frame = None
-        self.latest_results = None
-        self.thread = None
+        # Viewers await new frames here instead of polling current_frame
+        self.frames = FrameBroadcaster()
+        # Lower-resolution/quality/rate copies of the preview, encoded only while watched
+        self._variants: Dict[Any, VariantStream] = {}
+        self._variants_lock = threading.Lock()
+        # (timestamp, BGR image) of each preview frame before JPEG encoding,
+        # for consumers that encode it themselves (WebRTC); copied only while watched
+        self.raw_frames = FrameBroadcaster()
+        # Server-side recording; gets a copy of each captured frame while set
+        self.recorder: Optional[VideoRecorder] = None
+        self.threads = []
+
+        # Stages hand frames over through single-slot queues: capture feeds
+        # enhance and infer, enhance feeds encode
+        self.stats = {stage: StageStats() for stage in self.STAGES}
+        self._sequence = 0
+        # Virtual sources stamp frames with media time, offset to when they started
+        self._media_epoch: Optional[int] = None
+        self._enhance_slot = LatestSlot()
+        self._infer_slot = LatestSlot()
+        self._encode_slot = LatestSlot()
+        self._raw_buffers = BufferPool()
+        self._enhanced_buffers = BufferPool()
         
-        # Stubbed MediaPipe setup
-        self.mp_pose = None
-        self.pose = MockPose()
-        self.mp_draw = None
+        # Pose inference; the backend is created on first start. The infer stage
+        # holds the lock while it runs a frame, so a swapped-out runner is idle
+        self.pose: Optional[PoseRunner] = None
+        self._pose_lock = threading.Lock()
+        self.draw_landmarks = True
         
         # Beauty settings
         self.enable_beauty = True
-        self.beauty_strength = 5
-        
-        self._initialized = True
+        self.beauty = BeautyFilter.from_env()
+
+        # Preview settings; the QoS governor may cap them under load
+        self.jpeg_quality = 90
+        self.preview_scale = 1.0
+        self.qos = UNRESTRICTED
 
-    def start(self, device_index: int = 0):
+    def start(self, device_index: Optional[Union[int, str]] = None):
         if self.is_running:
-            return
+            return True
             
-        self.cap = cv2.VideoCapture(device_index)
+        if self.pose is None:
+            self.pose = PoseRunner.from_env()
+
+        source = self.source if device_index is None else device_index
+        try:
+            self.cap = open_source(source)
+        except ValueError as e:
+            print(f"Error: Invalid camera source {source}: {e}")
+            return False
         if not self.cap.isOpened():
-            print(f"Error: Could not open camera {device_index}")
+            print(f"Error: Could not open camera {source}")
+            self.cap = None
             return False
-            
-        self.is_running = True
-        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
-        self.thread.start()
-        print("Camera Manager started")
+        self._start_stages()
+        print(f"Camera {self.camera_id} started")
         return True
 
+    def _start_stages(self):
+        self.is_running = True
+        self._media_epoch = timestamp_ms() if isinstance(self.cap, FrameSource) else None
+        for slot in self._slots():
+            slot.reopen()
+        self.threads = [
+            threading.Thread(target=self._run_stage, args=(stage,),
+                             name=f"camera-{self.camera_id}-{stage}", daemon=True)
+            for stage in self.STAGES
+        ]
+        for thread in self.threads:
+            thread.start()
+
     def stop(self):
         self.is_running = False
-        if self.thread:
-            self.thread.join(timeout=2)
+        # Wakes stages blocked on an empty slot
+        for slot in self._slots():
+            slot.close()
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.threads = []
         if self.cap:
             self.cap.release()
         self.cap = None
-        print("Camera Manager stopped")
+        # Nothing more to record; finish the last segment
+        self.stop_recording()
+        print(f"Camera {self.camera_id} stopped")
+
+    @property
+    def recording(self) -> bool:
+        return self.recorder is not None
+
+    def start_recording(self, recorder: VideoRecorder) -> None:
+        """Record captured frames (unmirrored, before beauty and QoS scaling) with ``recorder``."""
+        if self.recorder is not None:
+            raise RuntimeError(f"Camera {self.camera_id} is already recording")
+        self.recorder = recorder
+
+    def stop_recording(self) -> Optional[Dict[str, Any]]:
+        """Finish the recording, waiting for queued frames to be encoded; its summary, if any."""
+        recorder, self.recorder = self.recorder, None
+        return recorder.close() if recorder is not None else None
 
-    def _apply_beauty(self, frame):
+    def set_pose_backend(self, backend: PoseBackend, every: Optional[int] = None, width: Optional[int] = None):
+        """Swap the pose model; takes effect from the next captured frame."""
+        runner = PoseRunner.from_env(backend)
+        if every is not None:
+            runner.every = max(1, every)
+        if width is not None:
+            runner.width = width
+        # Waits for the frame in flight, so the old runner is not closed under it
+        with self._pose_lock:
+            previous, self.pose = self.pose, runner
+        if previous is not None:
+            previous.close()
+
+    @property
+    def beauty_strength(self) -> int:
+        return self.beauty.strength
+
+    @beauty_strength.setter
+    def beauty_strength(self, strength: int):
+        self.beauty.strength = strength
+
+    def effective_qos(self, limits: Optional[QosSettings] = None) -> QosSettings:
+        """The settings the stages use: configured values capped by ``limits`` (default ``qos``)."""
+        limits = self.qos if limits is None else limits
+        return QosSettings(
+            beauty_tier=cap_tier(self.beauty.tier if self.enable_beauty else "off", limits.beauty_tier),
+            jpeg_quality=min(self.jpeg_quality, limits.jpeg_quality),
+            preview_scale=min(self.preview_scale, limits.preview_scale),
+            pose_throttle=limits.pose_throttle
+        )
+
+    def _apply_beauty(self, frame, tier: Optional[str] = None):
         if not self.enable_beauty:
             return frame
-            
-        # 1. Skin Smoothing (Bilateral Filter)
-        # This is computationally expensive but looks great
-        smooth = cv2.bilateralFilter(frame, d=9, sigmaColor=75, sigmaSpace=75)
-        
-        # 2. Brightness & Contrast (Automatic)
-        # Convert to LAB for better luminance control
-        lab = cv2.cvtColor(smooth, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        cl = clahe.apply(l)
-        limg = cv2.merge((cl,a,b))
-        enhanced = cv2.cvtColor(limg, cv2.COLOR_LAB2BGR)
-        
-        # 3. Subtle Color Boost
-        hsv = cv2.cvtColor(enhanced, cv2.COLOR_BGR2HSV).astype(np.float32)
-        hsv[:,:,1] *= 1.1 # Increase saturation by 10%
-        hsv[:,:,1] = np.clip(hsv[:,:,1], 0, 255)
-        enhanced = cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
-        
-        return enhanced
+        return self.beauty.apply(frame, tier)
+
+    def _slots(self):
+        return (self._enhance_slot, self._infer_slot, self._encode_slot)
+
+    def queue_stats(self) -> Dict[str, Dict[str, int]]:
+        """Frames waiting in, and dropped from, the queue in front of each stage."""
+        slots = {"enhance": self._enhance_slot, "infer": self._infer_slot, "encode": self._encode_slot}
+        return {stage: {"depth": slot.depth, "dropped": slot.dropped} for stage, slot in slots.items()}
+
+    def stage_stats(self) -> Dict[str, Any]:
+        """Per-stage fps and cost, plus frames each queue dropped for a slow consumer."""
+        stats = {stage: self.stats[stage].snapshot() for stage in self.STAGES}
+        for stage, queue in self.queue_stats().items():
+            stats[stage]["dropped"] = queue["dropped"]
+        return stats
 
-    def _capture_loop(self):
+    def _run_stage(self, stage: str):
+        step = getattr(self, f"_{stage}_step")
+        stats = self.stats[stage]
         while self.is_running:
-            success, frame = self.cap.read()
-            if not success:
+            try:
+                # Steps return when their work started, so waiting for input is not counted
+                started = step()
+                if started is not None:
+                    stats.record(started)
+            except Exception as e:
+                print(f"Camera {self.camera_id} {stage} stage error: {e}")
                 time.sleep(0.1)
-                continue
-                
-            # Flip frame for mirror effect
-            frame = cv2.flip(frame, 1)
-            
-            # Apply Beauty Pipeline
-            frame = self._apply_beauty(frame)
-            
-            # Process with Mediapipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.pose.process(rgb_frame)
-            
-            # Draw landmarks on frame with high quality anti-aliasing
-            if results.pose_landmarks:
-                self.mp_draw.draw_landmarks(
-                    frame, 
-                    results.pose_landmarks, 
-                    self.mp_pose.POSE_CONNECTIONS,
-                    self.mp_draw.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                    self.mp_draw.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=2)
-                )
-                self.latest_results = results.pose_landmarks
+
+    def _capture_step(self) -> Optional[float]:
+        started = time.perf_counter()
+        shape = self._raw_buffers.shape
+        buffer = self._raw_buffers.acquire(shape) if shape is not None else None
+        success, frame = self.cap.read(buffer) if buffer is not None else self.cap.read()
+        if not success:
+            if buffer is not None:
+                self._raw_buffers.release(buffer)
+            time.sleep(0.1)
+            return None
+        # Includes waiting for the device, which paces a real camera
+        STEP_SECONDS.observe(time.perf_counter() - started, self.camera_id, "read")
+        if frame is not buffer:
+            # First frame or a resolution change: recycle frames of this size
+            self._raw_buffers.reset(frame.shape)
+        self._sequence += 1
+        if self._media_epoch is None:
+            timestamp = timestamp_ms()
+        else:
+            timestamp = self._media_epoch + int(self.cap.timestamp)
+        recorder = self.recorder
+        if recorder is not None:
+            # Copies into the recorder's bounded queue; drops instead of waiting when it is full
+            recorder.offer(timestamp, frame)
+        captured = PipelineFrame(self._sequence, timestamp, frame, self._raw_buffers, refs=2)
+        self._infer_slot.put(captured)
+        self._enhance_slot.put(captured)
+        return started
+
+    def _infer_step(self) -> Optional[float]:
+        frame = self._infer_slot.get(timeout=0.1)
+        if frame is None:
+            return None
+        started = time.perf_counter()
+        try:
+            with self._pose_lock:
+                pose = self.pose
+                if pose is None:
+                    return None
+                # Runs on the raw frame so left/right stay anatomical; the image
+                # coordinates are mirrored to match the preview instead
+                pose.throttle = self.qos.pose_throttle
+                inferences = pose.inferences
+                pose.submit(frame.image, frame.timestamp, mirror=True)
+            # Only frames that actually ran the model count towards its fps
+            if pose.inferences == inferences:
+                return None
+            STEP_SECONDS.observe(time.perf_counter() - started, self.camera_id, "pose")
+            return started
+        finally:
+            frame.release()
+
+    def _enhance_step(self) -> Optional[float]:
+        frame = self._enhance_slot.get(timeout=0.1)
+        if frame is None:
+            return None
+        started = time.perf_counter()
+        settings = self.effective_qos()
+        try:
+            image = frame.image
+            if settings.preview_scale < 1.0:
+                height, width = image.shape[:2]
+                size = (int(width * settings.preview_scale) & ~1, int(height * settings.preview_scale) & ~1)
+                scaled = self._enhanced_buffers.acquire((size[1], size[0]) + image.shape[2:])
+                # Flip frame for mirror effect, in place after downscaling
+                flipped = cv2.flip(cv2.resize(image, size, dst=scaled, interpolation=cv2.INTER_AREA), 1, dst=scaled)
+            else:
+                # Flip frame for mirror effect, into a recycled buffer
+                flipped = cv2.flip(image, 1, dst=self._enhanced_buffers.acquire(image.shape))
+        finally:
+            frame.release()
+        flipped_at = time.perf_counter()
+        STEP_SECONDS.observe(flipped_at - started, self.camera_id, "flip")
+        
+        # Apply Beauty Pipeline
+        enhanced = self._apply_beauty(flipped, settings.beauty_tier)
+        STEP_SECONDS.observe(time.perf_counter() - flipped_at, self.camera_id, "beauty")
+        if enhanced is flipped:
+            self._encode_slot.put(PipelineFrame(frame.sequence, frame.timestamp, flipped, self._enhanced_buffers))
+        else:
+            self._enhanced_buffers.release(flipped)
+            self._encode_slot.put(PipelineFrame(frame.sequence, frame.timestamp, enhanced))
+        return started
+
+    def _encode_step(self) -> Optional[float]:
+        frame = self._encode_slot.get(timeout=0.1)
+        if frame is None:
+            return None
+        started = time.perf_counter()
+        try:
+            image = frame.image
+            estimate = self.get_latest_landmarks()
+            if estimate is not None and self.draw_landmarks:
+                draw_pose(image, estimate)
             
             # Add a subtle "Live" watermark for professionalism
-            cv2.putText(frame, "AI LIVE", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2, cv2.LINE_AA)
-            
-            # Update current frame
-            ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
-            if ret:
-                self.current_frame = buffer.tobytes()
+            cv2.putText(image, "AI LIVE", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2, cv2.LINE_AA)
             
-            time.sleep(0.01)
+            quality = self.effective_qos().jpeg_quality
+            ret, buffer = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+            if not ret:
+                return None
+            STEP_SECONDS.observe(time.perf_counter() - started, self.camera_id, "encode")
+            self.current_frame = buffer.tobytes()
+            self.frames.publish(self.current_frame)
+            self._publish_variants(image, self.current_frame, quality)
+            if self.raw_frames.subscribers:
+                # The image goes back to the buffer pool below
+                self.raw_frames.publish((frame.timestamp, image.copy()))
+        finally:
+            frame.release()
+        return started
+
+    def stream(self, profile: StreamProfile = FULL) -> FrameBroadcaster:
+        """Frames encoded for ``profile``; the base preview stream for ``FULL``."""
+        if profile.key == FULL.key:
+            return self.frames
+        now = time.monotonic()
+        with self._variants_lock:
+            variant = self._variants.get(profile.key)
+            if variant is None:
+                # Profiles come from query strings, so do not keep every one ever asked for
+                self._variants = {
+                    key: v for key, v in self._variants.items()
+                    if v.frames.subscribers or now - v.requested_at < VARIANT_IDLE_S
+                }
+                variant = self._variants[profile.key] = VariantStream(profile, now)
+            variant.requested_at = now
+            return variant.frames
+
+    @property
+    def viewers(self) -> int:
+        """Viewers of the base stream, of every variant and of the raw frames."""
+        with self._variants_lock:
+            variants = list(self._variants.values())
+        return self.frames.subscribers + self.raw_frames.subscribers + sum(v.frames.subscribers for v in variants)
+
+    def variant_stats(self):
+        with self._variants_lock:
+            variants = list(self._variants.values())
+        return [
+            {**variant.profile._asdict(), "viewers": variant.frames.subscribers}
+            for variant in variants if variant.frames.subscribers
+        ]
+
+    def _publish_variants(self, image: np.ndarray, base: bytes, base_quality: int):
+        """Encode each watched variant that is due, once however many viewers it has."""
+        with self._variants_lock:
+            variants = [v for v in self._variants.values() if v.frames.subscribers]
+        if not variants:
+            return
+        started = time.perf_counter()
+        height, width = image.shape[:2]
+        resized: Dict[int, np.ndarray] = {width: image}
+        encoded: Dict[Any, bytes] = {(width, base_quality): base}
+        for variant in variants:
+            if not variant.due(started):
+                continue
+            # Never above what the base stream uses, which the QoS governor may cap
+            target = min(variant.profile.width or width, width)
+            quality = min(variant.profile.quality, base_quality)
+            data = encoded.get((target, quality))
+            if data is None:
+                if target not in resized:
+                    size = (target, max(2, round(height * target / width)))
+                    resized[target] = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+                ret, buffer = cv2.imencode('.jpg', resized[target], [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+                if not ret:
+                    continue
+                data = encoded[(target, quality)] = buffer.tobytes()
+            variant.frames.publish(data)
+        STEP_SECONDS.observe(time.perf_counter() - started, self.camera_id, "variants")
 
     def get_video_frame(self):
         return self.current_frame
 
-    def get_latest_landmarks(self):
-        return self.latest_results
+    def get_latest_landmarks(self) -> Optional[PoseEstimate]:
+        return self.pose.latest if self.pose is not None else None
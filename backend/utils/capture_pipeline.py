@@ -0,0 +1,149 @@
+"""Building blocks for the staged camera pipeline.
+
+Stages run on their own threads and hand frames to each other through
+``LatestSlot``s: single-item queues where a new frame replaces one the
+next stage has not picked up yet, so a slow stage drops frames instead of
+building latency. Frame images come from ``BufferPool``s and are returned
+when every stage holding them has released them, so the steady state
+allocates no new frame buffers.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class BufferPool:
+    """Recycles equally shaped image buffers."""
+
+    def __init__(self, keep: int = 4):
+        self.keep = keep
+        self.allocated = 0
+        self._shape: Optional[Tuple[int, ...]] = None
+        self._free: List[np.ndarray] = []
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self) -> Optional[Tuple[int, ...]]:
+        return self._shape
+
+    def reset(self, shape: Tuple[int, ...]) -> None:
+        """Recycle buffers of ``shape`` from now on, dropping any of another size."""
+        with self._lock:
+            if shape != self._shape:
+                self._shape = shape
+                self._free.clear()
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        self.reset(shape)
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.allocated += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buffer: np.ndarray) -> None:
+        with self._lock:
+            if buffer.shape == self._shape and len(self._free) < self.keep:
+                self._free.append(buffer)
+
+
+class PipelineFrame:
+    """An image moving through the stages, returned to its pool on last release."""
+
+    __slots__ = ("sequence", "timestamp", "image", "_pool", "_refs", "_lock")
+
+    def __init__(self, sequence: int, timestamp: int, image: np.ndarray,
+                 pool: Optional[BufferPool] = None, refs: int = 1):
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.image = image
+        self._pool = pool
+        self._refs = refs
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._lock:
+            self._refs -= 1
+            last = self._refs == 0
+        if last and self._pool is not None:
+            self._pool.release(self.image)
+
+
+class LatestSlot:
+    """Single-slot hand-off between two stage threads; newest frame wins."""
+
+    def __init__(self):
+        self.dropped = 0
+        self._item: Optional[PipelineFrame] = None
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def depth(self) -> int:
+        return 0 if self._item is None else 1
+
+    def put(self, item: PipelineFrame) -> None:
+        with self._cond:
+            if self._closed:
+                replaced = item
+            else:
+                replaced, self._item = self._item, item
+                self._cond.notify()
+        if replaced is not None:
+            if replaced is not item:
+                self.dropped += 1
+            replaced.release()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[PipelineFrame]:
+        """Take the pending frame, waiting up to ``timeout``; None if there is none."""
+        with self._cond:
+            if self._item is None and not self._closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            item, self._item = self._item, None
+            self._cond.notify_all()
+        if item is not None:
+            item.release()
+
+    def reopen(self) -> None:
+        with self._cond:
+            self._closed = False
+
+
+class StageStats:
+    """Throughput and per-frame cost of one stage, updated by its thread."""
+
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self.frames = 0
+        self.fps = 0.0
+        self.ms = 0.0  # Moving average of the time spent per frame
+        self._window_start = time.perf_counter()
+        self._window_frames = 0
+
+    def record(self, started: float) -> None:
+        now = time.perf_counter()
+        cost = (now - started) * 1000
+        self.ms = cost if self.frames == 0 else self.ms * 0.9 + cost * 0.1
+        self.frames += 1
+        self._window_frames += 1
+        elapsed = now - self._window_start
+        if elapsed >= self.window:
+            self.fps = self._window_frames / elapsed
+            self._window_start = now
+            self._window_frames = 0
+
+    def snapshot(self) -> Dict[str, float]:
+        fps = self.fps
+        elapsed = time.perf_counter() - self._window_start
+        if elapsed >= 2 * self.window:
+            # Stage stalled: do not keep reporting the last good rate
+            fps = self._window_frames / elapsed
+        return {"fps": round(fps, 1), "ms": round(self.ms, 2), "frames": self.frames}
@@ -0,0 +1,97 @@
+"""Dead-band suppression of repeated analysis results.
+
+A result is only forwarded when one of its values has moved more than its
+epsilon away from the value last *sent* (so slow drift still gets through
+once it adds up), when a value appears or disappears, or when the set of
+posture issues or their severities changes (or the result carries an
+annotation diff). Otherwise the client gets at
+most a HEARTBEAT every ``heartbeat_ms`` so it can tell a still patient from
+a dead connection.
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .fast_codec import dumps
+
+# Default dead bands: posture metrics are degrees unless listed in
+# RATIO_EPSILONS, joint angles are degrees.
+DEFAULT_METRIC_EPSILON = 0.5
+DEFAULT_ANGLE_EPSILON = 1.0
+RATIO_EPSILONS = {"headForward": 0.02, "shoulderRounded": 0.02, "headDeviation": 0.02}
+DEFAULT_HEARTBEAT_MS = 1000.0
+
+
+def _numeric(values: Iterable[Tuple[str, Any]]) -> Dict[str, Optional[float]]:
+    # Non-numeric metrics (e.g. head_axes) follow the angles they are drawn from
+    return {key: value for key, value in values if value is None or isinstance(value, (int, float))}
+
+
+class ChangeSuppressor:
+    """Per-connection filter deciding which results are worth sending."""
+
+    def __init__(
+        self,
+        metric_epsilon: float = DEFAULT_METRIC_EPSILON,
+        angle_epsilon: float = DEFAULT_ANGLE_EPSILON,
+        epsilons: Optional[Dict[str, float]] = None,
+        heartbeat_ms: float = DEFAULT_HEARTBEAT_MS
+    ):
+        self.metric_epsilon = metric_epsilon
+        self.angle_epsilon = angle_epsilon
+        # Overrides keyed by metric name or measurement id
+        self.epsilons = {**RATIO_EPSILONS, **(epsilons or {})}
+        self.heartbeat_ms = heartbeat_ms
+        self.suppressed = 0
+        # Last sent values per result type
+        self._sent_values: Dict[str, Dict[str, Optional[float]]] = {}
+        self._sent_issues: Dict[str, str] = {}
+        self._last_sent_at: Optional[int] = None
+
+    def reset(self) -> None:
+        self._sent_values.clear()
+        self._sent_issues = {}
+        self._last_sent_at = None
+
+    def changed(self, result: Any) -> bool:
+        """Whether ``result`` (a ``FrameResult``) differs from what was last sent."""
+        if result.results is not None:
+            values = _numeric(result.results)
+            default = self.angle_epsilon
+            issues = None
+        else:
+            values = _numeric((result.metrics or {}).items())
+            default = self.metric_epsilon
+            issues = dict(result.issues or ())
+
+        sent = self._sent_values.get(result.type)
+        changed = (
+            sent is None
+            or sent.keys() != values.keys()
+            or (issues is not None and issues != self._sent_issues)
+            or any(self._moved(key, sent[key], value, default) for key, value in values.items())
+        )
+        if changed:
+            self._sent_values[result.type] = values
+            if issues is not None:
+                self._sent_issues = issues
+        return changed
+
+    def _moved(self, key: str, old: Optional[float], new: Optional[float], default: float) -> bool:
+        if old is None or new is None:
+            return (old is None) != (new is None)
+        return abs(new - old) > self.epsilons.get(key, default)
+
+    def filter(self, result: Any) -> Optional[str]:
+        """Return the message to send for ``result``: its body, a heartbeat or nothing."""
+        # Annotation diffs are only sent once, so they must never be dropped
+        if self.changed(result) or result.annotations_changed:
+            self._last_sent_at = result.timestamp
+            return result.body
+
+        self.suppressed += 1
+        if self.heartbeat_ms <= 0 or result.timestamp - self._last_sent_at < self.heartbeat_ms:
+            return None
+        self._last_sent_at = result.timestamp
+        return self.heartbeat(result.timestamp)
+
+    def heartbeat(self, timestamp: int) -> str:
+        return dumps({"type": "HEARTBEAT", "suppressed": self.suppressed, "timestamp": timestamp})
@@ -0,0 +1,69 @@
+"""Fast serialization for the ``/ws/analyze`` hot path.
+
+Responses are encoded straight from plain dicts and tuples with ``orjson``
+(falling back to the standard library when it is not installed) instead of
+building and validating ``AnalysisResponse`` / ``JointAnalysisResponse``
+models for every frame. The output matches those models' JSON field for
+field.
+
+Set ``VISION3_STRICT_VALIDATION=1`` (or send ``"strict": true`` in
+NEGOTIATE) to go back to full Pydantic validation while debugging.
+"""
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+STRICT_VALIDATION = os.environ.get("VISION3_STRICT_VALIDATION", "0") == "1"
+
+
+def dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def timestamp_ms() -> int:
+    # Same clock as the response models' default_factory
+    return int(datetime.now().timestamp() * 1000)
+
+
+def model_fields(model: Any) -> Dict[str, Any]:
+    """Field values of a model, without copying."""
+    return model.__dict__
+
+
+def encode_analysis_result(
+    metrics: Any,
+    issues: Iterable[Any],
+    timestamp: int,
+    annotations: Iterable[Any] = (),
+    removed_annotations: Optional[Sequence[str]] = None
+) -> str:
+    return dumps({
+        "type": "ANALYSIS_RESULT",
+        "metrics": model_fields(metrics),
+        "issues": [model_fields(issue) for issue in issues],
+        "annotations": [model_fields(annotation) for annotation in annotations],
+        "removedAnnotations": removed_annotations,
+        "timestamp": timestamp,
+    })
+
+
+def encode_joint_result(results: Sequence[Tuple[str, Optional[float]]], timestamp: int) -> str:
+    return dumps({
+        "type": "JOINT_RESULT",
+        "results": [{"id": m_id, "angle": angle} for m_id, angle in results],
+        "timestamp": timestamp,
+    })
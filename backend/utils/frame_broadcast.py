@@ -0,0 +1,86 @@
+"""Fan-out of camera frames from the capture thread to async viewers.
+
+The capture thread ``publish``es each encoded frame once; every viewer
+awaits the next sequence number instead of polling, and all viewers share
+the same ``bytes`` object. A viewer that falls behind simply gets the
+newest frame when it next asks, so one slow connection never queues up
+frames or holds back the others.
+"""
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+
+def _wake(waiters: List[asyncio.Future]) -> None:
+    for waiter in waiters:
+        if not waiter.done():
+            waiter.set_result(None)
+
+
+class FrameBroadcaster:
+    """Latest-frame buffer with sequence numbers and async waiters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._frame: Optional[bytes] = None
+        self._waiters: Dict[asyncio.AbstractEventLoop, List[asyncio.Future]] = {}
+        self.subscribers = 0
+
+    @property
+    def latest(self) -> Tuple[int, Optional[bytes]]:
+        with self._lock:
+            return self._sequence, self._frame
+
+    def publish(self, frame: bytes) -> int:
+        """Store ``frame`` as the newest one and wake every waiting viewer.
+
+        Safe to call from any thread; costs one callback per event loop with
+        viewers waiting, however many viewers there are.
+        """
+        with self._lock:
+            self._sequence += 1
+            self._frame = frame
+            waiters, self._waiters = self._waiters, {}
+            sequence = self._sequence
+        for loop, futures in waiters.items():
+            try:
+                loop.call_soon_threadsafe(_wake, futures)
+            except RuntimeError:
+                pass  # Loop already closed
+        return sequence
+
+    async def next_frame(self, after: int, timeout: Optional[float] = None) -> Tuple[int, bytes]:
+        """Wait for a frame newer than sequence ``after``; returns ``(sequence, frame)``.
+
+        Raises ``asyncio.TimeoutError`` if none arrives within ``timeout`` seconds.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._sequence > after and self._frame is not None:
+                    return self._sequence, self._frame
+                waiter = loop.create_future()
+                self._waiters.setdefault(loop, []).append(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout)
+            finally:
+                # No-op when woken: publish already took the waiter list
+                self._discard(loop, waiter)
+
+    def _discard(self, loop: asyncio.AbstractEventLoop, waiter: asyncio.Future) -> None:
+        with self._lock:
+            waiters = self._waiters.get(loop)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+
+    async def subscribe(self) -> AsyncIterator[Tuple[int, bytes]]:
+        """Yield ``(sequence, frame)`` for every frame this viewer keeps up with."""
+        self.subscribers += 1
+        try:
+            sequence = 0
+            while True:
+                sequence, frame = await self.next_frame(sequence)
+                yield sequence, frame
+        finally:
+            self.subscribers -= 1
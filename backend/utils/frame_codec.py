@@ -0,0 +1,138 @@
+"""Binary landmark frame protocol for ``/ws/analyze``.
+
+A binary frame is a fixed little-endian header followed by packed float32
+landmarks (x, y, z, visibility), optionally followed by the same number of
+world landmarks::
+
+    version:u8  msg_type:u8  view:u8  flags:u8  width:u16  height:u16  count:u16
+    float32[count][4] landmarks
+    float32[count][4] world landmarks   (only if flags & FLAG_WORLD_LANDMARKS)
+
+Decoding is a single ``np.frombuffer`` per array; no per-landmark objects are
+created.
+"""
+import struct
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+PROTOCOL_VERSION = 1
+
+HEADER = struct.Struct('<BBBBHHH')
+LANDMARK_DTYPE = np.dtype('<f4')
+LANDMARK_FIELDS = 4  # x, y, z, visibility
+
+FLAG_WORLD_LANDMARKS = 0x01
+
+MESSAGE_TYPES = {1: "POSTURE_SYNC", 2: "JOINT_ANALYSIS"}
+MESSAGE_CODES = {name: code for code, name in MESSAGE_TYPES.items()}
+
+VIEWS = {0: "front", 1: "back", 2: "side"}
+VIEW_CODES = {name: code for code, name in VIEWS.items()}
+
+# What a malformed frame raises while it is decoded and analyzed; callers
+# report the frame as bad and keep going
+FRAME_ERRORS = (AttributeError, IndexError, KeyError, TypeError, ValueError)
+
+
+class FrameDecodeError(ValueError):
+    """Raised when a binary frame is malformed."""
+
+
+class LandmarkFrame(NamedTuple):
+    type: str
+    view: str
+    width: int
+    height: int
+    landmarks: np.ndarray  # (count, 4) float32
+    world_landmarks: Optional[np.ndarray] = None
+
+
+def decode_frame(data: bytes) -> LandmarkFrame:
+    if len(data) < HEADER.size:
+        raise FrameDecodeError(f"Frame too short: {len(data)} bytes")
+    version, msg_type, view, flags, width, height, count = HEADER.unpack_from(data)
+    if version != PROTOCOL_VERSION:
+        raise FrameDecodeError(f"Unsupported protocol version {version}")
+    if msg_type not in MESSAGE_TYPES:
+        raise FrameDecodeError(f"Unknown message type {msg_type}")
+    if view not in VIEWS:
+        raise FrameDecodeError(f"Unknown view {view}")
+
+    has_world = bool(flags & FLAG_WORLD_LANDMARKS)
+    values = count * LANDMARK_FIELDS
+    expected = HEADER.size + values * LANDMARK_DTYPE.itemsize * (2 if has_world else 1)
+    if len(data) != expected:
+        raise FrameDecodeError(f"Expected {expected} bytes for {count} landmarks, got {len(data)}")
+
+    landmarks = np.frombuffer(data, dtype=LANDMARK_DTYPE, count=values, offset=HEADER.size)
+    world = None
+    if has_world:
+        world = np.frombuffer(data, dtype=LANDMARK_DTYPE, count=values,
+                              offset=HEADER.size + values * LANDMARK_DTYPE.itemsize)
+        world = world.reshape(count, LANDMARK_FIELDS)
+
+    return LandmarkFrame(
+        type=MESSAGE_TYPES[msg_type],
+        view=VIEWS[view],
+        width=width,
+        height=height,
+        landmarks=landmarks.reshape(count, LANDMARK_FIELDS),
+        world_landmarks=world,
+    )
+
+
+def encode_frame(
+    msg_type: str,
+    landmarks: np.ndarray,
+    width: int,
+    height: int,
+    view: str = "front",
+    world_landmarks: Optional[np.ndarray] = None
+) -> bytes:
+    """Pack landmarks into a binary frame (used by clients, tools and tests)."""
+    landmarks = np.ascontiguousarray(landmarks, dtype=LANDMARK_DTYPE)
+    if landmarks.ndim != 2 or landmarks.shape[1] != LANDMARK_FIELDS:
+        raise ValueError(f"Expected (count, {LANDMARK_FIELDS}) landmarks, got {landmarks.shape}")
+    flags = 0
+    payload = landmarks.tobytes()
+    if world_landmarks is not None:
+        world_landmarks = np.ascontiguousarray(world_landmarks, dtype=LANDMARK_DTYPE)
+        if world_landmarks.shape != landmarks.shape:
+            raise ValueError("world_landmarks must have the same shape as landmarks")
+        flags |= FLAG_WORLD_LANDMARKS
+        payload += world_landmarks.tobytes()
+    header = HEADER.pack(PROTOCOL_VERSION, MESSAGE_CODES[msg_type], VIEW_CODES[view],
+                         flags, width, height, landmarks.shape[0])
+    return header + payload
+
+
+def landmarks_to_array(landmarks, dtype=LANDMARK_DTYPE) -> np.ndarray:
+    """Convert ``Landmark`` models or dicts to a (count, 4) array (float32 by default)."""
+    rows = []
+    for lm in landmarks:
+        if isinstance(lm, dict):
+            z, visibility = lm.get("z"), lm.get("visibility")
+            rows.append((lm["x"], lm["y"], z or 0.0, 1.0 if visibility is None else visibility))
+        else:
+            rows.append((lm.x, lm.y, lm.z or 0.0, 1.0 if lm.visibility is None else lm.visibility))
+    return np.array(rows, dtype=dtype).reshape(-1, LANDMARK_FIELDS)
+
+
+def frame_from_message(message: dict) -> LandmarkFrame:
+    """Build a ``LandmarkFrame`` from a JSON frame message without Pydantic.
+
+    JSON coordinates are already doubles, so they stay float64 to match the
+    results of the model-based path exactly. Like ``AnalysisRequest``, a
+    posture frame without ``view`` raises (KeyError) instead of defaulting.
+    """
+    world = message.get("worldLandmarks")
+    kind = message["type"]
+    return LandmarkFrame(
+        type=kind,
+        view=message["view"] if kind == "POSTURE_SYNC" else message.get("view", "front"),
+        width=int(message["width"]),
+        height=int(message["height"]),
+        landmarks=landmarks_to_array(message["landmarks"], np.float64),
+        world_landmarks=landmarks_to_array(world, np.float64) if world else None,
+    )
@@ -0,0 +1,257 @@
+"""Virtual camera sources, for running the capture pipeline without a webcam.
+
+Each source reads like ``cv2.VideoCapture`` (``isOpened``, ``read(image)``,
+``release``), so ``CameraManager`` drives it like a device, and also
+reports ``timestamp``: the media time in ms of the frame just read,
+starting at 0 and increasing across loops.
+
+* ``SyntheticSource``: a deterministic moving test pattern.
+* ``VideoFileSource``: frames of a video file, stamped with their PTS.
+* ``ImageSequenceSource``: a directory or glob of images at a fixed rate.
+
+``pace="realtime"`` delivers frames no faster than their timestamps, like
+a camera; ``pace="fast"`` delivers them as fast as they are read, for
+throughput measurements.
+
+``open_source`` turns a camera source setting into a capture object.
+Virtual sources are written ``kind:argument?option=value&...``::
+
+    synthetic:?size=1280x720&fps=30
+    file:/data/clips/squat.mp4?pace=fast&loop=0
+    images:/data/frames/*.png?fps=15
+
+Anything else (a device index, a file path or stream URL) goes to
+``cv2.VideoCapture`` as before.
+"""
+import glob
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl
+
+import cv2
+import numpy as np
+
+PACES = ("realtime", "fast")
+DEFAULT_FPS = 30.0
+DEFAULT_SIZE = (1280, 720)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class FrameSource:
+    """Base of the virtual sources: pacing, looping and timestamps."""
+
+    def __init__(self, fps: float = DEFAULT_FPS, pace: str = "realtime", loop: bool = True):
+        if pace not in PACES:
+            raise ValueError(f"Unknown pace: {pace}")
+        if fps <= 0:
+            raise ValueError("fps must be positive")
+        self.fps = fps
+        self.pace = pace
+        self.loop = loop
+        self.frames = 0
+        self.timestamp = 0.0
+        self._offset_ms = 0.0
+        self._started: Optional[float] = None
+        self._opened = True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._opened:
+            return False, None
+        frame, position_ms = self._next(image)
+        if frame is None and self.loop and self.frames:
+            # Timestamps keep increasing across loops, one frame interval apart
+            self._offset_ms = self.timestamp + 1000.0 / self.fps
+            self._rewind()
+            frame, position_ms = self._next(image)
+        if frame is None:
+            return False, None
+        self.timestamp = self._offset_ms + position_ms
+        self.frames += 1
+        if self.pace == "realtime":
+            self._wait_until(self.timestamp)
+        return True, frame
+
+    def _wait_until(self, timestamp_ms: float) -> None:
+        now = time.perf_counter()
+        if self._started is None:
+            self._started = now - timestamp_ms / 1000.0
+        delay = self._started + timestamp_ms / 1000.0 - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def release(self) -> None:
+        self._opened = False
+
+    def _next(self, image: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], float]:
+        """The next frame (into ``image`` when it fits) and its position in ms."""
+        raise NotImplementedError
+
+    def _rewind(self) -> None:
+        raise NotImplementedError
+
+
+def _into(image: Optional[np.ndarray], frame: np.ndarray) -> np.ndarray:
+    # Write into the caller's buffer so the capture stage can keep recycling it
+    if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+        np.copyto(image, frame)
+        return image
+    return frame
+
+
+class SyntheticSource(FrameSource):
+    """A pattern scrolling one step per frame, with the frame number drawn on it.
+
+    Frame ``n`` is the same on every run, so throughput and output are
+    reproducible. Frames are textured rather than flat so that smoothing
+    and JPEG encoding cost about what they cost on camera images.
+    """
+
+    def __init__(self, width: int = DEFAULT_SIZE[0], height: int = DEFAULT_SIZE[1],
+                 fps: float = DEFAULT_FPS, pace: str = "realtime", frame_count: int = 0, seed: int = 0):
+        super().__init__(fps, pace, loop=True)
+        self.width = width
+        self.height = height
+        # 0 is endless; otherwise the pattern repeats, and its timestamps continue
+        self.frame_count = frame_count
+        self._index = 0
+        self._pattern = self._make_pattern(seed)
+
+    def _make_pattern(self, seed: int) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        y, x = np.mgrid[0:self.height, 0:self.width].astype(np.float32)
+        pattern = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        pattern[:, :, 0] = 128 + 100 * np.sin(x / 40.0)
+        pattern[:, :, 1] = 128 + 100 * np.sin(y / 30.0)
+        pattern[:, :, 2] = 128 + 100 * np.sin((x + y) / 55.0)
+        for _ in range(12):
+            centre = (int(rng.integers(self.width)), int(rng.integers(self.height)))
+            colour = tuple(int(c) for c in rng.integers(0, 256, 3))
+            cv2.circle(pattern, centre, int(rng.integers(10, max(11, self.height // 6))), colour, -1)
+        noise = rng.integers(-12, 13, pattern.shape, dtype=np.int16)
+        return np.clip(pattern.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+    def _next(self, image: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], float]:
+        if self.frame_count and self._index >= self.frame_count:
+            return None, 0.0
+        if image is None or image.shape != self._pattern.shape:
+            image = np.empty_like(self._pattern)
+        shift = (self._index * 4) % self.width
+        image[:, :self.width - shift] = self._pattern[:, shift:]
+        image[:, self.width - shift:] = self._pattern[:, :shift]
+        cv2.putText(image, str(self._index), (20, self.height - 20), cv2.FONT_HERSHEY_SIMPLEX,
+                    1.0, (255, 255, 255), 2, cv2.LINE_AA)
+        position_ms = self._index * 1000.0 / self.fps
+        self._index += 1
+        return image, position_ms
+
+    def _rewind(self) -> None:
+        self._index = 0
+
+
+class VideoFileSource(FrameSource):
+    """Frames of a video file, stamped with their presentation time."""
+
+    def __init__(self, path: str, pace: str = "realtime", loop: bool = True):
+        self.path = path
+        self._capture = cv2.VideoCapture(path)
+        fps = self._capture.get(cv2.CAP_PROP_FPS) if self._capture.isOpened() else 0.0
+        super().__init__(fps if fps > 0 else DEFAULT_FPS, pace, loop)
+        self._opened = self._capture.isOpened()
+        self._index = 0
+
+    def _next(self, image: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], float]:
+        success, frame = self._capture.read(image) if image is not None else self._capture.read()
+        if not success:
+            return None, 0.0
+        position_ms = self._capture.get(cv2.CAP_PROP_POS_MSEC)
+        if position_ms <= 0 and self._index:
+            # Containers without timestamps
+            position_ms = self._index * 1000.0 / self.fps
+        self._index += 1
+        return frame, position_ms
+
+    def _rewind(self) -> None:
+        self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._index = 0
+
+    def release(self) -> None:
+        super().release()
+        self._capture.release()
+
+
+class ImageSequenceSource(FrameSource):
+    """Images from a directory or glob, in name order, at ``fps``.
+
+    Images are decoded as they are read, like frames arriving from a camera
+    driver, so decoding counts towards the capture stage.
+    """
+
+    def __init__(self, pattern: str, fps: float = DEFAULT_FPS, pace: str = "realtime", loop: bool = True):
+        super().__init__(fps, pace, loop)
+        if os.path.isdir(pattern):
+            paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+            paths = [path for path in paths if path.lower().endswith(IMAGE_EXTENSIONS)]
+        else:
+            paths = glob.glob(pattern)
+        self.paths: List[str] = sorted(paths)
+        self._opened = bool(self.paths)
+        self._index = 0
+
+    def _next(self, image: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], float]:
+        while self._index < len(self.paths):
+            index = self._index
+            self._index += 1
+            frame = cv2.imread(self.paths[index], cv2.IMREAD_COLOR)
+            if frame is not None:
+                return _into(image, frame), index * 1000.0 / self.fps
+            print(f"Skipping unreadable image {self.paths[index]}")
+        return None, 0.0
+
+    def _rewind(self) -> None:
+        self._index = 0
+
+
+def _size(value: str) -> Tuple[int, int]:
+    width, _, height = value.lower().partition("x")
+    return int(width), int(height)
+
+
+def _flag(value: str) -> bool:
+    return value.lower() not in ("0", "false", "no", "off")
+
+
+def _synthetic(argument: str, options: Dict[str, str]) -> FrameSource:
+    width, height = _size(options.get("size", "x".join(map(str, DEFAULT_SIZE))))
+    return SyntheticSource(width, height, fps=float(options.get("fps", DEFAULT_FPS)),
+                           pace=options.get("pace", "realtime"),
+                           frame_count=int(options.get("frames", 0)), seed=int(options.get("seed", 0)))
+
+
+def _file(argument: str, options: Dict[str, str]) -> FrameSource:
+    return VideoFileSource(argument, pace=options.get("pace", "realtime"), loop=_flag(options.get("loop", "1")))
+
+
+def _images(argument: str, options: Dict[str, str]) -> FrameSource:
+    return ImageSequenceSource(argument, fps=float(options.get("fps", DEFAULT_FPS)),
+                               pace=options.get("pace", "realtime"), loop=_flag(options.get("loop", "1")))
+
+
+SOURCE_KINDS: Dict[str, Callable[[str, Dict[str, str]], FrameSource]] = {
+    "synthetic": _synthetic,
+    "file": _file,
+    "images": _images,
+}
+
+
+def open_source(source: Union[int, str]) -> Any:
+    """A capture object for a camera source setting; check ``isOpened()`` before use."""
+    if isinstance(source, str):
+        kind, sep, rest = source.partition(":")
+        if sep and kind in SOURCE_KINDS:
+            argument, _, query = rest.partition("?")
+            return SOURCE_KINDS[kind](argument, dict(parse_qsl(query)))
+    return cv2.VideoCapture(source)
@@ -0,0 +1,160 @@
+"""Stateful landmark smoothing in front of the posture and joint analyzers.
+
+``LandmarkSmoother`` runs a One Euro filter over all landmarks at once and can
+optionally chain a constant-velocity Kalman filter to predict ahead by the
+pipeline latency. Landmarks below ``min_visibility`` are gated: they neither
+update the filter state nor move, so an occluded joint holds its last
+reliable position instead of dragging the estimate around.
+
+All state is kept as ``(count, 3)`` arrays; one call processes the whole
+frame in a handful of NumPy operations.
+"""
+import math
+from typing import Optional
+
+import numpy as np
+
+# Frames further apart than this restart the filters instead of smoothing
+# across the gap (e.g. the patient walked out of view).
+MAX_GAP_SECONDS = 1.0
+
+
+def _alpha(cutoff: np.ndarray, dt: float) -> np.ndarray:
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """Vectorized One Euro filter (Casiez et al., CHI 2012).
+
+    Cutoffs are in Hz and ``beta`` scales with speed in normalized
+    coordinates per second.
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.3, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.x_hat: Optional[np.ndarray] = None
+        self.dx_hat: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        self.x_hat = None
+        self.dx_hat = None
+
+    def __call__(self, x: np.ndarray, dt: float, mask: np.ndarray) -> np.ndarray:
+        if self.x_hat is None or self.x_hat.shape != x.shape:
+            self.x_hat = x.copy()
+            self.dx_hat = np.zeros_like(x)
+            return self.x_hat
+
+        dx = (x - self.x_hat) / dt
+        dx_hat = self.dx_hat + _alpha(self.d_cutoff, dt) * (dx - self.dx_hat)
+        cutoff = self.min_cutoff + self.beta * np.abs(dx_hat)
+        x_hat = self.x_hat + _alpha(cutoff, dt) * (x - self.x_hat)
+
+        self.x_hat = np.where(mask, x_hat, self.x_hat)
+        self.dx_hat = np.where(mask, dx_hat, self.dx_hat)
+        return self.x_hat
+
+
+class ConstantVelocityKalman:
+    """Per-coordinate constant-velocity Kalman filter with lead prediction.
+
+    Each coordinate has a (position, velocity) state; the 2x2 covariance is
+    stored as three arrays (p00, p01, p11).
+    """
+
+    def __init__(self, process_noise: float = 1.0, measurement_noise: float = 1e-4):
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self) -> None:
+        self.pos: Optional[np.ndarray] = None
+        self.vel: Optional[np.ndarray] = None
+        self.p00 = self.p01 = self.p11 = None
+
+    def __call__(self, z: np.ndarray, dt: float, mask: np.ndarray, lead: float = 0.0) -> np.ndarray:
+        if self.pos is None or self.pos.shape != z.shape:
+            self.pos = z.copy()
+            self.vel = np.zeros_like(z)
+            self.p00 = np.full_like(z, self.r)
+            self.p01 = np.zeros_like(z)
+            self.p11 = np.full_like(z, self.q)
+            return self.pos
+
+        # Predict (white-noise acceleration model)
+        pos = self.pos + self.vel * dt
+        p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + self.q * dt ** 3 / 3
+        p01 = self.p01 + dt * self.p11 + self.q * dt ** 2 / 2
+        p11 = self.p11 + self.q * dt
+
+        # Update with the measured position
+        s = p00 + self.r
+        k0 = p00 / s
+        k1 = p01 / s
+        innovation = z - pos
+        new_pos = pos + k0 * innovation
+        new_vel = self.vel + k1 * innovation
+
+        self.pos = np.where(mask, new_pos, self.pos)
+        self.vel = np.where(mask, new_vel, self.vel)
+        self.p00 = np.where(mask, (1 - k0) * p00, self.p00)
+        self.p01 = np.where(mask, (1 - k0) * p01, self.p01)
+        self.p11 = np.where(mask, p11 - k1 * p01, self.p11)
+        return self.pos + self.vel * lead if lead else self.pos
+
+
+class LandmarkSmoother:
+    """One Euro smoothing plus optional Kalman latency compensation.
+
+    Takes and returns ``(count, 4)`` arrays of x, y, z, visibility; the
+    visibility column is passed through unchanged.
+    """
+
+    def __init__(
+        self,
+        min_cutoff: float = 1.0,
+        beta: float = 0.3,
+        d_cutoff: float = 1.0,
+        min_visibility: float = 0.5,
+        predict_ms: float = 0.0
+    ):
+        self.one_euro = OneEuroFilter(min_cutoff, beta, d_cutoff)
+        self.kalman = ConstantVelocityKalman() if predict_ms > 0 else None
+        self.min_visibility = min_visibility
+        self.predict_ms = predict_ms
+        self._last_time: Optional[float] = None
+
+    def reset(self) -> None:
+        self.one_euro.reset()
+        if self.kalman is not None:
+            self.kalman.reset()
+        self._last_time = None
+
+    def __call__(self, landmarks: np.ndarray, timestamp: float) -> np.ndarray:
+        """Filter one frame; ``timestamp`` is in seconds."""
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        dt = None if self._last_time is None else timestamp - self._last_time
+        if dt is not None and dt > MAX_GAP_SECONDS:
+            self.reset()
+        else:
+            # Guard against duplicate or out-of-order timestamps
+            dt = max(dt, 1e-3) if dt is not None else None
+        self._last_time = timestamp
+
+        if landmarks.shape[1] > 3:
+            mask = landmarks[:, 3:4] >= self.min_visibility
+        else:
+            mask = np.ones((len(landmarks), 1), dtype=bool)
+
+        # First frame after a reset only initializes the state, so dt is unused
+        step = dt or 1.0
+        smoothed = self.one_euro(landmarks[:, :3], step, mask)
+        if self.kalman is not None:
+            smoothed = self.kalman(smoothed, step, mask, lead=self.predict_ms / 1000.0)
+
+        out = landmarks.copy()
+        out[:, :3] = smoothed
+        return out
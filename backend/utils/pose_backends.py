@@ -0,0 +1,227 @@
+"""Server-side pose estimation on camera frames.
+
+A ``PoseBackend`` turns one RGB image into normalized landmarks. Backends
+are looked up by name in ``POSE_BACKENDS`` (``VISION3_POSE_BACKEND``,
+default ``auto``: MediaPipe when it is installed, otherwise none), so a
+different CPU model can be plugged in without touching the capture loop.
+
+``PoseRunner`` sits between the camera and a backend. It runs inference
+on every ``every``-th frame only, on a copy downscaled to ``width`` pixels
+wide (landmarks are normalized, so they still map onto the full frame),
+and publishes the newest ``PoseEstimate`` for readers on other threads.
+"""
+import os
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import mediapipe as mp
+except ImportError:
+    mp = None
+
+# Body connections of the MediaPipe 33-point model (face points omitted)
+POSE_CONNECTIONS = (
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (25, 27), (27, 29), (27, 31), (29, 31),
+    (24, 26), (26, 28), (28, 30), (28, 32), (30, 32),
+)
+DEFAULT_INFER_EVERY = 2
+DEFAULT_INFER_WIDTH = 320
+
+Detection = Tuple[np.ndarray, Optional[np.ndarray]]  # (33, 4) landmarks, world landmarks
+
+
+class PoseEstimate(NamedTuple):
+    """Newest landmarks for a camera frame, in the same layout as decoded WS frames."""
+    timestamp: int      # ms, same clock as analysis results
+    sequence: int       # index of the camera frame the pose was inferred from
+    width: int          # size of the full camera frame
+    height: int
+    landmarks: np.ndarray  # (33, 4) float32 x, y, z, visibility
+    world_landmarks: Optional[np.ndarray] = None
+
+
+class PoseBackend:
+    """Interface for pose models: one RGB image in, landmarks (or None) out."""
+
+    name = "none"
+
+    def process(self, rgb: np.ndarray, timestamp: int) -> Optional[Detection]:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class NullPoseBackend(PoseBackend):
+    """No inference; the camera only streams video."""
+
+
+def _landmark_array(landmarks) -> np.ndarray:
+    return np.array([(p.x, p.y, p.z, getattr(p, "visibility", 1.0)) for p in landmarks], dtype=np.float32)
+
+
+class MediaPipePoseBackend(PoseBackend):
+    """MediaPipe Pose on the CPU.
+
+    Uses the legacy ``solutions`` API when the installed package has it,
+    and the Tasks ``PoseLandmarker`` otherwise, which needs a ``.task``
+    model file from ``VISION3_POSE_MODEL``.
+    """
+
+    name = "mediapipe"
+
+    def __init__(self, model_complexity: int = 0, model_path: Optional[str] = None):
+        if mp is None:
+            raise RuntimeError("mediapipe is not installed")
+        self._pose = None
+        self._landmarker = None
+        solutions = getattr(mp, "solutions", None)
+        if solutions is not None and hasattr(solutions, "pose"):
+            self._pose = solutions.pose.Pose(
+                static_image_mode=False,
+                model_complexity=model_complexity,
+                smooth_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+            return
+
+        model_path = model_path or os.environ.get("VISION3_POSE_MODEL")
+        if not model_path:
+            raise RuntimeError("mediapipe has no solutions API; set VISION3_POSE_MODEL to a pose_landmarker .task file")
+        from mediapipe.tasks.python import BaseOptions, vision
+        self._landmarker = vision.PoseLandmarker.create_from_options(vision.PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=1
+        ))
+        self._last_timestamp = -1
+
+    def process(self, rgb: np.ndarray, timestamp: int) -> Optional[Detection]:
+        if self._pose is not None:
+            results = self._pose.process(rgb)
+            if results is None or not results.pose_landmarks:
+                return None
+            world = results.pose_world_landmarks
+            return (_landmark_array(results.pose_landmarks.landmark),
+                    _landmark_array(world.landmark) if world else None)
+
+        # VIDEO mode rejects timestamps that do not increase
+        timestamp = max(timestamp, self._last_timestamp + 1)
+        self._last_timestamp = timestamp
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb))
+        result = self._landmarker.detect_for_video(image, timestamp)
+        if not result.pose_landmarks:
+            return None
+        world = result.pose_world_landmarks
+        return (_landmark_array(result.pose_landmarks[0]),
+                _landmark_array(world[0]) if world else None)
+
+    def close(self) -> None:
+        if self._pose is not None:
+            self._pose.close()
+        if self._landmarker is not None:
+            self._landmarker.close()
+
+
+POSE_BACKENDS: Dict[str, Callable[[], PoseBackend]] = {
+    "none": NullPoseBackend,
+    "mediapipe": MediaPipePoseBackend,
+}
+
+
+def create_pose_backend(name: Optional[str] = None) -> PoseBackend:
+    """Backend registered under ``name`` (default ``VISION3_POSE_BACKEND``).
+
+    ``auto`` falls back to no inference when MediaPipe is unavailable;
+    naming a backend explicitly raises if it cannot be created.
+    """
+    name = name or os.environ.get("VISION3_POSE_BACKEND", "auto")
+    if name == "auto":
+        try:
+            return MediaPipePoseBackend()
+        except RuntimeError as e:
+            print(f"Server-side pose inference disabled: {e}")
+            return NullPoseBackend()
+    if name not in POSE_BACKENDS:
+        raise ValueError(f"Unknown pose backend: {name}")
+    return POSE_BACKENDS[name]()
+
+
+class PoseRunner:
+    """Frame-skipping, downscaled inference that publishes the newest pose."""
+
+    def __init__(
+        self,
+        backend: PoseBackend,
+        every: int = DEFAULT_INFER_EVERY,
+        width: int = DEFAULT_INFER_WIDTH
+    ):
+        self.backend = backend
+        self.every = max(1, every)
+        # Extra interval multiplier set by the QoS governor under load
+        self.throttle = 1
+        self.width = width
+        self.latest: Optional[PoseEstimate] = None
+        self.inferences = 0
+        self._frames = 0
+
+    @classmethod
+    def from_env(cls, backend: Optional[PoseBackend] = None) -> "PoseRunner":
+        return cls(
+            backend if backend is not None else create_pose_backend(),
+            every=int(os.environ.get("VISION3_POSE_EVERY", DEFAULT_INFER_EVERY)),
+            width=int(os.environ.get("VISION3_POSE_WIDTH", DEFAULT_INFER_WIDTH))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return not isinstance(self.backend, NullPoseBackend)
+
+    def submit(self, frame: np.ndarray, timestamp: int, mirror: bool = False) -> Optional[PoseEstimate]:
+        """Run inference on ``frame`` (BGR) if it is due; returns the newest estimate.
+
+        Frames that are skipped, or where no person is found, leave the
+        previous estimate in place; its ``timestamp`` tells readers how old it is.
+        With ``mirror`` the image landmarks are flipped horizontally to match a
+        mirrored preview, while their left/right labels stay anatomical.
+        """
+        sequence = self._frames
+        self._frames += 1
+        if not self.enabled or sequence % (self.every * self.throttle):
+            return self.latest
+
+        height, width = frame.shape[:2]
+        small = frame
+        if 0 < self.width < width:
+            small = cv2.resize(frame, (self.width, round(height * self.width / width)), interpolation=cv2.INTER_AREA)
+        detection = self.backend.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB), timestamp)
+        self.inferences += 1
+        if detection is not None:
+            landmarks, world = detection
+            if mirror:
+                landmarks = landmarks.copy()
+                landmarks[:, 0] = 1.0 - landmarks[:, 0]
+            self.latest = PoseEstimate(timestamp, sequence, width, height, landmarks, world)
+        return self.latest
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def draw_pose(frame: np.ndarray, estimate: PoseEstimate, min_visibility: float = 0.5) -> None:
+    """Draw the skeleton of ``estimate`` onto ``frame`` in place."""
+    height, width = frame.shape[:2]
+    landmarks = estimate.landmarks
+    points = np.rint(landmarks[:, :2] * (width, height)).astype(np.int32).tolist()
+    visible = (landmarks[:, 3] >= min_visibility).tolist()
+    for a, b in POSE_CONNECTIONS:
+        if visible[a] and visible[b]:
+            cv2.line(frame, tuple(points[a]), tuple(points[b]), (0, 255, 0), 2, cv2.LINE_AA)
+    for index in range(11, len(points)):
+        if visible[index]:
+            cv2.circle(frame, tuple(points[index]), 2, (0, 0, 255), 2, cv2.LINE_AA)
@@ -1,6 +1,6 @@
 import math
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 from models import Landmark, PostureIssue, PostureMetrics, AnalysisResponse, VisualAnnotation
 
 LANDMARKS = {
@@ -15,22 +15,102 @@ LANDMARKS = {
     "RIGHT_ANKLE": 28,
 }
 
-def get_pixel_coords(landmark: Landmark, width: int, height: int) -> Dict[str, float]:
+def get_pixel_coords(landmark: Union[Landmark, List[float], np.ndarray], width: int, height: int) -> Dict[str, float]:
+    if isinstance(landmark, list):
+        # Row of a landmark array after tolist(): already Python floats
+        return {
+            "x": landmark[0] * width,
+            "y": landmark[1] * height
+        }
+    if isinstance(landmark, np.ndarray):
+        # Row of a decoded (count, 4) landmark array: x, y, z, visibility
+        return {
+            "x": float(landmark[0]) * width,
+            "y": float(landmark[1]) * height
+        }
     return {
         "x": landmark.x * width,
         "y": landmark.y * height
     }
 
+class AnnotationCache:
+    """Session-scoped reuse of annotation objects between frames.
+
+    Reference annotations depend on a few slowly moving anchor coordinates.
+    An annotation is rebuilt only when one of its anchors moves more than
+    ``tolerance_px`` from where it was when the annotation was last built
+    (or its label changes); otherwise the previous object is reused, with
+    coordinates rounded to 0.1 px. Reused objects are unchanged by identity,
+    which makes ``diff`` cheap.
+    """
+
+    def __init__(self, tolerance_px: float = 2.0):
+        self.tolerance_px = tolerance_px
+        # id -> (anchors, label, annotation)
+        self._entries: Dict[str, Tuple[Tuple[float, ...], Optional[str], VisualAnnotation]] = {}
+        self._sent: Dict[str, VisualAnnotation] = {}
+        self._frame_size: Optional[Tuple[int, int]] = None
+
+    def set_frame_size(self, width: int, height: int) -> None:
+        # Plumb lines span the frame, so a new size invalidates everything
+        if self._frame_size != (width, height):
+            self._frame_size = (width, height)
+            self._entries.clear()
+
+    def lookup(self, key: str, anchors: Tuple[float, ...], label: Optional[str]) -> Optional[VisualAnnotation]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] != label:
+            return None
+        cached_anchors = entry[0]
+        if any(abs(a - b) > self.tolerance_px for a, b in zip(anchors, cached_anchors)):
+            return None
+        return entry[2]
+
+    def store(self, key: str, anchors: Tuple[float, ...], label: Optional[str], annotation: VisualAnnotation) -> None:
+        self._entries[key] = (anchors, label, annotation)
+
+    def diff(self, annotations: List[VisualAnnotation]) -> Tuple[List[VisualAnnotation], List[str]]:
+        """Annotations changed since the last diff, and ids that disappeared."""
+        current = {annotation.id: annotation for annotation in annotations}
+        changed = [annotation for key, annotation in current.items() if self._sent.get(key) is not annotation]
+        removed = [key for key in self._sent if key not in current]
+        self._sent = current
+        return changed, removed
+
+
+def _quantize_points(points: List[Dict[str, float]]) -> List[Dict[str, float]]:
+    return [{"x": round(p["x"], 1), "y": round(p["y"], 1)} for p in points]
+
+
 def analyze_posture(
     view: str,
-    landmarks: List[Landmark],
+    landmarks: Union[List[Landmark], np.ndarray],
     width: int,
-    height: int
+    height: int,
+    annotation_cache: Optional[AnnotationCache] = None
 ) -> Dict[str, Any]:
     issues = []
     annotations = []
     metrics = PostureMetrics()
 
+    if annotation_cache is not None:
+        annotation_cache.set_frame_size(width, height)
+    if isinstance(landmarks, np.ndarray):
+        # One conversion per frame is cheaper than a NumPy scalar read per coordinate
+        landmarks = landmarks.tolist()
+
+    def annotate(key: str, anchors: Tuple[float, ...], **fields: Any) -> None:
+        label = fields.get("label")
+        if annotation_cache is None:
+            annotations.append(VisualAnnotation(id=key, **fields))
+            return
+        annotation = annotation_cache.lookup(key, anchors, label)
+        if annotation is None:
+            fields["points"] = _quantize_points(fields["points"])
+            annotation = VisualAnnotation(id=key, **fields)
+            annotation_cache.store(key, anchors, label, annotation)
+        annotations.append(annotation)
+
     def get_point(index: int):
         if index >= len(landmarks):
             return {"x": 0, "y": 0}
@@ -50,13 +130,15 @@ def analyze_posture(
         metrics.headForward = round(forward_ratio, 3)
 
         # Base Reference Line: Vertical through shoulder
-        annotations.append(VisualAnnotation(
+        annotate(
+            "shoulder-plumb",
+            (shoulder["x"],),
             type="line",
             points=[{"x": shoulder["x"], "y": 0}, {"x": shoulder["x"], "y": height}],
             color="rgba(59, 130, 246, 0.5)", # Blue
             dashed=True,
             label="肩峰垂线"
-        ))
+        )
 
         if forward_ratio > 0.25:
             severity = 'severe' if forward_ratio > 0.45 else 'moderate'
@@ -69,12 +151,14 @@ def analyze_posture(
                 recommendation='建议进行颈部收缩训练（Chin Tucks），放松胸锁乳突肌和上斜方肌。',
                 points=[ear, shoulder]
             ))
-            annotations.append(VisualAnnotation(
+            annotate(
+                "head-forward",
+                (ear["x"], ear["y"], shoulder["x"]),
                 type="line",
                 points=[ear, {"x": shoulder["x"], "y": ear["y"]}],
                 color="#ef4444", # Red
                 label=f"前倾: {forward_ratio:.2f}"
-            ))
+            )
 
         # 2. Shoulder Rounded Analysis
         shoulder_hip_offset = abs(shoulder["x"] - hip["x"])
@@ -89,13 +173,15 @@ def analyze_posture(
         # In a real scenario, we'd check visibility. For now, let's use the one that exists.
         anchor_x = l_ankle["x"] if l_ankle["x"] > 0 else r_ankle["x"]
         
-        annotations.append(VisualAnnotation(
+        annotate(
+            "ankle-plumb",
+            (anchor_x,),
             type="line",
             points=[{"x": anchor_x, "y": height * 0.05}, {"x": anchor_x, "y": height * 0.95}],
             color="rgba(255, 255, 0, 0.8)", # Yellow
             label="垂直参考线",
             lineWidth=2
-        ))
+        )
 
         if kyphosis_ratio > 0.15:
             issues.append(PostureIssue(
@@ -107,12 +193,14 @@ def analyze_posture(
                 recommendation='建议加强背部肌群（菱形肌、中下斜方肌），伸展胸大肌。',
                 points=[shoulder, hip]
             ))
-            annotations.append(VisualAnnotation(
+            annotate(
+                "rounded-shoulders",
+                (shoulder["x"], shoulder["y"], hip["x"]),
                 type="line",
                 points=[shoulder, {"x": hip["x"], "y": shoulder["y"]}],
                 color="#f59e0b", # Orange
                 label=f"肩髋偏移: {kyphosis_ratio:.2f}"
-            ))
+            )
 
     # --- Front/Back View Analysis ---
     elif view in ['front', 'back']:
@@ -123,22 +211,26 @@ def analyze_posture(
         nose = get_point(LANDMARKS["NOSE"])
 
         # 1. Horizontal Shoulder Line
-        annotations.append(VisualAnnotation(
+        annotate(
+            "shoulder-line",
+            (l_shoulder["x"], l_shoulder["y"], r_shoulder["x"], r_shoulder["y"]),
             type="line",
             points=[l_shoulder, r_shoulder],
             color="rgba(0, 255, 255, 0.7)", # Cyan
             label="肩线",
             dash=[5, 5]
-        ))
+        )
 
         # 2. Horizontal Hip Line
-        annotations.append(VisualAnnotation(
+        annotate(
+            "hip-line",
+            (l_hip["x"], l_hip["y"], r_hip["x"], r_hip["y"]),
             type="line",
             points=[l_hip, r_hip],
             color="rgba(0, 255, 255, 0.7)", # Cyan
             label="髋线",
             dash=[5, 5]
-        ))
+        )
 
         # 3. Vertical Midline (Plumb Line)
         l_ankle = get_point(LANDMARKS["LEFT_ANKLE"])
@@ -170,12 +262,14 @@ def analyze_posture(
                 recommendation='建议进行颈部侧向拉伸，平衡两侧斜角肌力量。',
                 points=[l_ear, r_ear]
             ))
-            annotations.append(VisualAnnotation(
+            annotate(
+                "head-tilt",
+                (l_ear["x"], l_ear["y"], r_ear["x"], r_ear["y"]),
                 type="line",
                 points=[l_ear, r_ear],
                 color="#8b5cf6", # Purple
                 label=f"头倾斜: {head_tilt_angle}°"
-            ))
+            )
 
         if shoulder_slope > 0.03:
             is_left_high = l_shoulder["y"] < r_shoulder["y"]
@@ -188,12 +282,14 @@ def analyze_posture(
                 recommendation='建议平衡双侧斜方肌力量，检查是否有脊柱侧弯风险。',
                 points=[l_shoulder, r_shoulder]
             ))
-            annotations.append(VisualAnnotation(
+            annotate(
+                "uneven-shoulders",
+                (l_shoulder["x"], l_shoulder["y"], r_shoulder["x"], r_shoulder["y"]),
                 type="line",
                 points=[l_shoulder, r_shoulder],
                 color="#f59e0b", # Orange
                 label=f"倾斜: {metrics.shoulderAngle}°"
-            ))
+            )
 
         # 2. Hip alignment
         dx_h = abs(l_hip["x"] - r_hip["x"]) or 1
@@ -212,12 +308,14 @@ def analyze_posture(
                 recommendation='建议加强臀中肌和核心肌群，必要时进行步态分析。',
                 points=[l_hip, r_hip]
             ))
-            annotations.append(VisualAnnotation(
+            annotate(
+                "uneven-hips",
+                (l_hip["x"], l_hip["y"], r_hip["x"], r_hip["y"]),
                 type="line",
                 points=[l_hip, r_hip],
                 color="#f59e0b",
                 label=f"骨盆: {metrics.hipAngle}°"
-            ))
+            )
 
         # 3. Midline alignment
         l_ankle = get_point(LANDMARKS["LEFT_ANKLE"])
@@ -229,13 +327,15 @@ def analyze_posture(
         metrics.headDeviation = round(deviation_ratio, 3)
 
         # Midline Reference
-        annotations.append(VisualAnnotation(
+        annotate(
+            "midline",
+            (mid_ankle_x,),
             type="line",
             points=[{"x": mid_ankle_x, "y": height * 0.05}, {"x": mid_ankle_x, "y": height * 0.95}],
             color="rgba(255, 255, 0, 0.8)", # Yellow
             lineWidth=2,
             label="身体中轴线"
-        ))
+        )
 
         if deviation_ratio > 0.08:
             issues.append(PostureIssue(
@@ -247,12 +347,14 @@ def analyze_posture(
                 recommendation='建议进行核心稳定性训练和本体感觉训练。',
                 points=[nose, {"x": mid_ankle_x, "y": nose["y"]}]
             ))
-            annotations.append(VisualAnnotation(
+            annotate(
+                "midline-shift",
+                (nose["x"], nose["y"]),
                 type="point",
                 points=[nose],
                 color="#ef4444",
                 label="重心偏移"
-            ))
+            )
 
     return {
         "metrics": metrics,
@@ -0,0 +1,212 @@
+"""Load-aware degradation of camera quality to protect analysis latency.
+
+``/ws/analyze`` shares the CPU with the camera pipeline. ``QosGovernor``
+watches the p95 latency of JOINT_ANALYSIS frames (recorded by every
+``AnalysisSession`` into a ``LatencyWindow``) and, while it is above the
+target, walks down ``QOS_LEVELS``: first the preview's looks (beauty
+tier, JPEG quality, resolution), and only then the server-side pose rate.
+When latency has stayed well under the target for a while it walks back
+up one level at a time.
+
+Latency only shows the analysis side. A preview stage (beauty or encode)
+whose per-frame cost nears the frame budget, one capture interval, can no
+longer keep up with the camera even while analysis is fast, so saturation
+also steps down, through the preview levels only, and holds off stepping
+back up until the stages have headroom again.
+
+Levels are caps, not settings: each camera uses the lower of what it was
+configured with and what the current level allows, so an operator's
+choice (say, beauty off) is never raised by the governor. One level
+applies to every camera of the pool, since they share the CPU.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .beauty_filter import BEAUTY_TIERS
+
+DEFAULT_TARGET_P95_MS = 50.0
+DEFAULT_INTERVAL_S = 1.0
+DEFAULT_WINDOW_S = 5.0
+MIN_SAMPLES = 20
+RECOVER_RATIO = 0.6      # Latency must fall below this share of the target to step back up
+RECOVER_INTERVALS = 5    # ...for this many consecutive checks
+SATURATED_SHARE = 0.9    # Share of the frame budget a preview stage can take before it falls behind
+PREVIEW_STAGES = ("enhance", "encode")
+
+
+class QosSettings(NamedTuple):
+    """Upper bounds on camera work; ``pose_throttle`` multiplies the inference interval."""
+    beauty_tier: str = "full"
+    jpeg_quality: int = 90
+    preview_scale: float = 1.0
+    pose_throttle: int = 1
+
+
+UNRESTRICTED = QosSettings()
+
+# Cheapest sacrifices first: preview looks, then preview size, then pose rate
+QOS_LEVELS: List[QosSettings] = [
+    UNRESTRICTED,
+    QosSettings("balanced", 90, 1.0, 1),
+    QosSettings("fast", 90, 1.0, 1),
+    QosSettings("off", 75, 1.0, 1),
+    QosSettings("off", 60, 1.0, 1),
+    QosSettings("off", 60, 0.75, 1),
+    QosSettings("off", 50, 0.5, 1),
+    QosSettings("off", 50, 0.5, 2),
+    QosSettings("off", 50, 0.5, 4),
+]
+
+
+def saturation(stages: Dict[str, Dict[str, float]]) -> Optional[float]:
+    """Largest share of the frame budget a preview stage takes, or None before the camera has a rate."""
+    capture_fps = stages.get("capture", {}).get("fps", 0.0)
+    shares = [stages[stage]["ms"] * capture_fps / 1000 for stage in PREVIEW_STAGES if stage in stages]
+    return max(shares) if capture_fps > 0 and shares else None
+
+
+def cap_tier(configured: str, limit: str) -> str:
+    """The cheaper of two beauty tiers."""
+    return min(configured, limit, key=BEAUTY_TIERS.index)
+
+
+class LatencyWindow:
+    """Thread-safe rolling record of recent latencies."""
+
+    def __init__(self, window_s: float = DEFAULT_WINDOW_S, max_samples: int = 10000):
+        self.window_s = window_s
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms: float, now: Optional[float] = None) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic() if now is None else now, latency_ms))
+
+    def recent(self, now: Optional[float] = None) -> List[float]:
+        """Latencies recorded within the window, dropping older ones."""
+        cutoff = (time.monotonic() if now is None else now) - self.window_s
+        with self._lock:
+            while self._samples and self._samples[0][0] < cutoff:
+                self._samples.popleft()
+            return [latency for _, latency in self._samples]
+
+
+class QosGovernor:
+    """Steps the cameras' ``qos`` caps down and up to hold a p95 latency target.
+
+    ``cameras`` is a ``CameraPool``, or anything with ``running()`` and a
+    ``qos`` attribute that applies to all of its cameras.
+    """
+
+    def __init__(
+        self,
+        cameras: Any,
+        latency: LatencyWindow,
+        target_p95_ms: float = DEFAULT_TARGET_P95_MS,
+        interval_s: float = DEFAULT_INTERVAL_S,
+        min_samples: int = MIN_SAMPLES
+    ):
+        self.cameras = cameras
+        self.latency = latency
+        self.target_p95_ms = target_p95_ms
+        self.interval_s = interval_s
+        self.min_samples = min_samples
+        self.level = 0
+        self.p95_ms: Optional[float] = None
+        self.saturation: Optional[float] = None
+        self.samples = 0
+        self._calm = 0
+        self._last_change = float("-inf")
+
+    @classmethod
+    def from_env(cls, cameras: Any, latency: LatencyWindow) -> "QosGovernor":
+        return cls(cameras, latency, target_p95_ms=float(os.environ.get("VISION3_QOS_TARGET_MS", DEFAULT_TARGET_P95_MS)))
+
+    def tick(self, now: Optional[float] = None) -> Optional[int]:
+        """Check the latency once; returns the new level if it changed."""
+        now = time.monotonic() if now is None else now
+        recent = self.latency.recent(now)
+        self.samples = len(recent)
+        self.p95_ms = float(np.percentile(recent, 95)) if recent else None
+        cameras = self.cameras.running()
+        shares = [share for share in (saturation(camera.stage_stats()) for camera in cameras) if share is not None]
+        self.saturation = max(shares) if shares else None
+        if not cameras:
+            return None
+
+        measured = self.samples >= self.min_samples
+        slow = measured and self.p95_ms > self.target_p95_ms
+        saturated = self.saturation is not None and self.saturation > SATURATED_SHARE
+        if slow or saturated:
+            self._calm = 0
+            # Wait for the previous step to show up in the window before the next
+            if now - self._last_change < 2 * self.interval_s:
+                return None
+            # Pose rate does not relieve the preview stages, so only latency gives it up
+            return self._step(1, now, preview_only=not slow)
+
+        busy = self.saturation is not None and self.saturation >= SATURATED_SHARE * RECOVER_RATIO
+        if not busy and (not measured or self.p95_ms < self.target_p95_ms * RECOVER_RATIO):
+            self._calm += 1
+            if self._calm >= RECOVER_INTERVALS:
+                self._calm = 0
+                return self._step(-1, now)
+        else:
+            self._calm = 0
+        return None
+
+    def _step(self, direction: int, now: float, preview_only: bool = False) -> Optional[int]:
+        # Skip levels that would not change anything for the running cameras' configuration
+        cameras = self.cameras.running()
+        current = [camera.effective_qos() for camera in cameras]
+        level = self.level
+        while 0 <= level + direction < len(QOS_LEVELS):
+            level += direction
+            if preview_only and QOS_LEVELS[level].pose_throttle > 1:
+                return None
+            if [camera.effective_qos(QOS_LEVELS[level]) for camera in cameras] != current:
+                self.level = level
+                self.cameras.qos = QOS_LEVELS[level]
+                self._last_change = now
+                print(f"QoS level {level}: {QOS_LEVELS[level]} (p95 {self.p95_ms} ms, saturation {self.saturation})")
+                return level
+        if direction < 0 and self.level != 0:
+            # Remaining levels only lift caps these cameras do not reach
+            self.level = 0
+            self.cameras.qos = UNRESTRICTED
+            return 0
+        return None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "level": self.level,
+            "targetP95Ms": self.target_p95_ms,
+            "p95Ms": None if self.p95_ms is None else round(self.p95_ms, 2),
+            "samples": self.samples,
+            "saturation": None if self.saturation is None else round(self.saturation, 3),
+            "cameras": {
+                camera.camera_id: {
+                    "effective": camera.effective_qos()._asdict(),
+                    "stages": {
+                        # Share of one core each stage keeps busy
+                        stage: {**stats, "load": round(stats["fps"] * stats["ms"] / 1000, 3)}
+                        for stage, stats in camera.stage_stats().items()
+                    },
+                }
+                for camera in self.cameras.running()
+            },
+        }
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"QoS governor error: {e}")
@@ -0,0 +1,115 @@
+"""Incremental range-of-motion statistics for streamed joint angles.
+
+Every update is amortized O(1): running mean/min/max are plain accumulators
+and the hold-duration filter uses monotonic deques over the hold window.
+With a hold duration, an extreme only counts once the angle has stayed at
+or beyond it for that long, so single-frame spikes do not become the
+patient's recorded ROM.
+"""
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+
+class RunningRom:
+    """Running statistics for one measurement."""
+
+    __slots__ = (
+        "hold_ms", "count", "current", "mean", "min", "max", "peak_at",
+        "_started_at", "_low_window", "_high_window",
+    )
+
+    def __init__(self, hold_ms: float = 0.0):
+        self.hold_ms = hold_ms
+        self.count = 0
+        self.current: Optional[float] = None
+        self.mean = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.peak_at: Optional[int] = None
+        self._started_at: Optional[int] = None
+        # (since, value) with values increasing / decreasing respectively,
+        # giving the minimum and maximum over the hold window
+        self._low_window: Deque[Tuple[int, float]] = deque()
+        self._high_window: Deque[Tuple[int, float]] = deque()
+
+    def update(self, value: float, timestamp: int) -> None:
+        self.count += 1
+        self.current = value
+        self.mean += (value - self.mean) / self.count
+
+        if self.hold_ms <= 0:
+            held_high = held_low = value
+        else:
+            if self._started_at is None:
+                self._started_at = timestamp
+            # Lowest value over the hold window is the level held high, and vice versa
+            held_high = self._window_extreme(self._low_window, value, timestamp, lambda back: back >= value)
+            held_low = self._window_extreme(self._high_window, value, timestamp, lambda back: back <= value)
+            if timestamp - self._started_at < self.hold_ms:
+                return
+
+        if self.max is None or held_high > self.max:
+            self.max = held_high
+            self.peak_at = timestamp
+        if self.min is None or held_low < self.min:
+            self.min = held_low
+
+    def _window_extreme(self, window: Deque[Tuple[int, float]], value: float, timestamp: int,
+                        dominated: Callable[[float], bool]) -> float:
+        """Push a sample into a monotonic deque and return its extreme over the hold window."""
+        # An entry stands for the samples it dominated too, so it keeps the earliest of their times
+        since = timestamp
+        while window and dominated(window[-1][1]):
+            since = window.pop()[0]
+        window.append((since, value))
+        # The newest sample at or before the window start is the value held
+        # since then, so it stays as the anchor even when frames are sparse
+        cutoff = timestamp - self.hold_ms
+        while len(window) > 1 and window[1][0] <= cutoff:
+            window.popleft()
+        return window[0][1]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "current": self.current,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean if self.count else None,
+            "count": self.count,
+            "peakAt": self.peak_at,
+        }
+
+
+class RomTracker:
+    """Per-session ROM accumulators keyed by measurement id.
+
+    ``due`` rate-limits summaries so clients on slow links can receive a
+    ROM_SUMMARY every ``interval_ms`` instead of every JOINT_RESULT.
+    """
+
+    def __init__(self, hold_ms: float = 0.0, interval_ms: float = 500.0):
+        self.hold_ms = hold_ms
+        self.interval_ms = interval_ms
+        self.measurements: Dict[str, RunningRom] = {}
+        self._last_summary_at: Optional[int] = None
+
+    def update(self, results: Iterable[Tuple[str, Optional[float]]], timestamp: int) -> None:
+        """Feed one frame of (measurement id, angle) pairs; None angles are skipped."""
+        for m_id, angle in results:
+            if angle is None:
+                continue
+            rom = self.measurements.get(m_id)
+            if rom is None:
+                rom = self.measurements[m_id] = RunningRom(self.hold_ms)
+            rom.update(angle, timestamp)
+
+    def reset(self) -> None:
+        self.measurements.clear()
+        self._last_summary_at = None
+
+    def due(self, timestamp: int) -> bool:
+        return self._last_summary_at is None or timestamp - self._last_summary_at >= self.interval_ms
+
+    def summaries(self, timestamp: int) -> List[Dict[str, Any]]:
+        self._last_summary_at = timestamp
+        return [{"id": m_id, **rom.summary()} for m_id, rom in self.measurements.items()]
@@ -0,0 +1,275 @@
+"""Columnar, memory-mapped recording of landmark streams.
+
+A recording is a directory of fixed-size chunks. Each chunk stores one
+``.npy`` file per column, preallocated for ``chunk_frames`` rows and
+written in place through a memory map:
+
+    timestamps.npy  int64 (N,)          milliseconds, -1 for unused rows
+    landmarks.npy   int16 (N, 33, 4)    x, y, z, visibility * LANDMARK_SCALE
+    world.npy       int16 (N, 33, 4)    world landmarks, same scale
+    info.npy        uint8 (N, 3)        message type, view, flags
+    size.npy        uint16 (N, 2)       width, height
+
+With ``quantize=False`` the landmark columns are float32 instead. An
+int16 step of 1e-4 is 0.1 px on a 1000 px frame, or 0.1 mm in world
+coordinates, and halves the size of float32. ``meta.json`` lists the chunks
+with their time spans so readers can seek by time without touching other
+chunks; a chunk left open by a crash is recovered from its timestamps.
+"""
+import json
+import os
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .frame_codec import (
+    FLAG_WORLD_LANDMARKS, LANDMARK_FIELDS, MESSAGE_CODES, MESSAGE_TYPES, VIEW_CODES, VIEWS, LandmarkFrame
+)
+
+RECORDING_FORMAT_VERSION = 1
+NUM_LANDMARKS = 33
+LANDMARK_SCALE = 10000.0
+DEFAULT_CHUNK_FRAMES = 1800  # One minute at 30 fps
+# Ten minutes at 30 fps; each chunk's columns are preallocated on disk
+MAX_CHUNK_FRAMES = 18000
+UNUSED_TIMESTAMP = -1
+
+_INT16_MIN = np.iinfo(np.int16).min
+_INT16_MAX = np.iinfo(np.int16).max
+
+
+def recording_root() -> Optional[str]:
+    """Directory for recordings; recording is disabled unless it is set."""
+    return os.environ.get("VISION3_RECORD_DIR") or None
+
+
+def _chunk_dir(path: str, index: int) -> str:
+    return os.path.join(path, f"chunk-{index:06d}")
+
+
+def _quantize(values: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(values * LANDMARK_SCALE), _INT16_MIN, _INT16_MAX).astype(np.int16)
+
+
+class RecordedFrames(NamedTuple):
+    """Columns for a range of recorded frames, landmarks as float32."""
+    timestamps: np.ndarray       # (N,) int64 ms
+    landmarks: np.ndarray        # (N, 33, 4)
+    world_landmarks: np.ndarray  # (N, 33, 4), NaN where the frame had none
+    types: List[str]
+    views: List[str]
+    widths: np.ndarray
+    heights: np.ndarray
+
+    def frame(self, i: int) -> LandmarkFrame:
+        has_world = not np.isnan(self.world_landmarks[i, 0, 0])
+        return LandmarkFrame(
+            type=self.types[i],
+            view=self.views[i],
+            width=int(self.widths[i]),
+            height=int(self.heights[i]),
+            landmarks=self.landmarks[i],
+            world_landmarks=self.world_landmarks[i] if has_world else None
+        )
+
+
+class SessionRecorder:
+    """Appends decoded frames to a chunked columnar store."""
+
+    def __init__(self, path: str, chunk_frames: int = DEFAULT_CHUNK_FRAMES, quantize: bool = True):
+        if not 1 <= chunk_frames <= MAX_CHUNK_FRAMES:
+            raise ValueError(f"chunk_frames must be between 1 and {MAX_CHUNK_FRAMES}, got {chunk_frames}")
+        if os.path.exists(os.path.join(path, "meta.json")):
+            raise FileExistsError(f"Recording already exists: {path}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.quantize = quantize
+        self.frames = 0
+        self._chunks: List[Dict[str, Any]] = []
+        self._columns: Optional[Dict[str, np.memmap]] = None
+        self._row = 0
+        self._last_timestamp = UNUSED_TIMESTAMP
+        self._write_meta()
+
+    def _open_chunk(self) -> None:
+        directory = _chunk_dir(self.path, len(self._chunks))
+        os.makedirs(directory)
+        landmark_dtype = np.int16 if self.quantize else np.float32
+        shape = (self.chunk_frames, NUM_LANDMARKS, LANDMARK_FIELDS)
+        specs = {
+            "timestamps": (np.int64, (self.chunk_frames,)),
+            "landmarks": (landmark_dtype, shape),
+            "world": (landmark_dtype, shape),
+            "info": (np.uint8, (self.chunk_frames, 3)),
+            "size": (np.uint16, (self.chunk_frames, 2)),
+        }
+        self._columns = {
+            name: np.lib.format.open_memmap(os.path.join(directory, f"{name}.npy"), mode="w+",
+                                            dtype=dtype, shape=col_shape)
+            for name, (dtype, col_shape) in specs.items()
+        }
+        self._columns["timestamps"][:] = UNUSED_TIMESTAMP
+        self._chunks.append({"frames": 0, "start": None, "end": None})
+        self._row = 0
+        self._write_meta()
+
+    def _close_chunk(self) -> None:
+        if self._columns is None:
+            return
+        for column in self._columns.values():
+            column.flush()
+        self._columns = None
+
+    def append(self, frame: LandmarkFrame, timestamp: int) -> None:
+        """Record one frame; raises ValueError for a non-33-landmark frame."""
+        landmarks = np.asarray(frame.landmarks)
+        if landmarks.shape != (NUM_LANDMARKS, LANDMARK_FIELDS):
+            raise ValueError(f"Expected ({NUM_LANDMARKS}, {LANDMARK_FIELDS}) landmarks, got {landmarks.shape}")
+        world = frame.world_landmarks
+        if world is not None and np.shape(world) != landmarks.shape:
+            world = None
+
+        if self._columns is None or self._row >= self.chunk_frames:
+            self._close_chunk()
+            self._open_chunk()
+
+        # Keep timestamps sorted so range lookups can bisect
+        timestamp = max(int(timestamp), self._last_timestamp)
+        self._last_timestamp = timestamp
+        row = self._row
+        columns = self._columns
+        convert = _quantize if self.quantize else (lambda values: values)
+        columns["landmarks"][row] = convert(landmarks)
+        if world is not None:
+            columns["world"][row] = convert(np.asarray(world))
+        columns["info"][row] = (
+            MESSAGE_CODES.get(frame.type, 0),
+            VIEW_CODES.get(frame.view, 0),
+            FLAG_WORLD_LANDMARKS if world is not None else 0
+        )
+        columns["size"][row] = (frame.width, frame.height)
+        # Timestamp last: a row counts as written once its timestamp is set
+        columns["timestamps"][row] = timestamp
+
+        chunk = self._chunks[-1]
+        chunk["frames"] = row + 1
+        if chunk["start"] is None:
+            chunk["start"] = timestamp
+        chunk["end"] = timestamp
+        self._row += 1
+        self.frames += 1
+        if self._row == self.chunk_frames:
+            self._write_meta()
+
+    def _write_meta(self) -> None:
+        meta = {
+            "version": RECORDING_FORMAT_VERSION,
+            "landmarks": NUM_LANDMARKS,
+            "quantized": self.quantize,
+            "scale": LANDMARK_SCALE if self.quantize else 1.0,
+            "chunkFrames": self.chunk_frames,
+            "chunks": self._chunks,
+        }
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    def close(self) -> None:
+        self._close_chunk()
+        self._write_meta()
+
+
+class SessionReader:
+    """Random access to a recording by time range, without loading it whole."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.scale = float(self.meta["scale"])
+        self.chunks: List[Dict[str, Any]] = []
+        for index, chunk in enumerate(self.meta["chunks"]):
+            timestamps = self._column(index, "timestamps")
+            # meta.json is only rewritten when a chunk fills up or the
+            # recorder closes; count rows from the timestamps instead
+            frames = int(np.searchsorted(timestamps == UNUSED_TIMESTAMP, True))
+            if frames:
+                self.chunks.append({
+                    "index": index, "frames": frames,
+                    "start": int(timestamps[0]), "end": int(timestamps[frames - 1]),
+                })
+
+    def _column(self, index: int, name: str) -> np.ndarray:
+        return np.load(os.path.join(_chunk_dir(self.path, index), f"{name}.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return sum(chunk["frames"] for chunk in self.chunks)
+
+    @property
+    def start(self) -> Optional[int]:
+        return self.chunks[0]["start"] if self.chunks else None
+
+    @property
+    def end(self) -> Optional[int]:
+        return self.chunks[-1]["end"] if self.chunks else None
+
+    def _slices(self, start_ms: Optional[int], end_ms: Optional[int]) -> Iterator[Tuple[int, int, int]]:
+        """(chunk index, first row, stop row) covering ``start_ms <= t < end_ms``."""
+        for chunk in self.chunks:
+            if end_ms is not None and chunk["start"] >= end_ms:
+                break
+            if start_ms is not None and chunk["end"] < start_ms:
+                continue
+            timestamps = self._column(chunk["index"], "timestamps")[:chunk["frames"]]
+            first = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, "left"))
+            stop = chunk["frames"] if end_ms is None else int(np.searchsorted(timestamps, end_ms, "left"))
+            if first < stop:
+                yield chunk["index"], first, stop
+
+    def _dequantize(self, values: np.ndarray) -> np.ndarray:
+        if values.dtype == np.int16:
+            return values.astype(np.float32) / np.float32(self.scale)
+        return np.array(values, dtype=np.float32)
+
+    def _read_slice(self, index: int, first: int, stop: int) -> RecordedFrames:
+        info = np.asarray(self._column(index, "info")[first:stop])
+        size = np.asarray(self._column(index, "size")[first:stop])
+        world = self._dequantize(self._column(index, "world")[first:stop])
+        world[(info[:, 2] & FLAG_WORLD_LANDMARKS) == 0] = np.nan
+        return RecordedFrames(
+            timestamps=np.array(self._column(index, "timestamps")[first:stop]),
+            landmarks=self._dequantize(self._column(index, "landmarks")[first:stop]),
+            world_landmarks=world,
+            types=[MESSAGE_TYPES.get(code, "JOINT_ANALYSIS") for code in info[:, 0].tolist()],
+            views=[VIEWS.get(code, "front") for code in info[:, 1].tolist()],
+            widths=size[:, 0].astype(np.int64),
+            heights=size[:, 1].astype(np.int64)
+        )
+
+    def read(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> RecordedFrames:
+        """All frames with ``start_ms <= timestamp < end_ms`` as arrays."""
+        parts = [self._read_slice(*bounds) for bounds in self._slices(start_ms, end_ms)]
+        if not parts:
+            empty = np.zeros((0, NUM_LANDMARKS, LANDMARK_FIELDS), dtype=np.float32)
+            return RecordedFrames(np.zeros(0, dtype=np.int64), empty, empty.copy(), [], [],
+                                  np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        if len(parts) == 1:
+            return parts[0]
+        return RecordedFrames(
+            timestamps=np.concatenate([p.timestamps for p in parts]),
+            landmarks=np.concatenate([p.landmarks for p in parts]),
+            world_landmarks=np.concatenate([p.world_landmarks for p in parts]),
+            types=[t for p in parts for t in p.types],
+            views=[v for p in parts for v in p.views],
+            widths=np.concatenate([p.widths for p in parts]),
+            heights=np.concatenate([p.heights for p in parts])
+        )
+
+    def replay(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Iterator[Tuple[int, LandmarkFrame]]:
+        """Yield (timestamp, frame) pairs, one chunk in memory at a time."""
+        for bounds in self._slices(start_ms, end_ms):
+            part = self._read_slice(*bounds)
+            for i, timestamp in enumerate(part.timestamps.tolist()):
+                yield timestamp, part.frame(i)
@@ -0,0 +1,157 @@
+"""Per-viewer MJPEG stream profiles: resolution, JPEG quality and frame rate.
+
+The camera's encode stage produces one variant per profile that has
+viewers (``VariantStream``) and publishes it through its own
+``FrameBroadcaster``, so a variant is resized and encoded once per frame
+however many viewers watch it. A variant with a ``max_fps`` is only
+encoded at that rate.
+
+``ViewerAdapter`` moves one viewer down ``LADDER`` when it receives too
+few of the frames its variant publishes (a slow link: sends back up and
+the viewer skips frames), and back up towards the profile it asked for
+once it has kept up for a while.
+"""
+from typing import List, NamedTuple, Optional
+
+from .frame_broadcast import FrameBroadcaster
+
+# Profiles count as equal to the base stream up to this width
+REFERENCE_WIDTH = 1920
+REFERENCE_FPS = 30.0
+FPS_SLACK_S = 0.005  # Frame timing jitter tolerated before a rate-limited variant skips a frame
+VARIANT_IDLE_S = 60.0
+
+DELIVERY_WINDOW_S = 2.0
+MIN_DELIVERY = 0.7       # Share of published frames a viewer must receive to keep its profile
+RECOVER_DELIVERY = 0.95
+RECOVER_WINDOWS = 5      # Consecutive good windows before stepping back up
+
+
+class StreamProfile(NamedTuple):
+    """``width`` 0 keeps the camera's width; ``max_fps`` 0 sends every frame."""
+    name: str
+    width: int = 0
+    quality: int = 90
+    max_fps: float = 0.0
+
+    @property
+    def key(self):
+        return (self.width, self.quality, self.max_fps)
+
+    def cost(self) -> float:
+        """Rough relative bandwidth, to order profiles."""
+        width = self.width or REFERENCE_WIDTH
+        return width * width * self.quality * (self.max_fps or REFERENCE_FPS)
+
+
+FULL = StreamProfile("full")
+
+# Cheapest last; viewers are stepped down this list
+LADDER: List[StreamProfile] = [
+    FULL,
+    StreamProfile("high", 1280, 80, 30),
+    StreamProfile("medium", 960, 70, 20),
+    StreamProfile("low", 640, 60, 15),
+    StreamProfile("minimal", 320, 45, 5),
+]
+PROFILES = {profile.name: profile for profile in LADDER}
+
+
+def custom_profile(base: StreamProfile, width: Optional[int] = None, quality: Optional[int] = None,
+                   max_fps: Optional[float] = None) -> StreamProfile:
+    """``base`` with any of its settings overridden, range-checked."""
+    if width is not None and width < 0:
+        raise ValueError("width must not be negative")
+    if quality is not None and not 1 <= quality <= 100:
+        raise ValueError("quality must be between 1 and 100")
+    if max_fps is not None and max_fps < 0:
+        raise ValueError("fps must not be negative")
+    if width is None and quality is None and max_fps is None:
+        return base
+    return StreamProfile(
+        "custom",
+        base.width if width is None else width,
+        base.quality if quality is None else quality,
+        base.max_fps if max_fps is None else max_fps,
+    )
+
+
+def ladder_from(profile: StreamProfile) -> List[StreamProfile]:
+    """``profile`` followed by the cheaper presets to fall back to."""
+    return [profile] + [p for p in LADDER if p.cost() < profile.cost()]
+
+
+class VariantStream:
+    """One encoded variant of a camera's frames and the viewers of it."""
+
+    def __init__(self, profile: StreamProfile, now: float = 0.0):
+        self.profile = profile
+        self.frames = FrameBroadcaster()
+        # When a viewer last asked for it; unwatched variants are dropped after a while
+        self.requested_at = now
+        self._due = 0.0
+
+    def due(self, now: float) -> bool:
+        """Whether a frame captured ``now`` should be encoded; books it if so."""
+        if not self.profile.max_fps:
+            return True
+        if now + FPS_SLACK_S < self._due:
+            return False
+        interval = 1.0 / self.profile.max_fps
+        # Keeps the average rate when frames arrive late, without bursting to catch up
+        self._due = max(self._due, now - interval) + interval
+        return True
+
+
+class ViewerAdapter:
+    """Chooses the profile of one viewer from how many frames it keeps up with."""
+
+    def __init__(self, requested: StreamProfile, window_s: float = DELIVERY_WINDOW_S):
+        self.ladder = ladder_from(requested)
+        self.level = 0
+        self.window_s = window_s
+        self._good_windows = 0
+        self._reset(None, 0.0)
+
+    @property
+    def profile(self) -> StreamProfile:
+        return self.ladder[self.level]
+
+    def _reset(self, sequence: Optional[int], now: float) -> None:
+        self._window_start = now
+        self._first_sequence = sequence
+        self._delivered = 0
+
+    def record(self, sequence: int, now: float) -> Optional[StreamProfile]:
+        """Note a frame sent to the viewer; returns the new profile if it should change.
+
+        ``sequence`` is the variant's frame number, so gaps are frames the
+        viewer missed while its previous frame was still being sent.
+        """
+        if self._first_sequence is None:
+            self._reset(sequence, now)
+        self._delivered += 1
+        if now - self._window_start < self.window_s:
+            return None
+        published = sequence - self._first_sequence + 1
+        delivery = self._delivered / published
+        # The next window starts with the frame after this one
+        self._reset(sequence + 1, now)
+        if delivery < MIN_DELIVERY:
+            self._good_windows = 0
+            if self.level + 1 < len(self.ladder):
+                return self._switch(self.level + 1)
+        elif delivery >= RECOVER_DELIVERY and self.level > 0:
+            self._good_windows += 1
+            if self._good_windows >= RECOVER_WINDOWS:
+                self._good_windows = 0
+                return self._switch(self.level - 1)
+        else:
+            self._good_windows = 0
+        return None
+
+    def _switch(self, level: int) -> StreamProfile:
+        self.level = level
+        # The other variant numbers its frames independently
+        self._reset(None, 0.0)
+        return self.profile
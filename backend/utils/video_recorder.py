@@ -0,0 +1,225 @@
+"""Segmented server-side video recording of a camera, off the capture thread.
+
+The capture stage hands each frame to ``VideoRecorder.offer``, which copies
+it into a bounded queue and returns at once. When the encoder falls behind
+and the queue is full, the frame is dropped and counted instead of making
+the capture thread wait. A background thread encodes the queue into a
+directory of segments:
+
+    segment-000000.mp4          the frames, at the nominal rate ``fps``
+    segment-000000.index.csv    ``frame,timestamp``, one line per frame written
+    meta.json                   segments with their time spans and frame counts
+
+Every frame is written once, so playing a segment at the nominal rate only
+approximates capture time. Use the index to align video with landmark
+recordings: its timestamps are the capture times in milliseconds, on the
+same clock as ``PipelineFrame.timestamp``. A segment ends after
+``segment_s`` of frames, or when the frame size changes. Index lines are
+written as frames are, so a segment cut short by a crash keeps its index.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .metrics import REGISTRY
+
+RECORDING_FORMAT_VERSION = 1
+DEFAULT_FPS = 30.0
+DEFAULT_SEGMENT_S = 300.0
+DEFAULT_FOURCC = "mp4v"
+# A second of 720p frames; bounds the memory a stalled disk can take
+DEFAULT_QUEUE_SIZE = 30
+
+WRITE_SECONDS = REGISTRY.histogram(
+    "vision3_recording_write_seconds", "Time to encode and write one recorded frame.", ["camera"]
+)
+
+
+def _segment_name(index: int) -> str:
+    return f"segment-{index:06d}"
+
+
+class VideoRecorder:
+    """Encodes frames offered by a camera into segment files on a background thread."""
+
+    def __init__(self, path: str, camera_id: str = "0", fps: float = DEFAULT_FPS,
+                 segment_s: float = DEFAULT_SEGMENT_S, fourcc: str = DEFAULT_FOURCC,
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        if os.path.exists(os.path.join(path, "meta.json")):
+            raise FileExistsError(f"Recording already exists: {path}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.camera_id = camera_id
+        self.fps = fps
+        self.segment_s = segment_s
+        self.fourcc = fourcc
+        self.frames = 0
+        # Frames dropped by offer() on the capture thread and by _run() on the encoder
+        # thread; each thread has its own counter, so neither write can be lost
+        self._offer_dropped = 0
+        self._write_dropped = 0
+        self.error: Optional[str] = None
+        self.segments: List[Dict[str, Any]] = []
+        self.started_at = time.time()
+        self._queue: "queue.Queue[Optional[Tuple[int, np.ndarray]]]" = queue.Queue(maxsize=queue_size)
+        self._writer = None
+        self._index = None
+        self._closed = False
+        self._summary: Optional[Dict[str, Any]] = None
+        self._write_meta()
+        self._thread = threading.Thread(target=self._run, name=f"recorder-{camera_id}", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls, path: str, camera_id: str = "0", fps: Optional[float] = None) -> "VideoRecorder":
+        return cls(
+            path, camera_id,
+            fps=fps or float(os.environ.get("VISION3_RECORD_FPS", DEFAULT_FPS)),
+            segment_s=float(os.environ.get("VISION3_RECORD_SEGMENT_S", DEFAULT_SEGMENT_S)),
+            queue_size=int(os.environ.get("VISION3_RECORD_QUEUE", DEFAULT_QUEUE_SIZE))
+        )
+
+    def offer(self, timestamp: int, image: np.ndarray) -> bool:
+        """Queue a copy of ``image`` without blocking; False if it was dropped."""
+        if self._closed:
+            return False
+        # Checked first so a full queue costs no copy; only the encoder makes room
+        if self._queue.full():
+            self._offer_dropped += 1
+            return False
+        try:
+            self._queue.put_nowait((timestamp, image.copy()))
+        except queue.Full:
+            # close() may have taken the last slot for its stop marker since the check
+            self._offer_dropped += 1
+            return False
+        return True
+
+    @property
+    def dropped(self) -> int:
+        return self._offer_dropped + self._write_dropped
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            started = time.perf_counter()
+            try:
+                self._write(*item)
+            except Exception as e:
+                # Keep draining so the queue does not fill up and drop everything silently
+                if self.error is None:
+                    print(f"Camera {self.camera_id} recording error: {e}")
+                self.error = str(e)
+                self._write_dropped += 1
+                continue
+            WRITE_SECONDS.observe(time.perf_counter() - started, self.camera_id)
+
+    def _write(self, timestamp: int, image: np.ndarray) -> None:
+        height, width = image.shape[:2]
+        segment = self.segments[-1] if self._writer is not None else None
+        if (segment is None or (segment["width"], segment["height"]) != (width, height)
+                or timestamp - segment["start"] >= self.segment_s * 1000):
+            segment = self._open_segment(timestamp, width, height)
+        self._writer.write(image)
+        self._index.write(f"{segment['frames']},{timestamp}\n")
+        segment["frames"] += 1
+        segment["end"] = timestamp
+        self.frames += 1
+
+    def _open_segment(self, timestamp: int, width: int, height: int) -> Dict[str, Any]:
+        self._close_segment()
+        name = _segment_name(len(self.segments))
+        writer = cv2.VideoWriter(os.path.join(self.path, f"{name}.mp4"),
+                                 cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (width, height))
+        if not writer.isOpened():
+            raise RuntimeError(f"Could not open a {self.fourcc} video writer in {self.path}")
+        self._writer = writer
+        # Line-buffered, so every written frame is indexed on disk
+        self._index = open(os.path.join(self.path, f"{name}.index.csv"), "w", buffering=1)
+        self._index.write("frame,timestamp\n")
+        segment = {
+            "index": len(self.segments), "file": f"{name}.mp4", "indexFile": f"{name}.index.csv",
+            "width": width, "height": height, "start": timestamp, "end": timestamp, "frames": 0,
+        }
+        self.segments.append(segment)
+        self._write_meta()
+        return segment
+
+    def _close_segment(self) -> None:
+        if self._writer is not None:
+            self._writer.release()
+            self._index.close()
+            self._writer = self._index = None
+
+    def _write_meta(self) -> None:
+        meta = {
+            "version": RECORDING_FORMAT_VERSION,
+            "camera": self.camera_id,
+            "fps": self.fps,
+            "segmentSeconds": self.segment_s,
+            "segments": self.segments,
+        }
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    def close(self) -> Dict[str, Any]:
+        """Encode what is queued, finish the last segment and return the summary."""
+        if self._summary is not None:
+            return self._summary
+        self._closed = True
+        # Blocks at most until the encoder takes a frame off a full queue
+        self._queue.put(None)
+        self._thread.join()
+        self._close_segment()
+        self._write_meta()
+        self._summary = self.status()
+        return self._summary
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "camera": self.camera_id,
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "segments": len(self.segments),
+            "error": self.error,
+        }
+
+
+class RecordingIndex:
+    """Frame timestamps of a video recording, to find the frame shown at a given time."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.segments: List[Dict[str, Any]] = []
+        for segment in self.meta["segments"]:
+            # meta.json is rewritten per segment; the index file has every frame
+            rows = np.loadtxt(os.path.join(path, segment["indexFile"]), delimiter=",", skiprows=1,
+                              dtype=np.int64, ndmin=2)
+            if len(rows):
+                self.segments.append({**segment, "timestamps": rows[:, 1],
+                                      "start": int(rows[0, 1]), "end": int(rows[-1, 1]), "frames": len(rows)})
+
+    def __len__(self) -> int:
+        return sum(segment["frames"] for segment in self.segments)
+
+    def locate(self, timestamp: int) -> Optional[Tuple[str, int, int]]:
+        """``(segment file, frame number, frame timestamp)`` of the last frame at or before ``timestamp``."""
+        for segment in reversed(self.segments):
+            if segment["start"] <= timestamp:
+                frame = int(np.searchsorted(segment["timestamps"], timestamp, side="right")) - 1
+                return (os.path.join(self.path, segment["file"]), frame, int(segment["timestamps"][frame]))
+        return None
@@ -0,0 +1,298 @@
+"""Optional WebRTC (H.264) preview of a camera, for viewers on slow links.
+
+MJPEG from ``/video_feed`` sends every frame as a full JPEG; an inter-frame
+codec needs a fraction of that bandwidth. Each peer connection gets a
+``CameraVideoTrack`` that reads the camera's preview frames before JPEG
+encoding (``CameraManager.raw_frames``) and lets aiortc encode them,
+preferring H.264 (VP8 when the browser offers nothing else).
+
+Bitrate follows the link in two loops, as in Google Congestion Control:
+
+* delay-based: the receiver estimates the available bandwidth and sends
+  REMB, which aiortc applies to the encoder;
+* loss-based: ``BitrateController`` lowers the rate when RTCP receiver
+  reports show loss and raises it slowly while they do not. It caps the
+  encoder's rate, and the track steps down the ``stream_profiles`` ladder
+  (resolution, frame rate) so a low rate still gives legible frames.
+
+Signaling is a single offer/answer exchange (no trickle ICE), see the
+``/webrtc`` endpoints in ``main.py``. Without aiortc the publisher reports
+itself unavailable and clients fall back to MJPEG.
+"""
+import asyncio
+import os
+import uuid
+from fractions import Fraction
+from typing import Dict, List, Optional, Sequence
+
+import cv2
+
+from .stream_profiles import FPS_SLACK_S, FULL, REFERENCE_FPS, REFERENCE_WIDTH, StreamProfile, ladder_from
+
+try:
+    from aiortc import RTCConfiguration, RTCIceServer, RTCPeerConnection, RTCRtpSender, RTCSessionDescription
+    from aiortc.mediastreams import MediaStreamTrack
+    from av import VideoFrame
+except ImportError:  # Optional dependency; /video_feed keeps working without it
+    RTCPeerConnection = None
+    MediaStreamTrack = object
+
+MIN_BITRATE = 150_000
+MAX_BITRATE = 3_000_000
+START_BITRATE = 1_000_000
+
+# Loss-based control, per RTCP receiver report (about one a second)
+HIGH_LOSS = 0.10
+LOW_LOSS = 0.02
+INCREASE = 1.05
+CONTROL_INTERVAL_S = 0.5
+
+# H.264 bits per pixel a profile needs to look acceptable; picks the profile for a bitrate
+BITS_PER_PIXEL = 0.08
+ASPECT = 9 / 16
+VIDEO_CLOCK = 90000
+
+
+class BitrateController:
+    """Loss-based half of GCC: AIMD on the fraction of packets lost."""
+
+    def __init__(self, min_bitrate: int = MIN_BITRATE, max_bitrate: int = MAX_BITRATE,
+                 start_bitrate: int = START_BITRATE):
+        self.min_bitrate = min_bitrate
+        self.max_bitrate = max_bitrate
+        self.bitrate = max(min_bitrate, min(start_bitrate, max_bitrate))
+
+    def update(self, loss: float) -> int:
+        """Apply one receiver report's ``loss`` (0-1); returns the new target in bit/s."""
+        if loss > HIGH_LOSS:
+            bitrate = self.bitrate * (1 - 0.5 * loss)
+        elif loss < LOW_LOSS:
+            bitrate = self.bitrate * INCREASE
+        else:
+            bitrate = self.bitrate
+        self.bitrate = int(max(self.min_bitrate, min(bitrate, self.max_bitrate)))
+        return self.bitrate
+
+
+def required_bitrate(profile: StreamProfile) -> float:
+    width = profile.width or REFERENCE_WIDTH
+    return width * width * ASPECT * (profile.max_fps or REFERENCE_FPS) * BITS_PER_PIXEL
+
+
+def profile_for_bitrate(ladder: Sequence[StreamProfile], bitrate: float) -> StreamProfile:
+    """The best profile of ``ladder`` that ``bitrate`` sustains, else the cheapest."""
+    for profile in ladder:
+        if required_bitrate(profile) <= bitrate:
+            return profile
+    return ladder[-1]
+
+
+class CameraVideoTrack(MediaStreamTrack):
+    """Video track of one peer, fed with the camera's preview frames."""
+
+    kind = "video"
+
+    def __init__(self, camera, profile: StreamProfile = FULL):
+        super().__init__()
+        self.camera = camera
+        self.ladder = ladder_from(profile)
+        self.profile = profile
+        self.frames = 0
+        self._sequence = 0
+        self._last_timestamp: Optional[int] = None
+        self._first_timestamp: Optional[int] = None
+        self._pts = -1
+        # Counts as a viewer, so the camera keeps running and publishes raw frames
+        camera.raw_frames.subscribers += 1
+        self._subscribed = True
+
+    async def recv(self):
+        while True:
+            self._sequence, (timestamp, image) = await self.camera.raw_frames.next_frame(self._sequence)
+            max_fps = self.profile.max_fps
+            if (max_fps and self._last_timestamp is not None
+                    and timestamp - self._last_timestamp < 1000 * (1 / max_fps - FPS_SLACK_S)):
+                continue
+            break
+        self._last_timestamp = timestamp
+        height, width = image.shape[:2]
+        target = min(self.profile.width or width, width)
+        if target != width:
+            size = (target & ~1, max(2, round(height * target / width)) & ~1)
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        frame = VideoFrame.from_ndarray(image, format="bgr24")
+        if self._first_timestamp is None:
+            self._first_timestamp = timestamp
+        # Capture time on the 90 kHz RTP clock, strictly increasing
+        self._pts = max(self._pts + 1, (timestamp - self._first_timestamp) * (VIDEO_CLOCK // 1000))
+        frame.pts = self._pts
+        frame.time_base = Fraction(1, VIDEO_CLOCK)
+        self.frames += 1
+        return frame
+
+    def stop(self):
+        if self._subscribed:
+            self._subscribed = False
+            self.camera.raw_frames.subscribers -= 1
+        super().stop()
+
+
+_encoder_missing_warned = False
+
+
+def _encoder_of(sender):
+    # aiortc keeps the encoder private and creates it with the first frame; the attribute
+    # itself is set up with the sender, so its absence means aiortc renamed it
+    global _encoder_missing_warned
+    if sender is not None and not hasattr(sender, "_RTCRtpSender__encoder"):
+        if not _encoder_missing_warned:
+            _encoder_missing_warned = True
+            print("Warning: aiortc's RTCRtpSender has no encoder attribute; WebRTC bitrate "
+                  "is left to REMB (is the installed aiortc the version in requirements.txt?)")
+        return None
+    return getattr(sender, "_RTCRtpSender__encoder", None)
+
+
+class WebRtcPeer:
+    def __init__(self, peer_id: str, camera, connection, track: CameraVideoTrack,
+                 controller: BitrateController):
+        self.peer_id = peer_id
+        self.camera = camera
+        self.connection = connection
+        self.track = track
+        self.controller = controller
+        self.sender = None
+        self.task: Optional[asyncio.Task] = None
+        self.loss = 0.0
+        self.rtt: Optional[float] = None
+        self.encoder_bitrate: Optional[int] = None
+        self._report_at = None
+
+    def apply(self) -> None:
+        """Cap the encoder at the controller's rate and pick the profile for what is left."""
+        bitrate = self.controller.bitrate
+        encoder = _encoder_of(self.sender)
+        if encoder is not None and hasattr(encoder, "target_bitrate"):
+            # REMB may have set it lower already; the lower of the two estimates wins
+            if encoder.target_bitrate > bitrate:
+                encoder.target_bitrate = bitrate
+            self.encoder_bitrate = encoder.target_bitrate
+            # The encoder has a floor; below it, smaller and fewer frames take up the slack
+            bitrate = min(bitrate, self.encoder_bitrate)
+        profile = profile_for_bitrate(self.track.ladder, bitrate)
+        if profile != self.track.profile:
+            print(f"Camera {self.camera.camera_id} WebRTC peer {self.peer_id[:8]} "
+                  f"switched to the {profile.name} profile at {bitrate // 1000} kbit/s")
+            self.track.profile = profile
+
+    def status(self) -> Dict:
+        return {
+            "id": self.peer_id,
+            "camera": self.camera.camera_id,
+            "state": self.connection.connectionState,
+            "profile": self.track.profile.name,
+            "targetBitrate": self.controller.bitrate,
+            "encoderBitrate": self.encoder_bitrate,
+            "loss": round(self.loss, 3),
+            "rttMs": None if self.rtt is None else round(self.rtt * 1000, 1),
+            "frames": self.track.frames,
+        }
+
+
+class WebRtcPublisher:
+    """Answers WebRTC offers with a camera track and tracks the open peers."""
+
+    def __init__(self, min_bitrate: int = MIN_BITRATE, max_bitrate: int = MAX_BITRATE,
+                 ice_servers: Sequence[str] = ()):
+        self.min_bitrate = min_bitrate
+        self.max_bitrate = max_bitrate
+        self.ice_servers = list(ice_servers)
+        self.peers: Dict[str, WebRtcPeer] = {}
+
+    @classmethod
+    def from_env(cls) -> "WebRtcPublisher":
+        stun = os.environ.get("VISION3_WEBRTC_ICE_SERVERS", "")
+        return cls(
+            min_bitrate=int(os.environ.get("VISION3_WEBRTC_MIN_KBPS", MIN_BITRATE // 1000)) * 1000,
+            max_bitrate=int(os.environ.get("VISION3_WEBRTC_MAX_KBPS", MAX_BITRATE // 1000)) * 1000,
+            ice_servers=[url.strip() for url in stun.split(",") if url.strip()]
+        )
+
+    @property
+    def available(self) -> bool:
+        return RTCPeerConnection is not None
+
+    async def answer(self, camera, sdp: str, kind: str = "offer", profile: StreamProfile = FULL) -> WebRtcPeer:
+        """Open a peer connection sending ``camera`` for an SDP offer; its answer is in ``localDescription``.
+
+        Raises ``RuntimeError`` without aiortc and ``ValueError`` for an
+        offer that cannot receive video.
+        """
+        if not self.available:
+            raise RuntimeError("WebRTC needs the aiortc package")
+        if kind != "offer" or "m=video" not in sdp:
+            raise ValueError("Expected an SDP offer with a video section")
+        connection = RTCPeerConnection(RTCConfiguration(iceServers=[RTCIceServer(url) for url in self.ice_servers]))
+        peer = WebRtcPeer(
+            uuid.uuid4().hex, camera, connection, CameraVideoTrack(camera, profile),
+            BitrateController(self.min_bitrate, self.max_bitrate, START_BITRATE)
+        )
+        self.peers[peer.peer_id] = peer
+
+        @connection.on("connectionstatechange")
+        async def on_state_change():
+            if connection.connectionState in ("failed", "closed"):
+                await self.close(peer.peer_id)
+
+        try:
+            # Created before the offer is applied, so the offer's video section
+            # binds to it and codecs are negotiated in this order
+            transceiver = connection.addTransceiver(peer.track, direction="sendonly")
+            codecs = RTCRtpSender.getCapabilities("video").codecs
+            # Stable sort: H.264 first, the rest in aiortc's order
+            transceiver.setCodecPreferences(sorted(codecs, key=lambda c: c.mimeType != "video/H264"))
+            peer.sender = transceiver.sender
+            await connection.setRemoteDescription(RTCSessionDescription(sdp=sdp, type=kind))
+            await connection.setLocalDescription(await connection.createAnswer())
+        except Exception:
+            await self.close(peer.peer_id)
+            raise
+        peer.apply()
+        peer.task = asyncio.create_task(self._control(peer))
+        return peer
+
+    async def _control(self, peer: WebRtcPeer) -> None:
+        while True:
+            await asyncio.sleep(CONTROL_INTERVAL_S)
+            try:
+                report = await peer.sender.getStats()
+                for stats in report.values():
+                    # One controller step per new receiver report
+                    if stats.type == "remote-inbound-rtp" and stats.timestamp != peer._report_at:
+                        peer._report_at = stats.timestamp
+                        peer.loss = stats.fractionLost / 256
+                        peer.rtt = stats.roundTripTime
+                        peer.controller.update(peer.loss)
+                peer.apply()
+            except Exception as e:
+                print(f"WebRTC peer {peer.peer_id[:8]} control error: {e}")
+
+    async def close(self, peer_id: str) -> bool:
+        peer = self.peers.pop(peer_id, None)
+        if peer is None:
+            return False
+        if peer.task is not None and peer.task is not asyncio.current_task():
+            peer.task.cancel()
+        peer.track.stop()
+        await peer.connection.close()
+        return True
+
+    async def close_all(self) -> None:
+        for peer_id in list(self.peers):
+            await self.close(peer_id)
+
+    def count(self, camera_id: str) -> int:
+        return sum(1 for peer in list(self.peers.values()) if peer.camera.camera_id == camera_id)
+
+    def status(self) -> List[Dict]:
+        return [peer.status() for peer in list(self.peers.values())]